@@ -3,6 +3,7 @@ __all__ = [
     'BNode',
     'Literal',
     'Ontology',
+    'OntologyCache',
     'Entity',
     'Class',
     'Individual',
@@ -18,4 +19,6 @@ __all__ = [
 
 from rdflib import URIRef, BNode, Literal, RDF, RDFS, OWL, XSD
 
-from owllib.entities import Entity, Class, Individual, Property, ObjectProperty, AnnotationProperty, DataProperty
\ No newline at end of file
+from owllib.entities import Entity, Class, Individual, Property, ObjectProperty, AnnotationProperty, DataProperty
+from owllib.ontology import Ontology
+from owllib.cache import OntologyCache
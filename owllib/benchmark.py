@@ -0,0 +1,363 @@
+"""
+benchmarks for owllib's load, sync and query hot paths.  the suite runs against synthetic ontologies it generates, so it
+needs no network and is reproducible
+
+usage:
+    python -m owllib.benchmark suite [--classes N [N ...]] [--depth D] [--annotations A] [--individuals I] [--memory]
+    python -m owllib.benchmark generate <path> [--classes N] [--depth D] [--annotations A] [--individuals I]
+    python -m owllib.benchmark compare <location> [--sample N]
+
+compare times syncing entities from the graph with the single-pass bulk loader against the per-entity sync it replaced
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from rdflib import URIRef, Literal, RDF, RDFS, OWL
+
+from owllib.ontology import Ontology, DEFINITION
+
+#namespace of the generated ontologies
+BASE = 'http://example.org/owllib/benchmark/'
+
+#annotation properties the generator cycles through, after the label
+ANNOTATIONS = [DEFINITION,
+               RDFS.comment,
+               URIRef('http://www.geneontology.org/formats/oboInOwl#hasExactSynonym'),
+               URIRef('http://www.geneontology.org/formats/oboInOwl#hasRelatedSynonym')]
+
+
+def generate_ontology(out, classes=10000, depth=8, annotations=2, individuals=0.1, properties=20,
+                      multiple_parents=0.1, seed=0):
+    """
+    writes a synthetic OWL ontology to :param out as N-Triples
+    :param out: a text file object
+    :param classes: number of classes
+    :param depth: number of levels in the class hierarchy
+    :param annotations: annotations per class beyond its label: definitions, comments and synonyms in turn
+    :param individuals: number of individuals, as a fraction of the number of classes
+    :param properties: number of object properties, arranged in a shallow hierarchy
+    :param multiple_parents: fraction of classes given a second parent
+    :param seed: seed for the random hierarchy
+    :return: the number of triples written
+    """
+    rng = random.Random(seed)
+    write = out.write
+    count = [0]
+
+    def triple(s, p, o):
+        write('%s %s %s .\n' % (s.n3(), p.n3(), o.n3()))
+        count[0] += 1
+
+    ontology = URIRef(BASE)
+    triple(ontology, RDF.type, OWL.Ontology)
+
+    for prop in ANNOTATIONS:
+        triple(prop, RDF.type, OWL.AnnotationProperty)
+
+    for i in range(properties):
+        prop = URIRef('%sP_%d' % (BASE, i))
+        triple(prop, RDF.type, OWL.ObjectProperty)
+        triple(prop, RDFS.label, Literal('property %d' % i))
+        if i:
+            triple(prop, RDFS.subPropertyOf, URIRef('%sP_%d' % (BASE, (i - 1) // 4)))
+
+    depth = max(1, min(depth, classes))
+
+    #classes are split evenly across the levels, and each takes its parents from the level above
+    levels = [(level * classes // depth, (level + 1) * classes // depth) for level in range(depth)]
+
+    for level, (start, end) in enumerate(levels):
+        for i in range(start, end):
+            cls = URIRef('%sC_%d' % (BASE, i))
+            triple(cls, RDF.type, OWL.Class)
+            triple(cls, RDFS.label, Literal('class %d' % i))
+
+            for a in range(annotations):
+                triple(cls, ANNOTATIONS[a % len(ANNOTATIONS)], Literal('annotation %d of class %d' % (a, i)))
+
+            if level:
+                above_start, above_end = levels[level - 1]
+                parents = set([rng.randrange(above_start, above_end)])
+
+                if rng.random() < multiple_parents:
+                    parents.add(rng.randrange(above_start, above_end))
+
+                for parent in parents:
+                    triple(cls, RDFS.subClassOf, URIRef('%sC_%d' % (BASE, parent)))
+
+    for i in range(int(classes * individuals)):
+        indiv = URIRef('%sI_%d' % (BASE, i))
+        triple(indiv, RDF.type, OWL.NamedIndividual)
+        triple(indiv, RDF.type, URIRef('%sC_%d' % (BASE, rng.randrange(classes))))
+        triple(indiv, RDFS.label, Literal('individual %d' % i))
+
+    return count[0]
+
+
+def measure(function, memory=False):
+    """
+    calls :param function, timing it and, if :param memory is true, tracing its peak memory use
+    :param function:
+    :param memory:
+    :return: a (result, seconds, peak bytes or None) tuple
+    """
+    if memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    try:
+        result = function()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def run_suite(location, queries=10000, edits=100, memory=False, seed=0):
+    """
+    times the hot paths against the ontology at :param location: load, sync_from_graph, convert, get_sub_classes,
+    get_annotations and sync_to_graph
+    :param location:
+    :param queries: calls made to each of the query methods
+    :param edits: entities edited before timing sync_to_graph
+    :param memory: if true, peak memory is traced for each phase, which slows everything down
+    :param seed: seed for choosing what to query and edit
+    :return: a list of dicts with the 'phase', 'seconds', 'count', 'unit' and 'peak' of each phase
+    """
+    rng = random.Random(seed)
+    results = []
+
+    def record(phase, function, count, unit):
+        result, seconds, peak = measure(function, memory)
+        results.append({'phase': phase, 'seconds': seconds, 'count': count(result), 'unit': unit, 'peak': peak})
+        return result
+
+    ontology = Ontology()
+    record('load', lambda: ontology.load(location=location), lambda _: len(ontology.graph), 'triples')
+    record('sync_from_graph', ontology.sync_from_graph, lambda _: len(ontology.graph), 'triples')
+
+    uris = [entity.uri for entity in ontology.entities]
+    class_uris = [cls.uri for cls in ontology.classes]
+
+    def call_each(method, choices):
+        picked = [rng.choice(choices) for _ in range(queries)] if choices else []
+        return lambda: [method(uri) for uri in picked]
+
+    record('convert', call_each(ontology.convert, uris), len, 'calls')
+    record('get_sub_classes', call_each(ontology.get_sub_classes, class_uris), len, 'calls')
+    record('get_annotations', call_each(ontology.get_annotations, uris), len, 'calls')
+
+    edited = rng.sample(sorted(ontology.entities, key=lambda e: str(e.uri)), min(edits, len(uris)))
+    for entity in edited:
+        entity.triples.add((entity.uri, RDFS.label, Literal('edited')))
+
+    record('sync_to_graph', ontology.sync_to_graph, lambda _: len(edited), 'entities')
+
+    return results
+
+
+def peak_rss():
+    """
+    returns the peak resident memory of this process in bytes, or None where that can't be found
+    :return:
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    #linux reports kilobytes, macOS bytes
+    return peak if peak > 1 << 32 else peak * 1024
+
+
+def format_bytes(size):
+    """
+    returns :param size in bytes as a short human readable string
+    :param size:
+    :return:
+    """
+    if size is None:
+        return '-'
+
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return '{0:.1f}{1}'.format(size, unit)
+        size /= 1024.0
+
+
+def print_results(results):
+    """
+    prints the results of run_suite as a table
+    :param results:
+    :return:
+    """
+    print('{0:<18}{1:>10}{2:>12}{3:>22}{4:>12}'.format('phase', 'seconds', 'count', 'throughput', 'peak'))
+
+    for result in results:
+        seconds = result['seconds']
+        rate = result['count'] / seconds if seconds > 0 else float('inf')
+
+        print('{0:<18}{1:>10.3f}{2:>12}{3:>22}{4:>12}'.format(result['phase'],
+                                                            seconds,
+                                                            result['count'],
+                                                            '{0:,.0f} {1}/s'.format(rate, result['unit']),
+                                                            format_bytes(result['peak'])))
+
+
+def time_bulk_sync(ontology):
+    """
+    times the single-pass sync of every entity in :param ontology
+    :param ontology:
+    :return: seconds taken
+    """
+    start = time.perf_counter()
+    ontology._sync_entities_from_graph()
+    return time.perf_counter() - start
+
+
+def time_per_entity_sync(ontology, sample=None):
+    """
+    times Entity.sync_from_ontology for the entities of :param ontology.  per-entity sync grows with the square of the
+    ontology size, so for large ontologies a random :param sample of entities is timed and extrapolated to the rest
+    :param ontology:
+    :param sample:
+    :return: seconds taken (or estimated) for all entities
+    """
+    entities = list(ontology.entities)
+
+    if sample and sample < len(entities):
+        timed = random.sample(entities, sample)
+    else:
+        timed = entities
+
+    start = time.perf_counter()
+    for entity in timed:
+        entity.sync_from_ontology()
+    elapsed = time.perf_counter() - start
+
+    if not timed:
+        return elapsed
+
+    return elapsed * len(entities) / len(timed)
+
+
+def compare_sync(location, sample=None):
+    """
+    parses the ontology at :param location once, then times the bulk and per-entity syncs against it
+    :param location:
+    :param sample:
+    :return: dict of triple and entity counts, plus timings in seconds
+    """
+    ontology = Ontology()
+    ontology.graph = ontology._new_graph()
+    ontology._parse(location=location)
+
+    start = time.perf_counter()
+    ontology.sync_from_graph()
+    load = time.perf_counter() - start
+
+    return {
+        'triples': len(ontology.graph),
+        'entities': len(ontology.entities),
+        'sync_from_graph': load,
+        'bulk': time_bulk_sync(ontology),
+        'per_entity': time_per_entity_sync(ontology, sample),
+    }
+
+
+def _add_generator_arguments(parser, many=False):
+    """
+    adds the options of generate_ontology to :param parser
+    :param parser:
+    :param many: if true, --classes takes several scales
+    :return:
+    """
+    if many:
+        parser.add_argument('--classes', type=int, nargs='+', default=[10000, 100000],
+                            help="numbers of classes to run the suite at")
+    else:
+        parser.add_argument('--classes', type=int, default=10000, help="number of classes")
+
+    parser.add_argument('--depth', type=int, default=8, help="levels in the class hierarchy")
+    parser.add_argument('--annotations', type=int, default=2, help="annotations per class beyond its label")
+    parser.add_argument('--individuals', type=float, default=0.1,
+                        help="individuals, as a fraction of the number of classes")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    suite = commands.add_parser('suite', help="time the hot paths on generated ontologies")
+    _add_generator_arguments(suite, many=True)
+    suite.add_argument('--queries', type=int, default=10000, help="calls made to each query method")
+    suite.add_argument('--edits', type=int, default=100, help="entities edited before sync_to_graph")
+    suite.add_argument('--memory', action='store_true', help="trace the peak memory of each phase (slow)")
+
+    generate = commands.add_parser('generate', help="write a generated ontology as N-Triples")
+    generate.add_argument('path')
+    _add_generator_arguments(generate)
+
+    compare = commands.add_parser('compare', help="compare bulk and per-entity sync on an ontology")
+    compare.add_argument('location', help="path or url of the ontology to load")
+    compare.add_argument('--sample', type=int, default=None,
+                         help="number of entities to time the per-entity sync on, then extrapolate")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        with open(args.path, 'w', encoding='utf-8') as out:
+            count = generate_ontology(out, args.classes, args.depth, args.annotations, args.individuals, seed=args.seed)
+        print("wrote {0} triples to {1}".format(count, args.path))
+
+    elif args.command == 'suite':
+        directory = tempfile.mkdtemp(prefix='owllib-benchmark-')
+
+        try:
+            for classes in args.classes:
+                path = os.path.join(directory, 'ontology-%d.nt' % classes)
+
+                with open(path, 'w', encoding='utf-8') as out:
+                    count = generate_ontology(out, classes, args.depth, args.annotations, args.individuals,
+                                              seed=args.seed)
+
+                print("\n{0} classes, depth {1}, {2} annotations per class, {3} triples".format(
+                    classes, args.depth, args.annotations, count))
+
+                print_results(run_suite(path, args.queries, args.edits, args.memory, args.seed))
+        finally:
+            shutil.rmtree(directory)
+
+        print("\npeak resident memory: {0}".format(format_bytes(peak_rss())))
+
+    else:
+        results = compare_sync(args.location, args.sample)
+
+        print("triples:          {0}".format(results['triples']))
+        print("entities:         {0}".format(results['entities']))
+        print("sync_from_graph:  {0:.3f}s".format(results['sync_from_graph']))
+        print("bulk sync:        {0:.3f}s".format(results['bulk']))
+        print("per-entity sync:  {0:.3f}s{1}".format(results['per_entity'], " (estimated)" if args.sample else ""))
+
+        if results['bulk'] > 0:
+            print("speedup:          {0:.1f}x".format(results['per_entity'] / results['bulk']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request as url
+
+from owllib.formats import ACCEPT
+
+
+def is_remote(location):
+    """
+    returns true if :param location is fetched over the network, and so is worth caching
+    :param location:
+    :return:
+    """
+    return str(location).startswith(('http://', 'https://'))
+
+
+class OntologyCache:
+    """
+    An on-disk cache of fetched ontology documents, keyed by the uri they were fetched from and by the ontology and
+    version IRIs they declare
+    """
+
+    def __init__(self, directory, ttl=None, max_size=None, offline=False, timeout=60):
+        """
+        creates a cache in :param directory, creating the directory if needed
+        :param directory:
+        :param ttl: seconds after which a cached document is evicted; None keeps documents until evicted for size
+        :param max_size: most bytes of documents to keep; the least recently used are evicted first
+        :param offline: if true, never touches the network; uncached documents raise an IOError
+        :param timeout: seconds to wait on the network
+        :return:
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __getstate__(self):
+        #so a cache can be handed to worker processes; the directory is shared, the lock isn't
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def fetch(self, location):
+        """
+        returns the document at :param location as a (bytes, content type) tuple.  cached copies are revalidated with
+        their ETag and Last-Modified, unless the cache is offline
+        :param location:
+        :return:
+        """
+        location = str(location)
+        key = self._resolve(location)
+        entry = self._read_entry(key)
+
+        if entry and self._expired(entry):
+            self._remove(key)
+            entry = None
+
+        if self.offline:
+            if not entry:
+                raise IOError("Ontology not in cache, and cache is offline: " + location)
+            return self._hit(key, entry)
+
+        request = url.Request(location, headers={'Accept': ACCEPT})
+        if entry and entry.get('etag'):
+            request.add_header('If-None-Match', entry['etag'])
+        if entry and entry.get('last_modified'):
+            request.add_header('If-Modified-Since', entry['last_modified'])
+
+        try:
+            response = url.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry:
+                entry['validated'] = time.time()
+                return self._hit(key, entry)
+            raise
+
+        with response:
+            data = response.read()
+            headers = response.headers
+
+        entry = {
+            'location': entry['location'] if entry else location,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type'),
+            'size': len(data),
+            'fetched': time.time(),
+            'validated': time.time(),
+            'aliases': entry.get('aliases', []) if entry else []
+        }
+
+        self._write(key, data, entry)
+        self.evict()
+
+        return data, entry['content_type']
+
+    def validators(self, location):
+        """
+        returns the ETag and Last-Modified the cached copy of :param location was served with, either of which may be
+        None
+        :param location:
+        :return: an (etag, last modified) tuple
+        """
+        entry = self._read_entry(self._resolve(str(location))) or {}
+
+        return entry.get('etag'), entry.get('last_modified')
+
+    def alias(self, location, *iris):
+        """
+        records that the document fetched from :param location declares the given ontology and version :param iris,
+        so later fetches of any of them are served from the same entry
+        :param location:
+        :param iris:
+        :return:
+        """
+        key = self._resolve(str(location))
+        entry = self._read_entry(key)
+
+        if not entry:
+            return
+
+        with self._lock:
+            for iri in iris:
+                if iri is None or str(iri) == entry['location'] or str(iri) in entry['aliases']:
+                    continue
+
+                entry['aliases'].append(str(iri))
+                self._write_json(self._path(self._key(str(iri)), '.alias'), {'key': key})
+
+            self._write_json(self._path(key, '.json'), entry)
+
+    def evict(self):
+        """
+        removes expired documents, then the least recently used ones until the cache is within max_size
+        :return:
+        """
+        entries = []
+
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+
+            key = name[:-len('.json')]
+            entry = self._read_entry(key)
+
+            if entry is None:
+                continue
+
+            if self._expired(entry):
+                self._remove(key)
+            else:
+                entries.append((entry.get('accessed', entry['fetched']), key, entry['size']))
+
+        if self.max_size is None:
+            return
+
+        total = sum(size for _, _, size in entries)
+
+        for _, key, size in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            self._remove(key)
+            total -= size
+
+    def clear(self):
+        """
+        removes every document from the cache
+        :return:
+        """
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(('.data', '.json', '.alias')):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _hit(self, key, entry):
+        """
+        returns the cached document for :param key, marking it as recently used
+        :param key:
+        :param entry:
+        :return:
+        """
+        with open(self._path(key, '.data'), 'rb') as f:
+            data = f.read()
+
+        entry['accessed'] = time.time()
+
+        with self._lock:
+            self._write_json(self._path(key, '.json'), entry)
+
+        return data, entry.get('content_type')
+
+    def _expired(self, entry):
+        """
+        returns true if :param entry has outlived the ttl
+        :param entry:
+        :return:
+        """
+        return self.ttl is not None and time.time() - entry['fetched'] > self.ttl
+
+    @staticmethod
+    def _key(location):
+        """
+        returns the file name stem used for :param location
+        :param location:
+        :return:
+        """
+        return hashlib.sha1(location.encode('utf-8')).hexdigest()
+
+    def _path(self, key, extension):
+        """
+        returns the path of the file for :param key with :param extension
+        :param key:
+        :param extension:
+        :return:
+        """
+        return os.path.join(self.directory, key + extension)
+
+    def _resolve(self, location):
+        """
+        returns the key of the entry for :param location, following aliases
+        :param location:
+        :return:
+        """
+        key = self._key(location)
+
+        if os.path.exists(self._path(key, '.json')):
+            return key
+
+        alias = self._read_json(self._path(key, '.alias'))
+
+        if alias and os.path.exists(self._path(alias['key'], '.json')):
+            return alias['key']
+
+        return key
+
+    def _read_entry(self, key):
+        """
+        returns the metadata of the entry for :param key, or None if there isn't one
+        :param key:
+        :return:
+        """
+        return self._read_json(self._path(key, '.json'))
+
+    @staticmethod
+    def _read_json(path):
+        """
+        reads json from :param path, returning None if it is missing or partly written
+        :param path:
+        :return:
+        """
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def _write(self, key, data, entry):
+        """
+        stores the document :param data and its metadata :param entry under :param key
+        :param key:
+        :param data:
+        :param entry:
+        :return:
+        """
+        with self._lock:
+            temp = self._path(key, '.data.%d.%d.tmp' % (os.getpid(), threading.get_ident()))
+
+            with open(temp, 'wb') as f:
+                f.write(data)
+
+            os.replace(temp, self._path(key, '.data'))
+            self._write_json(self._path(key, '.json'), entry)
+
+    @staticmethod
+    def _write_json(path, obj):
+        """
+        writes :param obj to :param path as json, replacing the file atomically
+        :param path:
+        :param obj:
+        :return:
+        """
+        temp = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+
+        with open(temp, 'w') as f:
+            json.dump(obj, f)
+
+        os.replace(temp, path)
+
+    def _remove(self, key):
+        """
+        removes the entry for :param key, along with its aliases
+        :param key:
+        :return:
+        """
+        with self._lock:
+            entry = self._read_entry(key)
+
+            for alias in (entry or {}).get('aliases', []):
+                path = self._path(self._key(alias), '.alias')
+                if os.path.exists(path):
+                    os.remove(path)
+
+            for extension in ('.json', '.data'):
+                path = self._path(key, extension)
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,334 @@
+"""
+a read-only view of an ontology and everything it imports, queried as if they were one ontology, without copying their
+graphs into one.
+
+    view = ontology.closure_view()
+    view.get_labels(uri)
+    view.get_super_classes(uri)
+
+the view merges the ontologies' uri indexes: each uri maps to the ontologies whose graphs mention it, so a query is only
+put to those, usually one, rather than to every import in turn.  entities are found in a merged entity index, the
+importing ontology's entity taking precedence over an import's.
+
+queries go through each ontology's memo (see owllib.memo), so they are remembered as that ontology's own queries are.
+the uris an ontology's graph mentions are counted on the ontology, and the counts kept up to date as its entities are
+synced to the graph, so an import shared through a registry (see owllib.registry) only works them out once for every
+view it is part of.  when any of the ontologies' graphs change, Ontology.closure_view refreshes the view, updating the
+index for the uris those ontologies have started or stopped mentioning since; only a graph changed some other way than
+through its ontology has its uris all compared again.  the view is built anew when the imports change.
+"""
+
+from rdflib import RDF, RDFS, OWL, BNode, Literal, URIRef
+
+from owllib.entities import DEFINITION, Class, Entity, Property
+
+
+class ClosureView:
+    """
+    An ontology and its imports, as one read-only ontology
+    """
+
+    def __init__(self, ontology):
+        """
+        :param ontology: the importing ontology; its imports are its direct and indirect imports
+        :return:
+        """
+        self.ontology = ontology
+
+        imports = (ontology.direct_imports | ontology.indirect_imports) - {ontology}
+        self.imports = frozenset(imports)
+
+        #the importing ontology first, so its entities take precedence
+        self.members = [ontology] + sorted(imports, key=lambda ont: str(ont.uri))
+        self.versions = [getattr(member.graph, 'version', None) for member in self.members]
+
+        self._entity_index = {}
+
+        for member in self.members:
+            for uri, entity in member._entity_index.items():
+                self._entity_index.setdefault(uri, entity)
+
+        #uri to the tuple of members mentioning it; equal tuples are the same object, so the index costs little more
+        #than a dict of the uris
+        self._holders = {}
+        self._tuples = {}
+
+        #what each member contributed, so refresh only redoes the contributions of those that changed
+        self._entity_uris = [frozenset(member._entity_index) for member in self.members]
+        self._declared = [frozenset(member.graph.subjects(RDF.type, OWL.AnnotationProperty))
+                          for member in self.members]
+
+        for member in self.members:
+            self._update_holders(member, member._mentions(), ())
+
+        self._annotation_properties = set().union(*self._declared)
+
+    def current(self):
+        """
+        returns true if none of the ontologies' graphs, nor the imports, have changed since the view was built
+        :return:
+        """
+        ontology = self.ontology
+
+        if (ontology.direct_imports | ontology.indirect_imports) - {ontology} != self.imports:
+            return False
+
+        for member, version in zip(self.members, self.versions):
+            if version is None or getattr(member.graph, 'version', None) != version:
+                return False
+
+        return True
+
+    def refresh(self):
+        """
+        brings the view up to date with the ontologies whose graphs have changed, redoing only their part of the
+        indexes rather than rebuilding the view.  the imports are taken not to have changed; a view of different
+        imports is built anew
+        :return:
+        """
+        changed = False
+
+        for position, member in enumerate(self.members):
+            version = getattr(member.graph, 'version', None)
+
+            if version is not None and version == self.versions[position]:
+                continue
+
+            changes = member._mention_changes(self.versions[position])
+
+            if changes is None:
+                self._refresh_holders(member)
+            else:
+                self._update_holders(member, *changes)
+
+            self.versions[position] = version
+            self._refresh_entities(position, frozenset(member._entity_index))
+            self._declared[position] = frozenset(member.graph.subjects(RDF.type, OWL.AnnotationProperty))
+            changed = True
+
+        if changed:
+            self._annotation_properties = set().union(*self._declared)
+
+    def _refresh_holders(self, member):
+        """
+        updates the holders of the uris :param member mentioned before, or mentions now, comparing every one of them
+        :param member:
+        :return:
+        """
+        mentioned = member._mentions()
+        previous = set(uri for uri, holders in self._holders.items() if member in holders)
+
+        self._update_holders(member, mentioned.keys() - previous, previous - mentioned.keys())
+
+    def _update_holders(self, member, appeared, gone):
+        """
+        updates the holders of the uris :param member has started and stopped mentioning
+        :param member:
+        :param appeared: the uris it mentions now, and didn't before
+        :param gone: the uris it mentioned before, and doesn't now
+        :return:
+        """
+        holders = self._holders
+        tuples = self._tuples
+
+        for uri in gone:
+            remaining = tuple(holder for holder in holders[uri] if holder is not member)
+
+            if remaining:
+                holders[uri] = tuples.setdefault(remaining, remaining)
+            else:
+                del holders[uri]
+
+        for uri in appeared:
+            added = holders.get(uri, ()) + (member,)
+            holders[uri] = tuples.setdefault(added, added)
+
+    def _refresh_entities(self, position, uris):
+        """
+        updates the merged entity index for the entities the member at :param position had before, or has now; the
+        first member with an entity for a uri still takes precedence
+        :param position:
+        :param uris: the uris of its entities now
+        :return:
+        """
+        index = self._entity_index
+
+        previous = self._entity_uris[position]
+        self._entity_uris[position] = uris
+
+        for uri in previous | uris:
+            for member in self.members:
+                entity = member._entity_index.get(uri)
+
+                if entity is not None:
+                    index[uri] = entity
+                    break
+            else:
+                index.pop(uri, None)
+
+    def holders(self, uri):
+        """
+        returns the ontologies whose graphs mention :param uri
+        :param uri:
+        :return: a tuple
+        """
+        return self._holders.get(uri, ())
+
+    def exists(self, uri):
+        """
+        checks to see if the uri exists in the ontology or any of its imports
+        :param uri:
+        :return:
+        """
+        return uri in self._entity_index or uri in self._holders
+
+    def convert(self, entity):
+        """
+        returns the owllib entity for the uri or blank node :param entity, from the ontology or one of its imports.
+        owllib entities and literals are returned unchanged
+        :param entity:
+        :return:
+        """
+        if isinstance(entity, (Entity, Literal)):
+            return entity
+
+        if isinstance(entity, (URIRef, BNode)):
+            found = self._entity_index.get(entity)
+
+            if found is not None:
+                return found
+
+            raise ValueError("URI not found in ontology or its imports.  Found " + str(entity))
+
+        raise TypeError("Type could not be converted properly.  Found " + type(entity).__name__)
+
+    def get_annotations(self, entity):
+        """
+        returns all annotations as tuples for the passed in entity; annotation properties declared in any of the
+        ontologies count
+        :param entity:
+        :return:
+        """
+        properties = self._annotation_properties
+
+        return set(pair for pair in self._union('annotation_pairs', entity,
+                                                lambda graph, uri: graph.predicate_objects(uri))
+                   if pair[0] in properties)
+
+    def get_labels(self, entity):
+        """
+        returns all rdfs:labels for the passed in entity
+        :param entity:
+        :return:
+        """
+        return self._union('labels', entity, lambda graph, uri: graph.objects(uri, RDFS.label))
+
+    def get_comments(self, entity):
+        """
+        returns all of the rdfs:comments for the passed in entity
+        :param entity:
+        :return:
+        """
+        return self._union('comments', entity, lambda graph, uri: graph.objects(uri, RDFS.comment))
+
+    def get_definitions(self, entity):
+        """
+        returns all of the IAO definitions of the passed in entity
+        :param entity:
+        :return:
+        """
+        return self._union('definitions', entity, lambda graph, uri: graph.objects(uri, DEFINITION))
+
+    def get_triples(self, entity):
+        """
+        returns all of the triples for the passed in entity where the entity was a subject, object, or predicate
+        :param entity:
+        :return:
+        """
+        entity = self.convert(entity)
+        triples = set()
+
+        for member in self.holders(entity.uri):
+            triples |= member._query('triples', entity.uri, member._triples_of)
+
+        return triples
+
+    def get_super_classes(self, cls):
+        """
+        returns all of the super classes of :param cls
+        :param cls:
+        :return:
+        """
+        return self._entities(self._union('super_classes', cls,
+                                          lambda graph, uri: graph.objects(uri, RDFS.subClassOf)), Class)
+
+    def get_sub_classes(self, cls):
+        """
+        returns all of the sub classes of :param cls
+        :param cls:
+        :return:
+        """
+        return self._entities(self._union('sub_classes', cls,
+                                          lambda graph, uri: graph.subjects(RDFS.subClassOf, uri)), Class)
+
+    def get_individual_type(self, indiv):
+        """
+        returns the type of :param indiv
+        :param indiv:
+        :return:
+        """
+        return self._entities(self._union('types', indiv, lambda graph, uri: graph.objects(uri, RDF.type)), Class)
+
+    def get_super_properties(self, prop):
+        """
+        returns all of the super properties of :param prop
+        :param prop:
+        :return:
+        """
+        return self._entities(self._union('super_properties', prop,
+                                          lambda graph, uri: graph.objects(uri, RDFS.subPropertyOf)), Property)
+
+    def get_sub_properties(self, prop):
+        """
+        returns all of the sub properties of :param prop
+        :param prop:
+        :return:
+        """
+        return self._entities(self._union('sub_properties', prop,
+                                          lambda graph, uri: graph.subjects(RDFS.subPropertyOf, uri)), Property)
+
+    def _union(self, query, entity, run):
+        """
+        returns the union of :param query for :param entity over the ontologies mentioning it, each answered from its
+        memo or by calling :param run with its graph and the uri
+        :param query: a query name, run the same way by the ontology's own getters, so their results are shared
+        :param entity:
+        :param run:
+        :return: a set
+        """
+        uri = self.convert(entity).uri
+        result = set()
+
+        for member in self.holders(uri):
+            graph = member.graph
+            result |= member._query(query, uri, lambda uri: run(graph, uri))
+
+        return result
+
+    def _entities(self, uris, kind):
+        """
+        returns the entities of :param kind among :param uris, looked up in the merged entity index
+        :param uris:
+        :param kind:
+        :return:
+        """
+        index = self._entity_index
+        entities = set()
+
+        for uri in uris:
+            entity = index.get(uri)
+
+            if isinstance(entity, kind):
+                entities.add(entity)
+
+        return entities
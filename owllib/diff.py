@@ -0,0 +1,254 @@
+"""
+works out what changed between two versions of an ontology: the axioms added and removed, and the entities added,
+removed and modified.
+
+an axiom is a triple whose subject is a uri, or a blank node nothing refers to (e.g. an owl:AllDisjointClasses or an
+owl:Axiom annotation).  a blank node it refers to, such as an owl:Restriction or an RDF collection, is part of the
+axiom, not an axiom of its own.  blank nodes are labelled afresh by every parse, so they can't be matched between
+versions by id; each is instead given a hash of what it says, i.e. its predicates and objects, the blank nodes among
+them hashed in turn.  two blank nodes saying the same thing get the same hash, in whichever graph they are, so an
+unchanged restriction is the same axiom in both versions, and a changed one is an axiom removed and another added.
+
+the hashes are worked out bottom up, once per blank node, and each graph is read once, so the diff takes time in
+proportion to the size of the graphs.  besides the blank nodes' triples, held while they are hashed, all that is kept
+is each graph's axioms, keyed with blank nodes swapped for their hashes.
+
+blank nodes in a cycle, which OWL has no use for but RDF allows, are hashed as if the cycle were cut where it was
+reached first, so the hashes of such nodes can depend on the order the graph is read in.
+"""
+
+from hashlib import blake2b
+
+from rdflib import BNode, Literal, URIRef
+
+#what a blank node is taken to say about a blank node in a cycle with it
+_CYCLE = '_:cycle'
+
+#terms of these exact types are known not to be blank nodes without an isinstance check, which rdflib's abstract term
+#classes make slow enough to dominate a pass over a big graph
+_NOT_BLANK = frozenset([URIRef, Literal])
+
+
+def _is_blank(term):
+    kind = type(term)
+
+    return kind is BNode or (kind not in _NOT_BLANK and isinstance(term, BNode))
+
+
+class EntityChange:
+    """
+    The axioms about an entity that one version of an ontology has and the other doesn't
+    """
+
+    def __init__(self, uri):
+        self.uri = uri
+
+        #(predicate, object) pairs; a blank node object is from the graph the axiom is in
+        self.added = []
+        self.removed = []
+
+    def added_objects(self, predicate):
+        """
+        returns the objects of the axioms added with :param predicate, e.g. the new parents for rdfs:subClassOf
+        :param predicate:
+        :return:
+        """
+        return [o for p, o in self.added if p == predicate]
+
+    def removed_objects(self, predicate):
+        """
+        returns the objects of the axioms removed with :param predicate
+        :param predicate:
+        :return:
+        """
+        return [o for p, o in self.removed if p == predicate]
+
+    def __repr__(self):
+        return '<EntityChange %s: +%d -%d>' % (self.uri, len(self.added), len(self.removed))
+
+
+class ChangeSet:
+    """
+    The differences between an old and a new version of an ontology
+    """
+
+    def __init__(self):
+        #triples from the new graph that the old lacks, and from the old graph that the new lacks
+        self.added = []
+        self.removed = []
+
+        #entity uris declared in only one of the versions
+        self.added_entities = set()
+        self.removed_entities = set()
+
+        #entity uri to its EntityChange, for the entities declared in both with axioms that differ
+        self.modified_entities = {}
+
+    def __bool__(self):
+        return bool(self.added or self.removed)
+
+    def __repr__(self):
+        return '<ChangeSet: +%d -%d axioms, +%d -%d ~%d entities>' % (
+            len(self.added), len(self.removed), len(self.added_entities), len(self.removed_entities),
+            len(self.modified_entities))
+
+
+def diff_graphs(old, new, old_entities=(), new_entities=()):
+    """
+    returns what changed from the graph :param old to the graph :param new
+    :param old:
+    :param new:
+    :param old_entities: the uris of the entities declared in the old graph; blank nodes are left out
+    :param new_entities: those of the new graph
+    :return: a ChangeSet
+    """
+    old_axioms = axioms(old)
+    new_axioms = axioms(new)
+
+    changes = ChangeSet()
+
+    for key, triple in old_axioms.items():
+        if key not in new_axioms:
+            changes.removed.append(triple)
+
+    for key, triple in new_axioms.items():
+        if key not in old_axioms:
+            changes.added.append(triple)
+
+    #anonymous classes, such as restrictions, are part of axioms, not entities of their own
+    old_entities = set(uri for uri in old_entities if not _is_blank(uri))
+    new_entities = set(uri for uri in new_entities if not _is_blank(uri))
+
+    changes.added_entities = new_entities - old_entities
+    changes.removed_entities = old_entities - new_entities
+
+    kept = old_entities & new_entities
+    modified = changes.modified_entities
+
+    for triples, attribute in ((changes.added, 'added'), (changes.removed, 'removed')):
+        for s, p, o in triples:
+            if s in kept:
+                change = modified.get(s)
+
+                if change is None:
+                    change = modified[s] = EntityChange(s)
+
+                getattr(change, attribute).append((p, o))
+
+    return changes
+
+
+def axioms(graph):
+    """
+    returns the axioms of :param graph, keyed so the same axiom has the same key in any graph
+    :param graph:
+    :return: a dict of (subject, predicate, object) key, with blank nodes swapped for their hashes, to the triple
+    """
+    #triples with no blank nodes are their own keys; the rest are held back until the blank nodes are hashed
+    keyed = {}
+    held = []
+
+    blanks = {}
+    referenced = set()
+
+    for triple in graph:
+        s, p, o = triple
+
+        if _is_blank(o):
+            referenced.add(o)
+
+            if _is_blank(s):
+                blanks.setdefault(s, []).append((p, o))
+            else:
+                held.append(triple)
+        elif _is_blank(s):
+            blanks.setdefault(s, []).append((p, o))
+        else:
+            keyed[triple] = triple
+
+    hashes = hash_blanks(blanks)
+
+    for triple in held:
+        s, p, o = triple
+        keyed[(s, p, hashes.get(o, _EMPTY))] = triple
+
+    #blank nodes nothing refers to are axioms, or the subjects of axioms, in their own right
+    for node, pairs in blanks.items():
+        if node not in referenced:
+            node_hash = hashes[node]
+
+            for p, o in pairs:
+                keyed[(node_hash, p, hashes.get(o, _EMPTY) if _is_blank(o) else o)] = (node, p, o)
+
+    return keyed
+
+
+def hash_blanks(blanks):
+    """
+    returns a hash of what each blank node says, the same for blank nodes saying the same thing in any graph
+    :param blanks: blank node to its (predicate, object) pairs
+    :return: a dict of blank node to its hash, for every blank node in :param blanks and every one they refer to
+    """
+    hashes = {}
+    pending = set()
+
+    for root in blanks:
+        if root in hashes:
+            continue
+
+        #depth first, so a blank node is hashed after the blank nodes it refers to
+        stack = [(root, False)]
+
+        while stack:
+            node, ready = stack.pop()
+
+            if node in hashes:
+                continue
+
+            pairs = blanks.get(node, ())
+
+            if ready:
+                pending.discard(node)
+                hashes[node] = _hash(pairs, hashes)
+                continue
+
+            if node in pending:
+                continue
+
+            pending.add(node)
+            stack.append((node, True))
+
+            for p, o in pairs:
+                if _is_blank(o) and o not in hashes and o not in pending:
+                    stack.append((o, False))
+
+    return hashes
+
+
+def _hash(pairs, hashes):
+    """
+    returns the hash of a blank node with (predicate, object) :param pairs, given the :param hashes of the blank nodes
+    it refers to
+    :param pairs:
+    :param hashes:
+    :return:
+    """
+    parts = []
+
+    for p, o in pairs:
+        if _is_blank(o):
+            o = hashes.get(o, _CYCLE)
+        elif type(o) is URIRef or isinstance(o, URIRef):
+            o = '<%s>' % o
+        else:
+            o = o.n3()
+
+        parts.append('%s %s' % (p, o))
+
+    parts.sort()
+
+    return '_:' + blake2b('\n'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+#the hash of a blank node that says nothing
+_EMPTY = _hash((), {})
@@ -1,11 +1,104 @@
 import rdflib
-from rdflib import RDF, RDFS, OWL, Literal
+from rdflib import RDF, RDFS, OWL, Literal, URIRef
+
+from owllib import profiling
+
+#IAO 'definition' annotation property, used by the OBO ontologies
+DEFINITION = URIRef("http://purl.obolibrary.org/obo/IAO_0000115")
+
+#shared by every entity with nothing for an attribute, until the attribute is accessed
+EMPTY = frozenset()
+
+
+def _lazy_attribute(name):
+    """
+    builds a property for the attribute :param name.  when the entity holds no value for it, the value is fetched from
+    the ontology on first access and cached until the entity is invalidated.  an attribute held as the shared EMPTY
+    set is swapped for a set of its own when accessed, so it can be changed in place
+    :param name:
+    :return:
+    """
+    key = '_' + name
+
+    def getter(self):
+        value = getattr(self, key)
+
+        if value is None:
+            value = self._fetch(name)
+            setattr(self, key, value)
+        elif value is EMPTY:
+            value = set()
+            setattr(self, key, value)
+
+        return value
+
+    def setter(self, value):
+        setattr(self, key, value)
+
+    return property(getter, setter)
+
+
+def _mutator(name):
+    """
+    wraps the set method :param name so that calling it marks the owning entity dirty
+    :param name:
+    :return:
+    """
+    method = getattr(set, name)
+
+    def mutate(self, *args):
+        result = method(self, *args)
+        self.owner.mark_dirty()
+        return result
+
+    mutate.__name__ = name
+
+    return mutate
+
+
+class TripleSet(set):
+    """
+    the triples of an entity; a set that marks its entity dirty whenever it is changed
+    """
+    __slots__ = ('owner',)
+
+    def __init__(self, owner, triples=()):
+        super(TripleSet, self).__init__(triples)
+        self.owner = owner
+
+    add = _mutator('add')
+    discard = _mutator('discard')
+    remove = _mutator('remove')
+    pop = _mutator('pop')
+    clear = _mutator('clear')
+    update = _mutator('update')
+    difference_update = _mutator('difference_update')
+    intersection_update = _mutator('intersection_update')
+    symmetric_difference_update = _mutator('symmetric_difference_update')
+    __ior__ = _mutator('__ior__')
+    __iand__ = _mutator('__iand__')
+    __isub__ = _mutator('__isub__')
+    __ixor__ = _mutator('__ixor__')
 
 
 class Entity:
     """
-    base class for all owllib entities, e.g. classes, individuals, object properties
+    base class for all owllib entities, e.g. classes, individuals, object properties.  entities are slotted, and hold
+    no triples, parents or children of their own until those are accessed; they are looked up in the ontology instead
     """
+    __slots__ = ('uri', 'ontology', '_annotations', '_labels', '_comments', '_definitions', '_triples', '_parents',
+                 '_children', '_dirty')
+
+    #attributes that are derived from the ontology graph, and can be fetched on demand
+    derived_attributes = ('annotations', 'labels', 'comments', 'definitions', 'triples', 'parents', 'children')
+
+    annotations = _lazy_attribute('annotations')
+    labels = _lazy_attribute('labels')
+    comments = _lazy_attribute('comments')
+    definitions = _lazy_attribute('definitions')
+    parents = _lazy_attribute('parents')
+    children = _lazy_attribute('children')
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None, definitions=None):
         if not uri:
             uri = rdflib.BNode
@@ -13,25 +106,118 @@ class Entity:
         self.uri = uri
         self.ontology = ontology
 
-        self.annotations = set()
+        self._annotations = EMPTY
         if labels:
             self.labels = labels
         else:
-            self.labels = set()
+            self._labels = EMPTY
 
         if comments:
             self.comments = comments
         else:
-            self.comments = set()
+            self._comments = EMPTY
 
         if definitions:
             self.definitions = definitions
         else:
-            self.definitions = set()
+            self._definitions = EMPTY
+
+        #looked up in the ontology when first accessed
+        self._triples = None
+        self._parents = None
+        self._children = None
+
+        self._dirty = False
+
+    @property
+    def triples(self):
+        """
+        the triples the entity is the subject, predicate or object of.  changing them, in place or by assignment, marks
+        the entity dirty until it is synced to the graph
+        :return:
+        """
+        if self._triples is None:
+            self._triples = TripleSet(self, self._fetch('triples'))
+
+        return self._triples
 
-        self.triples = set()
-        self.parents = set()
-        self.children = set()
+    @triples.setter
+    def triples(self, triples):
+        self._triples = TripleSet(self, triples)
+        self.mark_dirty()
+
+    @property
+    def dirty(self):
+        """
+        true if the triples of the entity have changed since it was last synced with the graph
+        :return:
+        """
+        return self._dirty
+
+    def mark_dirty(self):
+        """
+        flags the entity as needing to be synced to the graph
+        :return:
+        """
+        if not self._dirty:
+            self._dirty = True
+
+            if self.ontology is not None:
+                self.ontology._dirty_entities.add(self)
+
+    def mark_clean(self):
+        """
+        flags the entity as matching the graph
+        :return:
+        """
+        if self._dirty:
+            self._dirty = False
+
+            if self.ontology is not None:
+                self.ontology._dirty_entities.discard(self)
+
+    def invalidate(self, *names):
+        """
+        drops the cached values of the named derived attributes (all of them if none are named), so they are fetched
+        from the ontology the next time they are accessed.  dropping the triples discards unsynced changes to them
+        :param names:
+        :return:
+        """
+        names = names or self.derived_attributes
+
+        for name in names:
+            setattr(self, '_' + name, None)
+
+        if 'triples' in names:
+            self.mark_clean()
+
+    def _fetch(self, name):
+        """
+        fetches the current value of the derived attribute :param name from the ontology
+        :param name:
+        :return:
+        """
+        if not self.ontology:
+            return set()
+
+        profiling.count(self.ontology.profiler, 'attribute_fetches')
+
+        if name == 'annotations':
+            return self.ontology.get_annotations(self)
+        if name == 'labels':
+            return self.ontology.get_labels(self)
+        if name == 'comments':
+            return self.ontology.get_comments(self)
+        if name == 'definitions':
+            return self.ontology.get_definitions(self)
+        if name == 'triples':
+            return self.ontology.get_triples(self)
+        if name == 'parents':
+            return self._get_parents()
+        if name == 'children':
+            return self._get_children()
+
+        raise AttributeError(name)
 
     def sync_from_ontology(self):
         """
@@ -41,11 +227,14 @@ class Entity:
         if not self.ontology:
             raise ValueError("No associated ontology.")
 
+        profiling.count(self.ontology.profiler, 'entity_syncs')
+
         self.annotations = self.ontology.get_annotations(self)
         self.labels = self.ontology.get_labels(self)
         self.comments = self.ontology.get_comments(self)
         self.definitions = self.ontology.get_definitions(self)
-        self.triples = self.ontology.get_triples(self)
+        self._triples = TripleSet(self, self.ontology.get_triples(self))
+        self.mark_clean()
         self.parents = self._get_parents()
         self.children = self._get_children()
 
@@ -74,6 +263,8 @@ class Class(Entity):
     """
     Represents an OWL2 Class
     """
+    __slots__ = ()
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None):
         super(Class, self).__init__(uri, ontology, labels, comments)
 
@@ -104,6 +295,8 @@ class Individual(Entity):
     """
     represents an OWL2 individual
     """
+    __slots__ = ()
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None):
         super(Individual, self).__init__(uri, ontology, labels, comments)
 
@@ -129,6 +322,8 @@ class Property(Entity):
     """
     base class for the three property types in OWL
     """
+    __slots__ = ()
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None):
         super(Property, self).__init__(uri, ontology, labels, comments)
 
@@ -159,6 +354,8 @@ class ObjectProperty(Property):
     """
     represents a OWL ObjectProperty
     """
+    __slots__ = ()
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None):
         super(ObjectProperty, self).__init__(uri, ontology, labels, comments)
 
@@ -167,6 +364,8 @@ class DataProperty(Property):
     """
     represents a OWL DataProperty
     """
+    __slots__ = ()
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None):
         super(DataProperty, self).__init__(uri, ontology, labels, comments)
 
@@ -175,6 +374,8 @@ class AnnotationProperty(Property):
     """
     represents a OWL AnnotationProperty
     """
+    __slots__ = ()
+
     def __init__(self, uri=None, ontology=None, labels=None, comments=None):
         super(AnnotationProperty, self).__init__(uri, ontology, labels, comments)
 
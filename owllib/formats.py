@@ -0,0 +1,133 @@
+"""
+picks the rdflib parser for an ontology document from its HTTP Content-Type, or by peeking at its first few KB, so it
+only has to be parsed once
+"""
+
+import re
+
+#how much of a document to peek at when sniffing its format
+SNIFF_SIZE = 4096
+
+#sent when fetching ontologies, so servers doing content negotiation send something we can parse
+ACCEPT = 'application/rdf+xml, text/turtle;q=0.9, application/n-triples;q=0.8, application/ld+json;q=0.7, */*;q=0.1'
+
+#every format rdflib might be able to parse, in the order they are tried when nothing else works
+FORMATS = ['xml',
+           'turtle',
+           'trix',
+           'rdfa1.1',
+           'rdfa1.0',
+           'rdfa',
+           'nt',
+           'nquads',
+           'n3',
+           'microdata',
+           'mdata',
+           'hturtle',
+           'html']
+
+CONTENT_TYPES = {
+    'application/rdf+xml': 'xml',
+    'application/owl+xml': 'xml',
+    'text/turtle': 'turtle',
+    'application/x-turtle': 'turtle',
+    'application/turtle': 'turtle',
+    'application/n-triples': 'nt',
+    'application/n-quads': 'nquads',
+    'text/n3': 'n3',
+    'text/rdf+n3': 'n3',
+    'application/ld+json': 'json-ld',
+    'application/trix': 'trix',
+    'application/trig': 'trig',
+    'text/html': 'html',
+    'application/xhtml+xml': 'html'
+}
+
+_NT_TERM = r'(?:<[^>\s]*>|_:\S+)'
+_NT_LINE = re.compile(r'^\s*' + _NT_TERM + r'\s+<[^>\s]*>\s+(?:' + _NT_TERM + r'|".*?"(?:@[\w-]+|\^\^<[^>\s]*>)?)'
+                      r'(\s+' + _NT_TERM + r')?\s*\.\s*(?:#.*)?$')
+#the @ forms are case sensitive; the SPARQL style ones are not, so they must be followed by what they declare
+_TURTLE_DIRECTIVE = re.compile(r'^\s*(?:@prefix\s|@base\s|(?i:prefix)\s+[\w.-]*:\s*<|(?i:base)\s+<)', re.MULTILINE)
+#the root element of an XML document, which unlike a Turtle IRI has a name followed by attributes, '>' or '/>'
+_XML_ROOT = re.compile(r'<([A-Za-z_][\w.-]*(?::[A-Za-z_][\w.-]*)?)(?=[\s/>])([^<>]*)')
+#root elements known to be XML without declaring a namespace
+_XML_ROOTS = {'rdf:rdf', 'trix', 'html', 'ontology'}
+
+
+def format_from_content_type(content_type):
+    """
+    returns the rdflib format for an HTTP :param content_type, or None if it doesn't say
+    :param content_type:
+    :return:
+    """
+    if not content_type:
+        return None
+
+    return CONTENT_TYPES.get(content_type.split(';')[0].strip().lower())
+
+
+def sniff_format(head):
+    """
+    returns the rdflib format of a document that starts with :param head, or None if it can't tell
+    :param head: the first few KB of the document, as bytes
+    :return:
+    """
+    if isinstance(head, bytes):
+        text = head.decode('utf-8', 'ignore')
+    else:
+        text = head
+
+    text = text.lstrip('﻿ \t\r\n')
+
+    if not text:
+        return None
+
+    if text.startswith('{') or text.startswith('['):
+        return 'json-ld'
+
+    if _is_xml(text):
+        lowered = text.lower()
+
+        if '<trix' in lowered:
+            return 'trix'
+        if '<html' in lowered or '<!doctype html' in lowered:
+            return 'html'
+        if '<ontology' in lowered and 'rdf:rdf' not in lowered:
+            #OWL/XML, which rdflib has no parser for
+            return None
+
+        return 'xml'
+
+    if _TURTLE_DIRECTIVE.search(text):
+        return 'turtle'
+
+    #the last line may have been cut off by the peek
+    lines = text.splitlines()
+    if len(lines) > 1:
+        lines = lines[:-1]
+    lines = [line for line in lines if line.strip() and not line.lstrip().startswith('#')]
+
+    if lines and all(_NT_LINE.match(line) for line in lines):
+        if any(_NT_LINE.match(line).group(1) for line in lines):
+            return 'nquads'
+        return 'nt'
+
+    if text.startswith('<') or text.startswith('_:'):
+        return 'turtle'
+
+    return None
+
+
+def _is_xml(text):
+    """
+    returns whether :param text starts an XML document: a prolog, a doctype or comment, or a root element that is
+    either a known one or declares a namespace.  a Turtle or N-Triples line starting with an IRI such as <urn:a> isn't
+    :param text:
+    :return:
+    """
+    if text.startswith('<?xml') or text.startswith('<!'):
+        return True
+
+    match = _XML_ROOT.match(text)
+
+    return match is not None and (match.group(1).lower() in _XML_ROOTS or 'xmlns' in match.group(2))
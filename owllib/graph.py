@@ -0,0 +1,143 @@
+"""
+the rdflib graphs that ontologies are loaded into.
+
+every change to a VersionedGraph gives it a new version number, unique across all graphs in the process, so whatever
+was derived from a graph can tell whether the graph has changed since, and can't mistake a new graph for an old one.
+
+parsers make a new term object every time a uri or blank node shows up in a document, so a class mentioned in a dozen
+triples is held a dozen times over; an OntologyGraph interns them as they are added, so each distinct uri and blank node
+is held once, however many triples it is in.  literals are rarely repeated, and are left as they are.  the terms no
+triple is left in are let go of once the removals since they last were outnumber the triples left, or every triple is
+removed, so a long-lived graph doesn't hold on to every term it ever had.
+"""
+
+from itertools import count
+
+from rdflib import Graph, BNode, Literal, URIRef
+
+#the source of graph version numbers
+_versions = count(1)
+
+#the fewest removals from an OntologyGraph before it lets go of the terms no longer in any triple
+PRUNE_AFTER = 1000
+
+
+class VersionedGraph(Graph):
+    """
+    An rdflib Graph whose version changes whenever triples are added to or removed from it
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(VersionedGraph, self).__init__(*args, **kwargs)
+
+        self.version = next(_versions)
+
+    def add(self, triple):
+        self.version = next(_versions)
+
+        return super(VersionedGraph, self).add(triple)
+
+    def addN(self, quads):
+        self.version = next(_versions)
+
+        return super(VersionedGraph, self).addN(quads)
+
+    def remove(self, triple):
+        self.version = next(_versions)
+
+        return super(VersionedGraph, self).remove(triple)
+
+    def rollback(self):
+        self.version = next(_versions)
+
+        return super(VersionedGraph, self).rollback()
+
+
+class OntologyGraph(VersionedGraph):
+    """
+    A VersionedGraph that interns the uris and blank nodes of the triples added to it
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(OntologyGraph, self).__init__(*args, **kwargs)
+
+        #maps each uri and blank node to the one instance of it kept in the graph, and the removals since the terms no
+        #longer in any triple were let go of
+        self._terms = {}
+        self._removals = 0
+
+    def intern(self, term):
+        """
+        returns the instance of :param term kept in the graph, making it the one kept if there is none yet
+        :param term:
+        :return:
+        """
+        kind = type(term)
+
+        #checked by exact type first, as isinstance against rdflib's abstract term classes is slow
+        if kind is Literal or (kind is not URIRef and kind is not BNode and isinstance(term, Literal)):
+            return term
+
+        return self._terms.setdefault(term, term)
+
+    def add(self, triple):
+        s, p, o = triple
+        intern = self.intern
+
+        return super(OntologyGraph, self).add((intern(s), intern(p), intern(o)))
+
+    def addN(self, quads):
+        intern = self.intern
+
+        return super(OntologyGraph, self).addN((intern(s), intern(p), intern(o), c) for s, p, o, c in quads)
+
+    def remove(self, triple):
+        """
+        removes the triples matching :param triple.  the terms no triple is left in are let go of all at once, when the
+        removals outnumber the triples left, or when every triple is removed
+        :param triple:
+        :return:
+        """
+        result = super(OntologyGraph, self).remove(triple)
+
+        if triple == (None, None, None):
+            self._terms = {}
+            self._removals = 0
+        else:
+            self._removals += 1
+
+            #a prune reads every triple, so it waits until there have been as many removals
+            if self._removals > max(PRUNE_AFTER, len(self)):
+                self.prune()
+
+        return result
+
+    def prune(self):
+        """
+        lets go of the terms no triple is in any more, by interning those of the triples the graph holds afresh.  the
+        instances the triples hold are the ones kept
+        :return:
+        """
+        terms = {}
+
+        for triple in self:
+            for term in triple:
+                if type(term) is not Literal and not isinstance(term, Literal):
+                    terms.setdefault(term, term)
+
+        self._terms = terms
+        self._removals = 0
+
+    def rollback(self):
+        """
+        rolls back the store, then interns the terms of the triples it holds again, as the rollback may have brought
+        back some that were let go of and dropped others
+        :return:
+        """
+        result = super(OntologyGraph, self).rollback()
+
+        #the in-memory store has nothing to roll back
+        if self.store.transaction_aware:
+            self.prune()
+
+        return result
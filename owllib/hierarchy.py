@@ -0,0 +1,332 @@
+"""
+a precomputed transitive index over a hierarchy, such as rdfs:subClassOf or rdfs:subPropertyOf.
+
+cycles (e.g. classes that are subclasses of each other) are first collapsed, leaving a DAG.  each node of the DAG is
+then given interval labels (Agrawal, Borgida and Jagadish, 1989): the nodes are numbered in postorder along a spanning
+forest, and each node keeps the merged number ranges of everything below it.  one node is below another if its number
+falls in one of the other's ranges, which is a bisect over a handful of ranges; everything below a node is read
+straight off its ranges, so the time is proportional to the answer.  the same is done with the edges reversed to answer
+ancestor queries.
+"""
+
+from bisect import bisect_right
+
+
+class Hierarchy:
+    """
+    Answers ancestor, descendant and subsumption queries over a hierarchy without walking it
+    """
+
+    def __init__(self, nodes=(), edges=()):
+        """
+        builds the index
+        :param nodes: every node, including ones with no edges
+        :param edges: (child, parent) pairs
+        :return:
+        """
+        self._ids = {}
+        self._nodes = []
+
+        edges = list(edges)
+
+        for node in nodes:
+            self._id(node)
+
+        for child, parent in edges:
+            self._id(child)
+            self._id(parent)
+
+        self._parents = [set() for _ in self._nodes]
+        self._children = [set() for _ in self._nodes]
+
+        for child, parent in edges:
+            child_id = self._ids[child]
+            parent_id = self._ids[parent]
+
+            if child_id != parent_id:
+                self._parents[child_id].add(parent_id)
+                self._children[parent_id].add(child_id)
+
+        self._component, self._members = _condense(self._children)
+
+        down = [set() for _ in self._members]
+        up = [set() for _ in self._members]
+
+        for node_id, children in enumerate(self._children):
+            component = self._component[node_id]
+
+            for child_id in children:
+                child_component = self._component[child_id]
+
+                if child_component != component:
+                    down[component].add(child_component)
+                    up[child_component].add(component)
+
+        self._below = _Intervals(down, up)
+        self._above = _Intervals(up, down)
+
+    def _id(self, node):
+        """
+        returns the integer id of :param node, assigning one if it is new
+        :param node:
+        :return:
+        """
+        node_id = self._ids.get(node)
+
+        if node_id is None:
+            node_id = self._ids[node] = len(self._nodes)
+            self._nodes.append(node)
+
+        return node_id
+
+    def __contains__(self, node):
+        return node in self._ids
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def parents(self, node):
+        """
+        returns the direct parents of :param node
+        :param node:
+        :return:
+        """
+        node_id = self._ids.get(node)
+
+        if node_id is None:
+            return set()
+
+        return set(self._nodes[parent_id] for parent_id in self._parents[node_id])
+
+    def children(self, node):
+        """
+        returns the direct children of :param node
+        :param node:
+        :return:
+        """
+        node_id = self._ids.get(node)
+
+        if node_id is None:
+            return set()
+
+        return set(self._nodes[child_id] for child_id in self._children[node_id])
+
+    def ancestors(self, node):
+        """
+        returns every node :param node is below, not including itself
+        :param node:
+        :return:
+        """
+        return self._reached(node, self._above)
+
+    def descendants(self, node):
+        """
+        returns every node below :param node, not including itself
+        :param node:
+        :return:
+        """
+        return self._reached(node, self._below)
+
+    def is_below(self, node, other):
+        """
+        returns true if :param node is :param other or is below it, e.g. is a subclass of it
+        :param node:
+        :param other:
+        :return:
+        """
+        if node == other:
+            return True
+
+        node_id = self._ids.get(node)
+        other_id = self._ids.get(other)
+
+        if node_id is None or other_id is None:
+            return False
+
+        return self._below.reaches(self._component[other_id], self._component[node_id])
+
+    def _reached(self, node, intervals):
+        """
+        returns the nodes reached from :param node through :param intervals, not including itself
+        :param node:
+        :param intervals:
+        :return:
+        """
+        node_id = self._ids.get(node)
+
+        if node_id is None:
+            return set()
+
+        nodes = self._nodes
+        members = self._members
+
+        reached = set()
+
+        for component in intervals.reached(self._component[node_id]):
+            for member_id in members[component]:
+                reached.add(nodes[member_id])
+
+        reached.discard(node)
+
+        return reached
+
+
+class _Intervals:
+    """
+    interval reachability labels over a DAG, in the direction of the :param edges given
+    """
+
+    def __init__(self, edges, reverse):
+        """
+        :param edges: for each node, the nodes it points to
+        :param reverse: for each node, the nodes that point to it
+        :return:
+        """
+        count = len(edges)
+
+        #postorder numbers along a spanning forest, walked without recursion
+        self.post = post = [0] * count
+        low = [0] * count
+        self.by_post = by_post = []
+
+        visited = [False] * count
+
+        for root in range(count):
+            if reverse[root] or visited[root]:
+                continue
+
+            visited[root] = True
+            stack = [(root, iter(edges[root]))]
+            lows = [len(by_post)]
+
+            while stack:
+                node, remaining = stack[-1]
+
+                for target in remaining:
+                    if not visited[target]:
+                        visited[target] = True
+                        stack.append((target, iter(edges[target])))
+                        lows.append(len(by_post))
+                        break
+                else:
+                    stack.pop()
+                    low[node] = lows.pop()
+                    post[node] = len(by_post)
+                    by_post.append(node)
+
+        #merging each node's own range with everything it points to, targets first
+        self.starts = starts = [None] * count
+        self.ends = ends = [None] * count
+
+        for node in by_post:
+            ranges = [(low[node], post[node])]
+
+            for target in edges[node]:
+                ranges.extend(zip(starts[target], ends[target]))
+
+            ranges.sort()
+
+            merged_starts = []
+            merged_ends = []
+
+            for start, end in ranges:
+                if merged_ends and start <= merged_ends[-1] + 1:
+                    if end > merged_ends[-1]:
+                        merged_ends[-1] = end
+                else:
+                    merged_starts.append(start)
+                    merged_ends.append(end)
+
+            starts[node] = tuple(merged_starts)
+            ends[node] = tuple(merged_ends)
+
+    def reaches(self, source, target):
+        """
+        returns true if :param target can be reached from :param source
+        :param source:
+        :param target:
+        :return:
+        """
+        number = self.post[target]
+        starts = self.starts[source]
+
+        i = bisect_right(starts, number) - 1
+
+        return i >= 0 and number <= self.ends[source][i]
+
+    def reached(self, source):
+        """
+        yields every node reachable from :param source, including itself
+        :param source:
+        :return:
+        """
+        by_post = self.by_post
+
+        for start, end in zip(self.starts[source], self.ends[source]):
+            for number in range(start, end + 1):
+                yield by_post[number]
+
+
+def _condense(edges):
+    """
+    finds the strongly connected components of a graph with Tarjan's algorithm, without recursion
+    :param edges: for each node, the nodes it points to
+    :return: the component of each node, and the nodes in each component
+    """
+    count = len(edges)
+
+    index = [None] * count
+    lowlink = [0] * count
+    on_stack = [False] * count
+    component = [None] * count
+    members = []
+
+    stack = []
+    counter = 0
+
+    for root in range(count):
+        if index[root] is not None:
+            continue
+
+        work = [(root, iter(edges[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+
+        while work:
+            node, remaining = work[-1]
+
+            for target in remaining:
+                if index[target] is None:
+                    index[target] = lowlink[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    work.append((target, iter(edges[target])))
+                    break
+                elif on_stack[target] and index[target] < lowlink[node]:
+                    lowlink[node] = index[target]
+            else:
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+
+                if lowlink[node] == index[node]:
+                    found = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = len(members)
+                        found.append(member)
+
+                        if member == node:
+                            break
+
+                    members.append(found)
+
+    return component, members
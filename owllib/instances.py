@@ -0,0 +1,75 @@
+"""
+an index from each class to the things asserted to be of that type, the reverse of rdf:type.
+
+the built-in classes of RDF, RDFS and OWL, such as owl:Class and owl:NamedIndividual, type nearly everything in an
+ontology, and are never asked for the instances of, so they are left out, all but owl:Thing.  the index is built with
+one pass over the rdf:type triples, and kept up to date as triples change, so the instances of a class are read off
+rather than found by checking the types of every individual.
+"""
+
+from rdflib import RDF, RDFS, OWL
+
+#the namespaces of the classes left out of the index
+_BUILT_IN = (str(RDF), str(RDFS), str(OWL))
+
+
+def _indexed(cls):
+    """
+    returns true if the instances of :param cls are indexed
+    :param cls:
+    :return:
+    """
+    return cls == OWL.Thing or not str(cls).startswith(_BUILT_IN)
+
+
+class InstanceIndex:
+    """
+    Maps each class to the uris and blank nodes typed with it
+    """
+
+    def __init__(self, graph=None):
+        """
+        :param graph: the graph to index the rdf:type triples of, if any
+        :return:
+        """
+        self._instances = {}
+
+        if graph is not None:
+            for instance, cls in graph.subject_objects(RDF.type):
+                if _indexed(cls):
+                    self._instances.setdefault(cls, set()).add(instance)
+
+    def __len__(self):
+        return len(self._instances)
+
+    def instances(self, cls):
+        """
+        returns what is asserted to be of type :param cls; the set is the index's own, and is not to be changed
+        :param cls:
+        :return:
+        """
+        return self._instances.get(cls, frozenset())
+
+    def refresh(self, triples, graph):
+        """
+        updates the index for the rdf:type triples among :param triples, each added to or removed from :param graph
+        :param triples:
+        :param graph:
+        :return:
+        """
+        for triple in triples:
+            instance, predicate, cls = triple
+
+            if predicate != RDF.type or not _indexed(cls):
+                continue
+
+            if triple in graph:
+                self._instances.setdefault(cls, set()).add(instance)
+            else:
+                instances = self._instances.get(cls)
+
+                if instances is not None:
+                    instances.discard(instance)
+
+                    if not instances:
+                        del self._instances[cls]
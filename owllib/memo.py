@@ -0,0 +1,160 @@
+"""
+remembers the results of an ontology's get_* queries, so asking the same thing twice doesn't query the graph twice.
+
+results are kept by query and uri, up to a fixed number, with the least recently used dropped first.  the memo holds
+the version of the graph its results were read from (see owllib.graph.VersionedGraph); if the graph is found at any
+other version, it has been changed behind the ontology's back, and every result is dropped.  changes the ontology makes
+itself only drop the results about the uris they touch.
+"""
+
+from collections import OrderedDict
+
+#results kept by default
+MEMO_SIZE = 1 << 16
+
+
+class QueryMemo:
+    """
+    A least recently used memo of query results, keyed by query and uri, and tied to a graph version
+    """
+
+    def __init__(self, size=MEMO_SIZE):
+        """
+        :param size: the most results to keep; 0 keeps none
+        :return:
+        """
+        self.size = size
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        #(query, uri) to result, least recently used first
+        self._results = OrderedDict()
+
+        #uri to the queries with a result kept for it
+        self._queries = {}
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, query, uri, version):
+        """
+        returns the result of :param query for :param uri, or None if there is none kept for :param version of the graph
+        :param query:
+        :param uri:
+        :param version:
+        :return:
+        """
+        if version != self.version:
+            if self._results:
+                self.invalidations += len(self._results)
+                self.clear()
+
+            self.version = version
+
+        key = (query, uri)
+        result = self._results.get(key)
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self._results.move_to_end(key)
+        self.hits += 1
+
+        return result
+
+    def put(self, query, uri, result):
+        """
+        keeps :param result as the result of :param query for :param uri, at the version of the last get
+        :param query:
+        :param uri:
+        :param result:
+        :return:
+        """
+        if self.size <= 0:
+            return
+
+        self._results[(query, uri)] = result
+        self._queries.setdefault(uri, set()).add(query)
+
+        while len(self._results) > self.size:
+            (old_query, old_uri), _ = self._results.popitem(last=False)
+            self._forget(old_query, old_uri)
+            self.evictions += 1
+
+    def advance(self, before, after):
+        """
+        moves the memo from version :param before of the graph to :param after, for a change whose uris are
+        invalidated separately.  a memo that wasn't at :param before is left behind, to be cleared on next use
+        :param before:
+        :param after:
+        :return:
+        """
+        if self.version == before:
+            self.version = after
+
+    def invalidate(self, uris):
+        """
+        drops the results kept for :param uris
+        :param uris:
+        :return:
+        """
+        results = self._results
+
+        for uri in uris:
+            for query in self._queries.pop(uri, ()):
+                del results[(query, uri)]
+                self.invalidations += 1
+
+    def invalidate_query(self, query):
+        """
+        drops the results of :param query for every uri
+        :param query:
+        :return:
+        """
+        for key in [key for key in self._results if key[0] == query]:
+            del self._results[key]
+            self._forget(*key)
+            self.invalidations += 1
+
+    def clear(self):
+        """
+        drops every result
+        :return:
+        """
+        self._results = OrderedDict()
+        self._queries = {}
+
+    def stats(self):
+        """
+        returns the hits, misses, evictions and invalidations so far, with the number of results kept and the hit rate
+        :return: a dict
+        """
+        lookups = self.hits + self.misses
+
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._results),
+                'size': self.size}
+
+    def _forget(self, query, uri):
+        """
+        removes :param query from the queries kept for :param uri
+        :param query:
+        :param uri:
+        :return:
+        """
+        queries = self._queries.get(uri)
+
+        if queries is not None:
+            queries.discard(query)
+
+            if not queries:
+                del self._queries[uri]
@@ -1,7 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from rdflib import Graph, RDF, RDFS, OWL, BNode, URIRef
+import itertools
+import os
 import urllib.request as url
 
 from owllib.entities import *
+from owllib import diff, formats, parallel, profiling, serializer, snapshot, streaming, tables
+from owllib.cache import is_remote
+from owllib.closure import ClosureView
+from owllib.graph import OntologyGraph, VersionedGraph
+from owllib.hierarchy import Hierarchy
+from owllib.instances import InstanceIndex
+from owllib.memo import QueryMemo, MEMO_SIZE
+from owllib.reasoner import OWL_RL_RULES, Reasoner
+from owllib.search import LabelIndex
+
+#registers owllib's stores with rdflib, so they can be named
+import owllib.stores
+
+#default number of imports fetched and parsed at once
+IMPORT_WORKERS = 4
+
+#default number of entities add_entities writes to the graph at once
+BATCH_SIZE = 10000
+
+#changes to the uris the graph mentions that are remembered, for closure views to catch up with; see _mention_changes
+MENTION_LOG = 64
+
+
+class _EntitySet(set):
+    """
+    A set of entities that adds those put in it to an ontology's uri index, unless the index has an entity for the uri
+    already.  removing an entity leaves the index as it is; see Ontology.remove_entity
+    """
+
+    def __init__(self, ontology, entities=()):
+        """
+        :param ontology: whose uri index the entities are added to; it is looked up each time, as loading replaces it
+        :param entities:
+        :return:
+        """
+        super(_EntitySet, self).__init__(entities)
+
+        self.ontology = ontology
+        self._index(self)
+
+    def _index(self, entities):
+        setdefault = self.ontology._entity_index.setdefault
+
+        for entity in entities:
+            setdefault(entity.uri, entity)
+
+    def add(self, entity):
+        super(_EntitySet, self).add(entity)
+        self.ontology._entity_index.setdefault(entity.uri, entity)
+
+    def update(self, *others):
+        for entities in others:
+            entities = list(entities)
+
+            super(_EntitySet, self).update(entities)
+            self._index(entities)
+
+    def symmetric_difference_update(self, other):
+        other = set(other)
+        added = other - self
+
+        super(_EntitySet, self).symmetric_difference_update(other)
+        self._index(added)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
 
 
 class Ontology:
@@ -9,43 +84,158 @@ class Ontology:
     A class representing an Ontology
     """
 
-    def __init__(self, uri=None, version_uri=None, imports=None):
+    def __init__(self, uri=None, version_uri=None, imports=None, store='default', memo_size=MEMO_SIZE):
         """
         creates a new ontology; to load, use the Ontology.load method
         :param uri:
         :param version_uri:
         :param imports:
+        :param store: the name of the rdflib store plugin to hold the graph in, e.g. 'Columnar', or a store instance,
+        e.g. an owllib.stores.SQLiteStore (see owllib.stores).  imports are held in the same kind of store when it is
+        named, and in memory otherwise
+        :param memo_size: the most get_* query results to remember; see owllib.memo.  0 remembers none
         :return:
         """
 
-        self.graph = Graph()
+        self.store = store
+        self.graph = self._new_graph()
+
+        #a persistent store may hold an ontology already, which is left as it is; see open
+        fresh = (None, None, None) not in self.graph
 
         #if we have no uri, we create a bnode
         if not uri:
             self.uri = BNode()
 
-        self.graph.add((self.uri, RDF.type, OWL.Ontology))
+        if fresh:
+            self.graph.add((self.uri, RDF.type, OWL.Ontology))
 
-        if version_uri:
+        if version_uri and fresh:
             self.graph.add((uri, OWL.versionIRI, version_uri))
 
         if imports:
             import_uris = [an_import.uri for an_import in imports]
 
             for uri in import_uris:
-                self.graph.add((uri, OWL.imports, uri))
+                if fresh:
+                    self.graph.add((uri, OWL.imports, uri))
             self.direct_imports = imports
             self.indirect_imports = self._load_indirects()
         else:
             self.direct_imports = set()
             self.indirect_imports = set()
 
+        #maps uris and bnodes to their owllib entity, so convert and exists don't have to scan; entities put in the
+        #public sets below are indexed as they are added
+        self._entity_index = {}
+
         self.classes = set()
         self.individuals = set()
         self.object_properties = set()
         self.annotation_properties = set()
         self.data_properties = set()
 
+        #entities whose triples have changed since they were last synced to the graph
+        self._dirty_entities = set()
+
+        #when lazy, entity attributes are fetched from the graph on first access instead of all at load
+        self.lazy = False
+        self.import_workers = IMPORT_WORKERS
+
+        #an optional owllib.cache.OntologyCache that remote documents and their imports are fetched through
+        self.cache = None
+
+        #an optional owllib.registry.ImportRegistry that imports are shared through, and whether this ontology is one
+        #of those shared, and so read-only
+        self.registry = None
+        self.shared = False
+
+        #where the ontology was loaded from, if anywhere, and the fingerprint that had when it was loaded, so a snapshot
+        #saved later is seen to be stale if it has changed since; see owllib.snapshot
+        self.location = None
+        self.fingerprint = None
+
+        #the locations, ontology IRIs and version IRIs of the documents load_many merged into the graph; they are
+        #imported already, so their owl:imports triples aren't synced with the direct imports
+        self.merged_imports = set()
+
+        #transitive indexes over the class and property hierarchies, built on first use
+        self._class_hierarchy = None
+        self._property_hierarchy = None
+
+        #the label, synonym and definition index, and the index of each class's instances, built on first use
+        self._label_index = None
+        self._instance_index = None
+
+        #the view of this ontology and its imports as one; the uris the graph mentions, each with the number of times,
+        #and the graph version they were worked out at; and the uris that have started and stopped being mentioned with
+        #each change since.  see closure_view
+        self._closure_view = None
+        self._mentioned = None
+        self._mention_log = []
+
+        #the results of the get_* queries, kept until the graph changes under them
+        self.memo = QueryMemo(memo_size)
+
+        #an owllib.profiling.LoadProfiler timing loads, if profiling; see profiling
+        self.profiler = None
+
+        #the owllib.reasoner.Reasoner keeping the graph's inferences up to date, if materialized; see materialize
+        self.reasoner = None
+
+    def _new_graph(self):
+        """
+        returns a graph to load the ontology into, in the ontology's store.  a named store is new and empty each time;
+        a store instance is the same each time, and holds whatever it held.  rdflib's own in-memory store gets an
+        owllib.graph.OntologyGraph; other stores keep a single copy of each term already, and just get a VersionedGraph
+        :return:
+        """
+        if self.store == 'default':
+            return OntologyGraph()
+
+        return VersionedGraph(store=self.store)
+
+    #the public entity sets, which index the entities put in them, however they are put there
+    @property
+    def classes(self):
+        return self._classes
+
+    @classes.setter
+    def classes(self, entities):
+        self._classes = _EntitySet(self, entities)
+
+    @property
+    def individuals(self):
+        return self._individuals
+
+    @individuals.setter
+    def individuals(self, entities):
+        self._individuals = _EntitySet(self, entities)
+
+    @property
+    def object_properties(self):
+        return self._object_properties
+
+    @object_properties.setter
+    def object_properties(self, entities):
+        self._object_properties = _EntitySet(self, entities)
+
+    @property
+    def annotation_properties(self):
+        return self._annotation_properties
+
+    @annotation_properties.setter
+    def annotation_properties(self, entities):
+        self._annotation_properties = _EntitySet(self, entities)
+
+    @property
+    def data_properties(self):
+        return self._data_properties
+
+    @data_properties.setter
+    def data_properties(self, entities):
+        self._data_properties = _EntitySet(self, entities)
+
     #read-only properties
     @property
     def entities(self):
@@ -55,41 +245,414 @@ class Ontology:
     def properties(self):
         return self.object_properties | self.annotation_properties | self.data_properties
 
+    def _entity_set(self, entity):
+        """
+        returns the set of entities on this ontology that :param entity belongs in
+        :param entity:
+        :return:
+        """
+        if isinstance(entity, Class):
+            return self.classes
+        if isinstance(entity, Individual):
+            return self.individuals
+        if isinstance(entity, ObjectProperty):
+            return self.object_properties
+        if isinstance(entity, AnnotationProperty):
+            return self.annotation_properties
+        if isinstance(entity, DataProperty):
+            return self.data_properties
+
+        raise TypeError("Not an owllib entity.  Found " + type(entity).__name__)
+
+    def _index_entity(self, entity):
+        """
+        adds :param entity to the uri index
+        :param entity:
+        :return:
+        """
+        self._entity_index[entity.uri] = entity
+
+    def add_entity(self, entity):
+        """
+        adds an owllib entity to the ontology, keeping the uri index up to date.  does not touch the graph; use
+        sync_entity_to_graph or sync_to_graph for that
+        :param entity:
+        :return:
+        """
+        self._check_writable()
+
+        self._entity_set(entity).add(entity)
+        self._index_entity(entity)
+        self._hierarchy_changed(entity)
+
+        if entity.ontology is None:
+            entity.ontology = self
+
+        #changed before it had an ontology to be tracked by
+        if entity.dirty:
+            self._dirty_entities.add(entity)
+
+    def add_entities(self, entities, batch_size=BATCH_SIZE):
+        """
+        adds owllib entities to the ontology and writes them to the graph, a batch at a time: the graph is written with
+        one addN, and the caches and indexes that depend on it are updated, once per batch rather than once per entity.
+        each entity's triples are written if it holds any, as those from iter_entities and load_table do, and its
+        declaration and its labels, comments and definitions otherwise.  an entity of the same kind as one the ontology
+        has under the same uri adds its triples to that one, and is not added itself.  the entities are fetched from
+        the graph on next access
+        :param entities: an iterable of entities, e.g. a generator, consumed as it goes
+        :param batch_size: how many entities are written at once
+        :return: the number of entities added
+        """
+        self._check_writable()
+
+        index = self._entity_index
+        added = 0
+        entities = iter(entities)
+
+        with profiling.phase(self.profiler, 'add_entities'):
+            while True:
+                batch = list(itertools.islice(entities, batch_size))
+
+                if not batch:
+                    break
+
+                triples = set()
+
+                for entity in batch:
+                    kind = self._entity_set(entity)
+                    triples.update(self._entity_triples(entity))
+
+                    existing = index.get(entity.uri)
+
+                    if existing is not None and type(existing) is type(entity):
+                        continue
+
+                    kind.add(entity)
+                    index[entity.uri] = entity
+                    self._hierarchy_changed(entity)
+                    added += 1
+
+                    if entity.ontology is None:
+                        entity.ontology = self
+
+                #the entities are clean once their triples are written, so _changed drops everything they hold
+                for entity in batch:
+                    if entity.ontology is self:
+                        entity.mark_clean()
+
+                self._changed(self._apply_delta(set(), triples))
+
+        profiling.count(self.profiler, 'entities_added', added)
+
+        return added
+
+    def _entity_triples(self, entity):
+        """
+        returns the triples add_entities writes for :param entity: those it holds, or if none, its declaration, labels,
+        comments and definitions
+        :param entity:
+        :return:
+        """
+        if entity._triples is not None:
+            return entity._triples
+
+        uri = entity.uri
+        triples = []
+        declaration = tables.DECLARATIONS.get(type(entity))
+
+        if declaration is not None:
+            triples.append((uri, RDF.type, declaration))
+
+        for values, predicate in ((entity._labels, RDFS.label), (entity._comments, RDFS.comment),
+                                  (entity._definitions, DEFINITION)):
+            if values:
+                triples.extend((uri, predicate, value) for value in values)
+
+        return triples
+
+    def remove_entity(self, entity):
+        """
+        removes an owllib entity from the ontology and the uri index.  does not touch the graph
+        :param entity:
+        :return:
+        """
+        self._check_writable()
+
+        self._entity_set(entity).discard(entity)
+
+        if self._entity_index.get(entity.uri) is entity:
+            del self._entity_index[entity.uri]
+
+        self._dirty_entities.discard(entity)
+        self._hierarchy_changed(entity)
+
+    def _hierarchy_changed(self, entity):
+        """
+        drops the hierarchy index that :param entity is part of, to be rebuilt on next use
+        :param entity:
+        :return:
+        """
+        if isinstance(entity, Class):
+            self._class_hierarchy = None
+        elif isinstance(entity, Property):
+            self._property_hierarchy = None
+
     def sync_entity_to_graph(self, entity):
         """
-        removes all triples of the entity, then replaces them with the triples found in the entity instance
+        makes the graph match the triples found in the entity instance, removing and adding only the triples that
+        differ
         :param entity:
         :return:
         """
-        #removing all existing triples for this entity
-        to_remove = self.get_triples(entity)
+        to_remove, to_add = self._entity_delta(entity)
+
+        self._changed(self._apply_delta(to_remove, to_add))
+
+        entity.mark_clean()
+
+    def sync_to_graph(self):
+        """
+        syncs all modified entities, and the imports, to the graph.  the differences are worked out for every dirty
+        entity first, then written in one batch
+        :return:
+        """
+        dirty = set(self._dirty_entities)
+
+        #entities put straight into the public sets, rather than with add_entity, aren't tracked unless they belong to
+        #this ontology, so the sets are checked for those that are dirty too; reading a flag is all that costs
+        for entities in (self.classes, self.individuals, self.object_properties, self.annotation_properties,
+                         self.data_properties):
+            dirty.update(entity for entity in entities if entity.dirty)
+
+        to_remove = set()
+        to_add = set()
+
+        for entity in dirty:
+            removed, added = self._entity_delta(entity)
+            to_remove |= removed
+            to_add |= added
+
+        removed, added = self._imports_delta()
+        to_remove |= removed
+        to_add |= added
+
+        #a triple one entity dropped but another still holds is kept
+        to_remove -= to_add
+
+        changed = self._apply_delta(to_remove, to_add)
+        self._changed(changed)
+
+        for entity in dirty:
+            entity.mark_clean()
+
+        #dirty entities whose triples disagree with what was written are refetched
+        index = self._entity_index
+
+        for triple in changed:
+            written = triple in self.graph
+
+            for term in triple:
+                entity = index.get(term)
+
+                if entity is not None and entity._triples is not None and (triple in entity._triples) != written:
+                    entity.invalidate('triples')
+
+    def _entity_delta(self, entity):
+        """
+        returns the triples to remove from and add to the graph to make it match :param entity
+        :param entity:
+        :return: a (to_remove, to_add) tuple of sets
+        """
+        current = self.get_triples(entity)
+        triples = set(entity.triples)
+
+        return current - triples, triples - current
+
+    def _imports_delta(self):
+        """
+        returns the owl:imports triples to remove from and add to the graph to make it match the direct imports.  a
+        shared import's imports are left as they were loaded
+        :return: a (to_remove, to_add) tuple of sets
+        """
+        if self.uri is None or self.shared:
+            return set(), set()
+
+        current = set(triple for triple in self.graph.triples((self.uri, OWL.imports, None))
+                      if triple[2] not in self.merged_imports)
+        wanted = set((self.uri, OWL.imports, imp.uri) for imp in self.direct_imports if imp.uri is not None)
+
+        return current - wanted, wanted - current
+
+    def _apply_delta(self, to_remove, to_add):
+        """
+        removes :param to_remove from the graph, then adds :param to_add in one batch.  if the ontology is materialized,
+        the inferences the changes retract and make are written in the same batch
+        :param to_remove:
+        :param to_add:
+        :return: the set of triples removed or added
+        """
+        if to_remove or to_add:
+            self._check_writable()
+
+        changed = set(to_remove) | set(to_add)
+
+        if self.reasoner is not None and changed:
+            retracted, inferred = self.reasoner.update(to_remove, to_add)
+
+            #an asserted triple removed may still be inferred, so is removed, then added back
+            to_remove = set(to_remove) | retracted
+            to_add = set(to_add) | inferred
+            changed |= retracted | inferred
+
+        graph = self.graph
+        version = getattr(graph, 'version', None)
+
+        #the uris mentioned are kept count of, if they are counted already and nothing else has changed the graph
+        mentioned = self._mentioned
+        counting = mentioned is not None and version is not None and mentioned[0] == version
+
+        if counting:
+            to_add = set(to_add)
+            removed = [triple for triple in to_remove if triple not in to_add and triple in graph]
+            added = [triple for triple in to_add if triple not in graph]
 
         for triple in to_remove:
-            self.graph.remove(triple)
+            graph.remove(triple)
 
-        #adding triples from entity to graph
-        to_add = entity.triples
+        if to_add:
+            graph.addN((s, p, o, graph) for s, p, o in to_add)
 
-        for triple in to_add:
-            self.graph.add(triple)
+        graph.commit()
 
-    def sync_to_graph(self):
+        #the memo stays current; _changed drops what it held about the triples
+        self.memo.advance(version, getattr(graph, 'version', None))
+
+        if counting:
+            self._count_mentions(mentioned[1], version, removed, added)
+
+        return changed
+
+    def _count_mentions(self, counts, version, removed, added):
+        """
+        updates the count of each uri the graph mentions for the triples :param removed from and :param added to it,
+        and logs the uris that started and stopped being mentioned
+        :param counts: the counts as they were at :param version, the version of the graph before the change
+        :param version:
+        :param removed:
+        :param added:
+        :return:
+        """
+        gone = set()
+        appeared = set()
+
+        for triple in removed:
+            for term in triple:
+                if not isinstance(term, rdflib.Literal):
+                    left = counts[term] - 1
+
+                    if left:
+                        counts[term] = left
+                    else:
+                        del counts[term]
+                        gone.add(term)
+
+        for triple in added:
+            for term in triple:
+                if not isinstance(term, rdflib.Literal):
+                    if term in counts:
+                        counts[term] += 1
+                    else:
+                        counts[term] = 1
+                        appeared.add(term)
+
+        #gone, but back again
+        both = gone & appeared
+        gone -= both
+        appeared -= both
+
+        after = getattr(self.graph, 'version', None)
+        self._mentioned = (after, counts)
+
+        self._mention_log.append((version, after, frozenset(appeared), frozenset(gone)))
+        del self._mention_log[:-MENTION_LOG]
+
+    def _check_writable(self):
+        """
+        raises a ValueError if the ontology is a shared import, and so read-only
+        :return:
+        """
+        if self.shared:
+            raise ValueError("A shared import is read-only.  Found " + str(self.uri))
+
+    def _changed(self, changed):
+        """
+        drops whatever was derived from the :param changed triples: the cached attributes of anything on either end of
+        them, and the hierarchy indexes if they were part of a hierarchy.  the label index is updated for their subjects
+        :param changed:
+        :return:
         """
-        syncs all entities to the graph
+        if not changed:
+            return
+
+        self.invalidate(*set(term for triple in changed for term in triple))
+
+        #grouped by predicate, so the checks below look the predicates up rather than compare every triple; a batch
+        #from add_entities can be a few hundred thousand triples
+        by_predicate = {}
+
+        for triple in changed:
+            by_predicate.setdefault(triple[1], []).append(triple)
+
+        if RDFS.subClassOf in by_predicate or RDFS.subPropertyOf in by_predicate:
+            self._class_hierarchy = None
+            self._property_hierarchy = None
+
+        #declaring an annotation property changes the annotations of everything using it, here and in closure views
+        if OWL.AnnotationProperty in set(obj for _, _, obj in by_predicate.get(RDF.type, ())):
+            self.memo.invalidate_query('annotations')
+            self.memo.invalidate_query('annotation_pairs')
+
+        #the label index is kept up to date rather than rebuilt, as only a few subjects change at a time
+        if self._label_index is not None:
+            subjects = set()
+
+            for predicate in self._label_index.predicates:
+                subjects.update(s for s, _, _ in by_predicate.get(predicate, ()))
+
+            self._label_index.refresh(subjects, self.graph)
+
+        if self._instance_index is not None:
+            self._instance_index.refresh(by_predicate.get(RDF.type, ()), self.graph)
+
+    def invalidate(self, *uris):
+        """
+        drops the cached attributes of the entities with the given uris (all entities if none are given), so they are
+        fetched from the graph on next access, along with the remembered query results about them.  call after changing
+        the graph directly.  dirty entities keep their unsynced triples
+        :param uris:
         :return:
         """
-        for cls in self.classes:
-            self.sync_entity_to_graph(cls)
-        for indiv in self.individuals:
-            self.sync_entity_to_graph(indiv)
-        for prop in self.object_properties:
-            self.sync_entity_to_graph(prop)
-        for prop in self.annotation_properties:
-            self.sync_entity_to_graph(prop)
-        for prop in self.data_properties:
-            self.sync_entity_to_graph(prop)
-        for imp in self.direct_imports:
-            self.sync_entity_to_graph(imp)
+        if not uris:
+            entities = self._entity_index.values()
+
+            self._class_hierarchy = None
+            self._property_hierarchy = None
+            self._label_index = None
+            self._instance_index = None
+            self.memo.clear()
+        else:
+            entities = [self._entity_index.get(uri) for uri in uris]
+            self.memo.invalidate(uris)
+
+        for entity in entities:
+            if entity is None:
+                continue
+
+            if entity.dirty:
+                entity.invalidate(*[name for name in entity.derived_attributes if name != 'triples'])
+            else:
+                entity.invalidate()
 
     def sync_from_graph(self):
         """
@@ -98,169 +661,772 @@ class Ontology:
         """
         self.uri = self._load_uri()
 
-        self.direct_imports = self._load_directs()
-        self._consolidate_imports()
+        with profiling.phase(self.profiler, 'imports'):
+            self.direct_imports = self._load_directs()
+            self.indirect_imports = self._load_indirects()
+
+        self._load_entities()
+
+    def _load_entities(self):
+        """
+        builds the owllib entities from the graph, then fills in their attributes unless the ontology is lazy
+        :return:
+        """
+        self._entity_index = {}
+        self._dirty_entities = set()
+
+        #the reasoner's triples are those of the graph it was built from
+        self.reasoner = None
 
-        self.indirect_imports = self._load_indirects()
+        with profiling.phase(self.profiler, 'entities'):
+            self.classes = self._load_classes()
+            self.individuals = self._load_individuals()
+            self.object_properties = self._load_object_properties()
+            self.annotation_properties = self._load_annotation_properties()
+            self.data_properties = self._load_data_properties()
 
-        self.classes = self._load_classes()
-        self.individuals = self._load_individuals()
-        self.object_properties = self._load_object_properties()
-        self.annotation_properties = self._load_object_properties()
-        self.data_properties = self._load_data_properties()
+        profiling.count(self.profiler, 'entities_built', len(self._entity_index))
 
-        #TODO very slow for large ontologies; find more efficient way
-        #was required because getting sub and super entities did not work without all of them already loaded
-        for entity in self.entities:
-            entity.sync_from_ontology()
+        self._sync_entities()
 
-    #inefficient, since it loads then discards ontologies
-    def _consolidate_imports(self, imports=None):
+    def _sync_entities(self):
         """
-        recursively consolidates the imported ontologies such that there is only one of each ontology that shares a uri
-        :param imports:
+        fills in the attributes of every entity from the graph, or just clears them to be fetched on access if lazy
+        :return:
+        """
+        self._class_hierarchy = None
+        self._property_hierarchy = None
+        self._label_index = None
+        self._instance_index = None
+
+        if self.lazy:
+            self.invalidate()
+        else:
+            with profiling.phase(self.profiler, 'attributes'):
+                self._sync_entities_from_graph()
+
+    def _sync_entities_from_graph(self):
+        """
+        fills in the annotations, labels, comments and definitions of every entity, with one pass over the triples of
+        each annotation predicate rather than running the get_* queries once per entity.  triples, parents and children
+        are left to be looked up in the graph when first accessed, rather than being copied onto every entity
         :return:
         """
-        if imports and len(self.direct_imports) > 0:
-            new_imports = set()
+        index = self._entity_index
+        graph = self.graph
 
-            for imp in imports:
-                for direct_import in self.direct_imports:
-                    if direct_import.uri == imp.uri and direct_import != imp:
-                        new_imports.add(imp)
-                    elif direct_import.uri == imp.uri:
-                        new_imports.add(direct_import)
+        for entity in index.values():
+            entity._annotations = EMPTY
+            entity._labels = EMPTY
+            entity._comments = EMPTY
+            entity._definitions = EMPTY
+            entity._triples = None
+            entity._parents = None
+            entity._children = None
 
-            #adding back direct imports that had no analog
-            uris = [ont.uri for ont in new_imports]
+        def fill(predicate, key, annotation=False):
+            profiling.count(self.profiler, 'graph_scans')
 
-            for imp in self.direct_imports:
-                if imp.uri not in uris:
-                    new_imports.add(imp)
+            for subj_uri, obj_uri in graph.subject_objects(predicate):
+                entity = index.get(subj_uri)
 
-            self.direct_imports = new_imports
+                if entity is None:
+                    continue
 
-            #using a 'non-public' call, but it's in this file so I figure it's not too destructive
-            imp._consolidate_imports(self.direct_imports | imports)
-        else:
-            for imp in self.direct_imports:
-                imp._consolidate_imports(self.direct_imports)
+                value = (predicate, obj_uri) if annotation else obj_uri
+                values = getattr(entity, key)
+
+                if values is EMPTY:
+                    setattr(entity, key, {value})
+                else:
+                    values.add(value)
+
+        for predicate in set(graph.subjects(RDF.type, OWL.AnnotationProperty)):
+            fill(predicate, '_annotations', True)
+
+        fill(RDFS.label, '_labels')
+        fill(RDFS.comment, '_comments')
+        fill(DEFINITION, '_definitions')
 
     def load(self, source=None, publicID=None, format=None,
-             location=None, file=None, data=None, **args):
+             location=None, file=None, data=None, lazy=False, import_workers=IMPORT_WORKERS, cache=None, registry=None,
+             **args):
         """
-        loads the ontology into the graph.  params are identical to rdflib.Graph.parse
+        loads the ontology into the graph.  params are identical to rdflib.Graph.parse, except for :param lazy
         :param source:
         :param publicID:
         :param format:
         :param location:
         :param file:
         :param data:
+        :param lazy: if true, only the entities themselves are loaded; their labels, triples, parents, etc. are fetched
+        from the graph the first time they are accessed.  imports are loaded the same way
+        :param import_workers: the most imports to fetch and parse at once
+        :param cache: an owllib.cache.OntologyCache to fetch remote documents through, including imports
+        :param registry: an owllib.registry.ImportRegistry, e.g. owllib.registry.REGISTRY, to share the imports through
+        with other ontologies; if not given, the imports are this ontology's own
         :param args:
         :return:
         """
+        self._check_writable()
+
+        with profiling.phase(self.profiler, 'load'):
+            self.graph = self._new_graph()
+            self.lazy = lazy
+            self.import_workers = import_workers
+            self.cache = cache
+            self.registry = registry
+            self.location = location
+            self.fingerprint = None
+
+            #taken before parsing, so a change made meanwhile makes a snapshot stale rather than being missed; that of
+            #a remote document is taken from the response it is fetched with
+            if location is not None and not is_remote(location):
+                self.fingerprint = snapshot.fingerprint(location)
+
+            #a persistent store is loaded afresh
+            self.graph.remove((None, None, None))
+
+            self._parse(source, publicID, format, location, file, data, **args)
+            self.graph.commit()
+
+            self.sync_from_graph()
+
+    def open(self, lazy=False, import_workers=IMPORT_WORKERS, cache=None, registry=None):
+        """
+        builds the ontology from the graph its store already holds, without parsing anything; e.g. to reopen an
+        ontology loaded into a persistent store earlier.  imports are loaded as in load
+        :param lazy: see load
+        :param import_workers: see load
+        :param cache: see load
+        :param registry: see load
+        :return:
+        """
+        self._check_writable()
+
+        with profiling.phase(self.profiler, 'open'):
+            self.graph = self._new_graph()
+            self.lazy = lazy
+            self.import_workers = import_workers
+            self.cache = cache
+            self.registry = registry
+
+            self.sync_from_graph()
+
+    @staticmethod
+    def load_many(locations, workers=None, merge=True, lazy=False, store='default', cache=None, profiler=None):
+        """
+        loads the documents at :param locations, and everything they import, parsing each document in a process of its
+        own.  see owllib.parallel
+        :param locations: file paths or urls
+        :param workers: the most documents to parse at once; the number of cpus by default
+        :param merge: if true, every document is loaded into the graph of a single ontology, whose uri is the one with
+        the most triples, and which has no separate imports.  if false, each document is loaded into an ontology of its
+        own, with the imports of each wired up to the others
+        :param lazy: see load
+        :param store: see Ontology.  when not merging, a store instance only holds the first ontology, and the rest are
+        held in memory, as imports are
+        :param cache: see load
+        :param profiler: an owllib.profiling.LoadProfiler to time the load with, which is left on the ontologies loaded
+        :return: the merged ontology, or a list of the ontologies loaded from each of :param locations, in order
+        """
+        with profiling.phase(profiler, 'load_many'):
+            locations = [str(location) for location in locations]
+            documents = parallel.load_documents(locations, workers, cache)
+
+            if merge:
+                ont = Ontology(store=store)
+                ont.lazy = lazy
+                ont.cache = cache
+                ont.profiler = profiler
+
+                graph = ont.graph = ont._new_graph()
+                graph.remove((None, None, None))
 
-        self.graph = Graph()
+                for document in documents:
+                    with profiling.phase(profiler, 'graph'):
+                        graph.addN((s, p, o, graph) for s, p, o in parallel.iter_triples(document))
 
-        self._parse(source, publicID, format, location, file, data, **args)
+                    profiling.count(profiler, 'documents_parsed')
+                    profiling.count(profiler, 'triples_parsed', len(document['triples']) // 3)
 
-        self.sync_from_graph()
+                    ont.merged_imports.add(URIRef(document['location']))
+                    ont.merged_imports.update(term for term in (document['uri'], document['version'])
+                                              if term is not None)
+
+                graph.commit()
+
+                ont.uri = ont._load_uri()
+                ont.direct_imports = set()
+                ont.indirect_imports = set()
+                ont._load_entities()
+
+                return ont
+
+            closure = {}
+            loaded = []
+
+            for document in documents:
+                first = document['location'] == locations[0]
+                ont = Ontology(store=store if first or isinstance(store, str) else 'default')
+                ont.lazy = lazy
+                ont.cache = cache
+                ont.location = document['location']
+                ont.profiler = profiler
+
+                with profiling.phase(profiler, 'graph'):
+                    graph = ont.graph = ont._new_graph()
+                    graph.remove((None, None, None))
+                    graph.addN((s, p, o, graph) for s, p, o in parallel.iter_triples(document))
+                    graph.commit()
+
+                profiling.count(profiler, 'documents_parsed')
+                profiling.count(profiler, 'triples_parsed', len(document['triples']) // 3)
+
+                ont.uri = document['uri']
+                ont._load_entities()
+
+                loaded.append(ont)
+
+                for uri in (URIRef(document['location']), document['uri'], document['version']):
+                    if uri is not None:
+                        closure.setdefault(uri, ont)
+
+            Ontology._wire_imports(loaded, closure)
+
+            return [closure[URIRef(location)] for location in locations]
+
+    @staticmethod
+    def iter_entities(location, format=None, grouped=True, window=streaming.WINDOW, partitions=streaming.PARTITIONS,
+                      directory=None):
+        """
+        yields the entities declared in the document at :param location as it is parsed, without loading it into a
+        graph; each comes with the labels, comments, definitions, annotations and triples it is the subject of.  see
+        owllib.streaming
+        :param location:
+        :param format: 'nt', 'turtle' or 'xml'; guessed if not given
+        :param grouped: true if each subject's triples are together in the document, so it can be streamed in bounded
+        memory.  if false, the triples are grouped in temporary files first
+        :param window: how many subjects are kept open at once when grouped
+        :param partitions: how many temporary files are used when not grouped
+        :param directory: where the temporary files go
+        :return:
+        """
+        return streaming.iter_entities(location, format, grouped, window, partitions, directory)
+
+    def load_table(self, location, kind=Class, delimiter=None, columns=None, prefixes=None, base=None,
+                   separator=tables.SEPARATOR, lang=None, batch_size=BATCH_SIZE):
+        """
+        adds an entity for each row of the TSV or CSV table at :param location, with its labels, comments, definitions
+        and parents, reading the table a row at a time and writing the graph a batch at a time.  see owllib.tables
+        :param location: a file path, an http(s) url, or a text file object
+        :param kind: the class of the entities, e.g. Class or Individual
+        :param delimiter: the delimiter of the columns; guessed if not given
+        :param columns: column names to what they hold, on top of owllib.tables.COLUMNS
+        :param prefixes: the prefixes of the CURIEs in the table, to their namespaces
+        :param base: the namespace ids that are neither IRIs nor CURIEs are relative to
+        :param separator: splits the values of a cell
+        :param lang: the language tag of the labels, comments and definitions
+        :param batch_size: how many entities are written at once
+        :return: the number of entities added
+        """
+        return self.add_entities(tables.iter_table(location, kind, delimiter, columns, prefixes, base, separator, lang),
+                                 batch_size)
+
+    def save(self, destination, format=None, sort=False):
+        """
+        syncs the modified entities to the graph, then writes the graph to :param destination a chunk at a time.  see
+        owllib.serializer
+        :param destination: a file path, or a file object open for writing, as text or bytes
+        :param format: 'nt', 'turtle' or 'xml'; guessed from the extension of a path if not given, or else turtle
+        :param sort: if true, subjects and their triples are written in a fixed order, so saving the same ontology twice
+        gives the same document
+        :return:
+        """
+        if format is None and isinstance(destination, (str, os.PathLike)):
+            format = rdflib.util.guess_format(str(destination))
+
+        self.sync_to_graph()
+
+        serializer.serialize(self.graph, destination, format or 'turtle', sort)
+
+    def save_snapshot(self, path, source=None):
+        """
+        writes a compact binary snapshot of the graph, entities and hierarchy to :param path, for load_snapshot to load
+        later without parsing.  see owllib.snapshot
+        :param path:
+        :param source: what the ontology was loaded from, recorded so a stale snapshot is detected; defaults to the
+        location it was loaded from, whose fingerprint is the one it had then
+        :return:
+        """
+        source = source or self.location
+
+        snapshot.write_snapshot(self, path, source, self.fingerprint if source == self.location else None)
+
+    def load_snapshot(self, path, check=True, lazy=False, import_workers=IMPORT_WORKERS, cache=None, registry=None):
+        """
+        loads the ontology from a snapshot written by save_snapshot, rather than parsing it.  imports are loaded as
+        in load
+        :param path:
+        :param check: if true, raises a ValueError when the source the snapshot was taken from has changed since
+        :param lazy: see load
+        :param import_workers: see load
+        :param cache: see load
+        :param registry: see load
+        :return:
+        """
+        self._check_writable()
+
+        with profiling.phase(self.profiler, 'load_snapshot'):
+            with profiling.phase(self.profiler, 'read'):
+                snap = snapshot.read_snapshot(path, check)
+
+            #the integer sections are read out of the snapshot's memory map, which is closed once they are
+            try:
+                terms = snap['terms']
+                triples = snap['triples']
+
+                self.graph = self._new_graph()
+                self.lazy = lazy
+                self.import_workers = import_workers
+                self.cache = cache
+                self.registry = registry
+                self.location = snap['source']
+                self.fingerprint = snap['fingerprint']
+
+                graph = self.graph
+
+                with profiling.phase(self.profiler, 'graph'):
+                    graph.remove((None, None, None))
+                    graph.addN((terms[triples[i]], terms[triples[i + 1]], terms[triples[i + 2]], graph)
+                               for i in range(0, len(triples), 3))
+                    graph.commit()
+
+                profiling.count(self.profiler, 'triples_parsed', len(triples) // 3)
+
+                self.uri = snap['uri']
+
+                with profiling.phase(self.profiler, 'imports'):
+                    self.direct_imports = self._load_directs()
+                    self.indirect_imports = self._load_indirects()
+
+                self._entity_index = {}
+                self._dirty_entities = set()
+
+                with profiling.phase(self.profiler, 'entities'):
+                    for name, kind in zip(snapshot.TABLES,
+                                          (Class, Individual, ObjectProperty, AnnotationProperty, DataProperty)):
+                        setattr(self, name, self._make_entities(kind, (terms[term_id] for term_id in snap[name])))
+
+                profiling.count(self.profiler, 'entities_built', len(self._entity_index))
+
+                self._sync_entities()
+
+                #the stored hierarchy spares lazy entities from querying the graph for their parents and children
+                if lazy:
+                    index = self._entity_index
+                    hierarchy = snap['hierarchy']
+
+                    for entity in index.values():
+                        entity.parents = set()
+                        entity.children = set()
+
+                    for i in range(0, len(hierarchy), 2):
+                        child = index[terms[hierarchy[i]]]
+                        parent = index[terms[hierarchy[i + 1]]]
+
+                        child.parents.add(parent)
+                        if not isinstance(child, Individual):
+                            parent.children.add(child)
+            finally:
+                snapshot.close_snapshot(snap)
 
     def _parse(self, source=None, publicID=None, format=None,
                location=None, file=None, data=None, **args):
         """
-        parses the ontology using rdflib.Graph.parse().  First, uses rdflib's guess_format, then tries all of them
+        parses the ontology using rdflib.Graph.parse().  remote documents are fetched once, through the cache if there
+        is one, and parsed from memory.  unless a format is given, it is picked from the Content-Type, then the first
+        few KB of the document, then rdflib's guess_format, so the document only has to be parsed once
+        :param source:
+        :param publicID:
+        :param format:
+        :param location:
+        :param file:
+        :param data:
+        :param args:
+        :return:
+        """
+        with profiling.phase(self.profiler, 'parse'):
+            remote = None
+            content_type = None
+
+            if location and is_remote(location):
+                remote = location
+                data, content_type = self._fetch(remote)
+                publicID = publicID or remote
+                location = None
+
+            guessed = not format
+
+            if guessed:
+                format = formats.format_from_content_type(content_type) \
+                    or formats.sniff_format(self._peek(source, location, file, data))
+
+            if not format and (remote or location):
+                format = rdflib.util.guess_format(str(remote or location))
+
+            self._parse_formats(source, publicID, format, location, file, data, guessed, **args)
+
+            if self.profiler is not None:
+                self.profiler.count('triples_parsed', len(self.graph))
+
+            #so the document is also found under the ontology and version iris it declares
+            if remote and self.cache is not None:
+                uri = self._load_uri()
+                if uri is not None:
+                    self.cache.alias(remote, uri, self.graph.value(uri, OWL.versionIRI))
+
+    def _fetch(self, location):
+        """
+        fetches the remote document at :param location, through the cache if there is one
+        :param location:
+        :return: a (bytes, content type) tuple
+        """
+        with profiling.phase(self.profiler, 'fetch'):
+            if self.cache is not None:
+                data, content_type = self.cache.fetch(location)
+                self.fingerprint = snapshot.remote_fingerprint(*self.cache.validators(location), data=data)
+            else:
+                request = url.Request(str(location), headers={'Accept': formats.ACCEPT})
+
+                with url.urlopen(request) as response:
+                    data, content_type = response.read(), response.headers.get('Content-Type')
+                    self.fingerprint = snapshot.remote_fingerprint(response.headers.get('ETag'),
+                                                                   response.headers.get('Last-Modified'), data)
+
+        profiling.count(self.profiler, 'documents_fetched')
+        profiling.count(self.profiler, 'bytes_fetched', len(data))
+
+        return data, content_type
+
+    @staticmethod
+    def _peek(source=None, location=None, file=None, data=None):
+        """
+        returns the first few KB of the document, without consuming it, or None if that isn't possible
+        :param source:
+        :param location:
+        :param file:
+        :param data:
+        :return:
+        """
+        if data is not None:
+            return data[:formats.SNIFF_SIZE]
+
+        if location is None and isinstance(source, str):
+            location = source
+        if file is None and hasattr(source, 'read'):
+            file = source
+
+        if location is not None:
+            path = str(location)
+            if path.startswith('file://'):
+                path = url.url2pathname(path[len('file://'):])
+
+            try:
+                with open(path, 'rb') as f:
+                    return f.read(formats.SNIFF_SIZE)
+            except (IOError, OSError):
+                return None
+
+        if file is not None and hasattr(file, 'seekable') and file.seekable():
+            position = file.tell()
+            head = file.read(formats.SNIFF_SIZE)
+            file.seek(position)
+            return head
+
+        return None
+
+    def _parse_formats(self, source=None, publicID=None, format=None,
+                       location=None, file=None, data=None, guessed=False, **args):
+        """
+        parses with :param format.  if there is no parser for it, or it was :param guessed and the parse fails, every
+        format rdflib might have is tried in turn.  fetched documents were already read into :param data, so retrying
+        never goes back to the network
         :param source:
         :param publicID:
         :param format:
         :param location:
         :param file:
         :param data:
+        :param guessed:
         :param args:
         :return:
         """
+        try:
+            profiling.count(self.profiler, 'format_attempts')
+            self.graph.parse(source, publicID, format, location, file, data, **args)
+            return
+        except rdflib.plugin.PluginException:
+            pass
+        except Exception:
+            if not guessed:
+                raise
+
+        #hacky, hacky, hacky
+        for fmt in formats.FORMATS:
+            if fmt == format:
+                continue
+
+            #dropping whatever a failed attempt left behind
+            self.graph.remove((None, None, None))
+
+            try:
+                profiling.count(self.profiler, 'format_attempts')
+                self.graph.parse(source, publicID, fmt, location, file, data, **args)
+                return
+            except Exception:
+                pass
+
+        #looks like none of them worked
+        raise rdflib.plugin.PluginException("No parser plugin found for ontology.")
+
+    def _load_uri(self):
+        """
+        loads the ontology uri from the graph; chooses the one with the most triples if there are multiples
+        :return:
+        """
+        profiling.count(self.profiler, 'graph_scans')
+        uris = [uri for uri in self.graph.subjects(RDF.type, OWL.Ontology)]
+
+        #more than one ontology in the file; choosing one with most triples as canonical
+        if len(uris) > 1:
+            canon_uri = uris[0]
+            canon_num = 0
+            for uri in uris:
+                tuples = [(pred, obj) for (pred, obj) in self.graph.predicate_objects(uri)]
+                num = len(tuples)
+
+                if num > canon_num:
+                    canon_num = num
+                    canon_uri = uri
+            return canon_uri
+
+        elif len(uris) > 0:
+            return uris[0]
+
+    def _load_indirects(self):
+        """
+        recursively loads all of the imports of any of the direct imports
+        :return:
+        """
+        indirects = set()
+
+        for ont in self.direct_imports:
+            indirects |= ont.indirect_imports | ont.direct_imports
+
+        #an import cycle can lead back here
+        indirects.discard(self)
+
+        return indirects
+
+    def _import_uris(self):
+        """
+        returns the uris this ontology directly imports, as found in the graph.  one declaring no ontology IRI imports
+        nothing, as in _imports_delta; looking its imports up by a None uri would find every owl:imports triple
+        :return:
+        """
+        if self.uri is None:
+            return set()
+
+        return set(self.graph.objects(self.uri, OWL.imports))
+
+    def _load_directs(self):
+        """
+        loads all of the direct imports.  the whole import closure is loaded first, so each distinct ontology is only
+        fetched and parsed once, however many ontologies import it
+        :return:
+        """
+        closure = self._load_import_closure()
+
+        return set(closure[uri] for uri in self._import_uris() if uri in closure)
+
+    def _load_import_closure(self):
+        """
+        discovers the import graph as imports finish loading, fetching and parsing each distinct uri exactly once on a
+        pool of at most import_workers threads.  the direct and indirect imports of every loaded ontology are then
+        wired up from the shared set.  with a registry, imports already shared are used as they are, imports and all,
+        and the rest are shared once wired up
+        :return: dict of uri to loaded ontology, including this one
+        """
+        registry = self.registry
+
+        closure = {}
+        if self.uri is not None:
+            closure[self.uri] = self
+
+        requested = set(closure)
+        pending = {}
+        loaded = []
+
+        def found(uri, ont):
+            closure[uri] = ont
+
+            #an ontology may be imported by a uri other than the one it declares
+            if ont.uri is not None and ont.uri not in requested:
+                requested.add(ont.uri)
+                closure[ont.uri] = ont
+
+        with ThreadPoolExecutor(max_workers=self.import_workers) as pool:
+            def request(uris):
+                for uri in uris:
+                    if uri not in requested:
+                        requested.add(uri)
+                        shared = registry.get(uri) if registry is not None else None
+
+                        if shared is not None:
+                            found(uri, shared)
+                        else:
+                            pending[pool.submit(self._load_import, uri)] = uri
+
+            request(self._import_uris())
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    uri = pending.pop(future)
+                    ont = future.result()
+
+                    found(uri, ont)
+
+                    #found shared once parsed, under the iris it declares; its imports are wired up already
+                    if ont.shared:
+                        registry.register(ont, [uri])
+                        continue
+
+                    loaded.append(ont)
+                    request(ont._import_uris())
+
+        self._wire_imports(loaded, closure)
+
+        if registry is not None:
+            replaced = False
+
+            for ont in loaded:
+                shared = registry.register(ont, [uri for uri, imported in closure.items() if imported is ont])
+
+                #another load shared the same ontology first, so that copy is used rather than this one
+                if shared is not ont:
+                    for uri, imported in list(closure.items()):
+                        if imported is ont:
+                            closure[uri] = shared
+
+                    replaced = True
+
+            #the ontologies that import a copy dropped import the shared one instead
+            if replaced:
+                kept = set(closure.values())
+                self._wire_imports([ont for ont in loaded if ont in kept], closure)
+
+            #shared imports bring their own imports with them, which this ontology uses too
+            imported = set()
+
+            for ont in closure.values():
+                imported.add(ont)
+                imported |= ont._reachable_imports()
+
+            imported.discard(self)
+
+            for ont in imported:
+                registry.use(ont, self)
+
+        return closure
+
+    @staticmethod
+    def _wire_imports(loaded, closure):
+        """
+        sets the direct and indirect imports of the :param loaded ontologies from :param closure, a dict of the uris
+        they import to the ontologies loaded from them
+        :param loaded:
+        :param closure:
+        :return:
+        """
+        for ont in loaded:
+            ont.direct_imports = set(closure[uri] for uri in ont._import_uris() if uri in closure)
+
+        for ont in loaded:
+            ont.indirect_imports = set()
 
-        #first, try rdflib's guess_format
-        if location and not format:
-            format = rdflib.util.guess_format(location)
+            for direct in ont.direct_imports:
+                ont.indirect_imports |= direct._reachable_imports()
 
-        #hacky, hacky, hacky
-        try:
-            self.graph.parse(source, publicID, format, location, file, data, **args)
-        except rdflib.plugin.PluginException:
-            #if that failed, try each of them
-            formats = ['xml',
-                       'turtle',
-                       'trix',
-                       'rdfa1.1',
-                       'rdfa1.0',
-                       'rdfa',
-                       'nt',
-                       'nquads',
-                       'n3',
-                       'microdata',
-                       'mdata',
-                       'hturtle',
-                       'html']
-
-            for fmt in formats:
-                try:
-                    self.graph.parse(source, publicID, fmt, location, file, data, **args)
-                    return
-                except Exception:
-                    pass
-
-            #looks like none of them worked
-            raise rdflib.plugin.PluginException("No parser plugin found for ontology.")
+            ont.indirect_imports.discard(ont)
 
-    def _load_uri(self):
+    def _reachable_imports(self):
         """
-        loads the ontology uri from the graph; chooses the one with the most triples if there are multiples
+        returns every ontology reachable through direct imports, without recursing
         :return:
         """
-        uris = [uri for uri in self.graph.subjects(RDF.type, OWL.Ontology)]
+        reached = set()
+        stack = list(self.direct_imports)
 
-        #more than one ontology in the file; choosing one with most triples as canonical
-        if len(uris) > 1:
-            canon_uri = uris[0]
-            canon_num = 0
-            for uri in uris:
-                tuples = [(pred, obj) for (pred, obj) in self.graph.predicate_objects(uri)]
-                num = len(tuples)
+        while stack:
+            ont = stack.pop()
 
-                if num > canon_num:
-                    canon_num = num
-                    canon_uri = uri
-            return canon_uri
+            if ont not in reached:
+                reached.add(ont)
+                stack.extend(ont.direct_imports)
 
-        elif len(uris) > 0:
-            return uris[0]
+        return reached
 
-    def _load_indirects(self):
+    def _load_import(self, uri):
         """
-        recursively loads all of the imports of any of the direct imports
+        parses the ontology at :param uri and builds its entities, unless the registry has it shared already, in which
+        case the shared ontology is returned.  its imports are left for the caller to wire up
+        :param uri:
         :return:
         """
-        indirects = set()
+        #a store instance holds this ontology, so imports get their own store of the default kind
+        ont = Ontology(store=self.store if isinstance(self.store, str) else 'default')
+        ont.lazy = self.lazy
+        ont.import_workers = self.import_workers
+        ont.cache = self.cache
+        ont.registry = self.registry
+        ont.profiler = self.profiler
 
-        for ont in self.direct_imports:
-            indirects |= ont.indirect_imports | ont.direct_imports
+        with profiling.phase(self.profiler, 'import'):
+            ont.graph = ont._new_graph()
+            ont._parse(location=uri)
 
-        return indirects
+            ont.uri = ont._load_uri()
+            ont.location = uri
 
-    def _load_directs(self):
+            #the same ontology may be shared already, imported from elsewhere
+            if self.registry is not None:
+                shared = self.registry.find(ont)
+
+                if shared is not None:
+                    return shared
+
+            ont._load_entities()
+
+        profiling.count(self.profiler, 'imports_loaded')
+
+        return ont
+
+    def _make_entities(self, kind, uris):
         """
-        loads all of the direct imports, creating ontologies for each of them
+        creates and indexes an owllib entity of :param kind for each of :param uris
+        :param kind:
+        :param uris:
         :return:
         """
-        uris = [o for o in self.graph.objects(self.uri, OWL.imports)]
-
         entities = set()
 
         for uri in uris:
-            ont = Ontology()
-            ont.load(location=uri)
-            entities.add(ont)
+            entity = kind(uri=uri, ontology=self)
+            entities.add(entity)
+            self._index_entity(entity)
 
         return entities
 
@@ -269,86 +1435,63 @@ class Ontology:
         loads all of the classes in the graph into owllib entities
         :return:
         """
+        profiling.count(self.profiler, 'graph_scans', 2)
         uris = set(uri for uri in self.graph.subjects(RDF.type, OWL.Class)) \
                | set(uri for uri in self.graph.subjects(RDF.type, OWL.Restriction))
 
-        entities = set()
-
-        for uri in uris:
-            entities.add(Class(uri=uri, ontology=self))
-
-        return entities
+        return self._make_entities(Class, uris)
 
     def _load_individuals(self):
         """
         loads all of the individuals in the graph into owllib entities
         :return:
         """
+        profiling.count(self.profiler, 'graph_scans')
         uris = [uri for uri in self.graph.subjects(RDF.type, OWL.NamedIndividual)]
 
-        entities = set()
-
-        for uri in uris:
-            entities.add(Individual(uri=uri, ontology=self))
-
-        return entities
+        return self._make_entities(Individual, uris)
 
     def _load_object_properties(self):
         """
         loads all of the object properties in the graph into owllib entities
         :return:
         """
+        profiling.count(self.profiler, 'graph_scans')
         uris = [uri for uri in self.graph.subjects(RDF.type, OWL.ObjectProperty)]
 
-        entities = set()
-
-        for uri in uris:
-            entities.add(ObjectProperty(uri=uri, ontology=self))
-
-        return entities
+        return self._make_entities(ObjectProperty, uris)
 
     def _load_annotation_properties(self):
         """
         loads all of the annotation properties in the graph into owllib entities
         :return:
         """
+        profiling.count(self.profiler, 'graph_scans')
         uris = [uri for uri in self.graph.subjects(RDF.type, OWL.AnnotationProperty)]
 
-        entities = set()
-
-        for uri in uris:
-            entities.add(AnnotationProperty(uri=uri, ontology=self))
-
-        return entities
+        return self._make_entities(AnnotationProperty, uris)
 
     def _load_data_properties(self):
         """
         loads all of the data properties int he graph into owllib entities
         :return:
         """
+        profiling.count(self.profiler, 'graph_scans')
         uris = [uri for uri in self.graph.subjects(RDF.type, OWL.DatatypeProperty)]
 
-        entities = set()
-
-        for uri in uris:
-            entities.add(DataProperty(uri=uri, ontology=self))
-
-        return entities
+        return self._make_entities(DataProperty, uris)
 
     def exists(self, uri):
         """
-        checks to see if the uri exists in the graph
+        checks to see if the uri exists in the graph.  an entity added with add_entity but not synced to the graph yet
+        doesn't, though convert finds it in the uri index
         :param uri:
         :return:
         """
+        #each pattern is answered by one of the store's indexes rather than a scan of the whole graph
         graph = self.graph
 
-        uris = set(graph.subjects()).union(graph.predicates()).union(graph.objects())
-
-        if uri in uris:
-            return True
-        else:
-            return False
+        return (uri, None, None) in graph or (None, uri, None) in graph or (None, None, uri) in graph
 
     def convert(self, entity):
 
@@ -360,17 +1503,7 @@ class Ontology:
         """
 
         #check if entity is already an owllib type
-        if isinstance(entity, Class):
-            return entity
-        if isinstance(entity, Individual):
-            return entity
-        if isinstance(entity, ObjectProperty):
-            return entity
-        if isinstance(entity, AnnotationProperty):
-            return entity
-        if isinstance(entity, Literal):
-            return entity
-        if isinstance(entity, DataProperty):
+        if isinstance(entity, Entity):
             return entity
         if isinstance(entity, Ontology):
             return entity
@@ -381,29 +1514,14 @@ class Ontology:
 
         #convert URI or BNode to class, individual, or property
         if isinstance(entity, URIRef) or isinstance(entity, BNode):
+            #entities put straight into the public sets are indexed too, so a miss needn't look through them
+            found = self._entity_index.get(entity)
+            if found is not None:
+                return found
+
             if not self.exists(entity):
                 raise ValueError("URI not found in ontology.")
 
-            for cls in self.classes:
-                if entity == cls.uri:
-                    return cls
-
-            for prop in self.object_properties:
-                if entity == prop.uri:
-                    return prop
-
-            for prop in self.annotation_properties:
-                if entity == prop.uri:
-                    return prop
-
-            for prop in self.object_properties:
-                if entity == prop.uri:
-                    return prop
-
-            for indiv in self.individuals:
-                    if entity == indiv.uri:
-                        return indiv
-
         #looks like we couldn't find anything to convert to
         raise TypeError("Type could not be converted properly.  Found " + type(entity).__name__)
 
@@ -417,7 +1535,15 @@ class Ontology:
         #if it's a URIRef or similar, convert it to owllib representation
         entity = self.convert(entity)
 
-        tuples = [(pred, obj) for (pred, obj) in self.graph.predicate_objects(entity.uri)]
+        return set(self._query('annotations', entity.uri, self._annotations_of))
+
+    def _annotations_of(self, uri):
+        """
+        returns the annotations of :param uri from the graph
+        :param uri:
+        :return:
+        """
+        tuples = [(pred, obj) for (pred, obj) in self.graph.predicate_objects(uri)]
 
         annotations = set()
 
@@ -437,9 +1563,7 @@ class Ontology:
         #if it's a URIRef or similar, convert it to owllib representation
         entity = self.convert(entity)
 
-        labels = [obj for obj in self.graph.objects(entity.uri, RDFS.label)]
-
-        return set(labels)
+        return set(self._query('labels', entity.uri, lambda uri: self.graph.objects(uri, RDFS.label)))
 
     def get_comments(self, entity):
         """
@@ -451,9 +1575,7 @@ class Ontology:
         #if it's a URIRef or similar, convert it to owllib representation
         entity = self.convert(entity)
 
-        comments = [obj for obj in self.graph.objects(entity.uri, RDFS.comment)]
-
-        return set(comments)
+        return set(self._query('comments', entity.uri, lambda uri: self.graph.objects(uri, RDFS.comment)))
 
     def get_definitions(self, entity):
         """
@@ -465,9 +1587,7 @@ class Ontology:
         #if it's a URIRef or similar, convert it to owllib representation
         entity = self.convert(entity)
 
-        definitions = [obj for obj in self.graph.objects(entity.uri, URIRef("http://purl.obolibrary.org/obo/IAO_0000115"))]
-
-        return set(definitions)
+        return set(self._query('definitions', entity.uri, lambda uri: self.graph.objects(uri, DEFINITION)))
 
     def get_triples(self, entity):
         """
@@ -477,7 +1597,18 @@ class Ontology:
         """
         entity = self.convert(entity)
 
-        return set(self.graph.triples((entity.uri, None, None))) | set(self.graph.triples((None, entity.uri, None))) | set(self.graph.triples((None, None, entity.uri)))
+        return set(self._query('triples', entity.uri, self._triples_of))
+
+    def _triples_of(self, uri):
+        """
+        returns the triples :param uri is in from the graph
+        :param uri:
+        :return:
+        """
+        graph = self.graph
+
+        return set(graph.triples((uri, None, None))) | set(graph.triples((None, uri, None))) | \
+            set(graph.triples((None, None, uri)))
 
     def get_super_classes(self, cls):
         """
@@ -486,11 +1617,9 @@ class Ontology:
         :return:
         """
         cls = self.convert(cls)
-        parent_uris = set(self.graph.objects(cls.uri, RDFS.subClassOf))
+        parent_uris = self._query('super_classes', cls.uri, lambda uri: self.graph.objects(uri, RDFS.subClassOf))
 
-        parents = [acls for acls in self.classes if acls.uri in parent_uris]
-
-        return set(parents)
+        return self._entities(parent_uris, Class)
 
     def get_sub_classes(self, cls):
         """
@@ -499,11 +1628,9 @@ class Ontology:
         :return:
         """
         cls = self.convert(cls)
-        children_uris = set(self.graph.subjects(RDFS.subClassOf, cls.uri))
-
-        children = [acls for acls in self.classes if acls.uri in children_uris]
+        children_uris = self._query('sub_classes', cls.uri, lambda uri: self.graph.subjects(RDFS.subClassOf, uri))
 
-        return set(children)
+        return self._entities(children_uris, Class)
 
     def get_individual_type(self, indiv):
         """
@@ -513,11 +1640,9 @@ class Ontology:
         """
         indiv = self.convert(indiv)
 
-        type_uris = set(self.graph.objects(indiv.uri, RDF.type))
+        type_uris = self._query('types', indiv.uri, lambda uri: self.graph.objects(uri, RDF.type))
 
-        types = [cls for cls in self.classes if cls.uri in type_uris]
-
-        return set(types)
+        return self._entities(type_uris, Class)
 
     def get_super_properties(self, prop):
         """
@@ -526,11 +1651,10 @@ class Ontology:
         :return:
         """
         prop = self.convert(prop)
-        parent_uris = set(self.graph.objects(prop.uri, RDFS.subPropertyOf))
-
-        parents = [aprop for aprop in self.properties if aprop.uri in parent_uris]
+        parent_uris = self._query('super_properties', prop.uri,
+                                  lambda uri: self.graph.objects(uri, RDFS.subPropertyOf))
 
-        return set(parents)
+        return self._entities(parent_uris, Property)
 
     def get_sub_properties(self, prop):
         """
@@ -539,8 +1663,410 @@ class Ontology:
         :return:
         """
         prop = self.convert(prop)
-        children_uris = set(self.graph.objects(RDFS.subPropertyOf, prop.uri))
+        children_uris = self._query('sub_properties', prop.uri,
+                                    lambda uri: self.graph.subjects(RDFS.subPropertyOf, uri))
+
+        return self._entities(children_uris, Property)
+
+    def _query(self, query, uri, run):
+        """
+        returns the result of :param query for :param uri from the memo, if it holds one for the graph as it is, or else
+        calls :param run with :param uri and remembers what it returns.  results are frozen, as they are shared
+        :param query:
+        :param uri:
+        :param run:
+        :return: a frozenset
+        """
+        memo = self.memo
+        version = getattr(self.graph, 'version', None)
+
+        #a graph that doesn't count its changes can't be memoized
+        if version is None:
+            return frozenset(run(uri))
+
+        result = memo.get(query, uri, version)
+
+        if result is None:
+            result = frozenset(run(uri))
+            memo.put(query, uri, result)
+
+        return result
+
+    def _entities(self, uris, kind):
+        """
+        returns the entities of :param kind among :param uris, looked up in the uri index
+        :param uris:
+        :param kind:
+        :return:
+        """
+        index = self._entity_index
+        entities = set()
+
+        for uri in uris:
+            entity = index.get(uri)
+
+            if isinstance(entity, kind):
+                entities.add(entity)
+
+        return entities
+
+    @property
+    def class_hierarchy(self):
+        """
+        the transitive rdfs:subClassOf index over the classes; see owllib.hierarchy.  built on first use, and again
+        after the hierarchy changes
+        :return:
+        """
+        if self._class_hierarchy is None:
+            self._class_hierarchy = Hierarchy((cls.uri for cls in self.classes),
+                                              self._hierarchy_edges(RDFS.subClassOf, Class, Class))
+
+        return self._class_hierarchy
+
+    @property
+    def property_hierarchy(self):
+        """
+        the transitive rdfs:subPropertyOf index over all properties; see owllib.hierarchy.  built on first use, and
+        again after the hierarchy changes
+        :return:
+        """
+        if self._property_hierarchy is None:
+            self._property_hierarchy = Hierarchy((prop.uri for prop in self.properties),
+                                                 self._hierarchy_edges(RDFS.subPropertyOf, Property, Property))
+
+        return self._property_hierarchy
+
+    def _hierarchy_edges(self, predicate, child_kind, parent_kind):
+        """
+        yields the (child, parent) uri pairs joined by :param predicate where both ends are entities of the given kinds
+        :param predicate:
+        :param child_kind:
+        :param parent_kind:
+        :return:
+        """
+        index = self._entity_index
+
+        for child, parent in self.graph.subject_objects(predicate):
+            if isinstance(index.get(child), child_kind) and isinstance(index.get(parent), parent_kind):
+                yield child, parent
+
+    def _hierarchy_of(self, entity):
+        """
+        returns the hierarchy index :param entity belongs in, along with the kind of entity in it
+        :param entity:
+        :return:
+        """
+        if isinstance(entity, Class):
+            return self.class_hierarchy, Class
+        if isinstance(entity, Property):
+            return self.property_hierarchy, Property
+
+        raise TypeError("Only classes and properties have a hierarchy.  Found " + type(entity).__name__)
+
+    def get_ancestors(self, entity):
+        """
+        returns every super class of a class, or super property of a property, transitively.  for an individual,
+        returns its types and all of their super classes
+        :param entity:
+        :return:
+        """
+        entity = self.convert(entity)
+
+        if isinstance(entity, Individual):
+            hierarchy = self.class_hierarchy
+            uris = set()
+
+            for cls in self.get_individual_type(entity):
+                uris.add(cls.uri)
+                uris |= hierarchy.ancestors(cls.uri)
+
+            return self._entities(uris, Class)
+
+        hierarchy, kind = self._hierarchy_of(entity)
+
+        return self._entities(hierarchy.ancestors(entity.uri), kind)
+
+    def get_descendants(self, entity):
+        """
+        returns every sub class of a class, or sub property of a property, transitively.  individuals have none
+        :param entity:
+        :return:
+        """
+        entity = self.convert(entity)
+
+        if isinstance(entity, Individual):
+            return set()
+
+        hierarchy, kind = self._hierarchy_of(entity)
+
+        return self._entities(hierarchy.descendants(entity.uri), kind)
+
+    @property
+    def instance_index(self):
+        """
+        the index of the individuals, and anything else, asserted to be of each class; see owllib.instances.  built on
+        first use, and kept up to date as entities are synced to the graph
+        :return:
+        """
+        if self._instance_index is None:
+            self._instance_index = InstanceIndex(self.graph)
+
+        return self._instance_index
+
+    def get_instances(self, cls, direct=False):
+        """
+        returns the individuals of :param cls, read off the instance index, in time proportional to the answer rather
+        than to the number of individuals
+        :param cls:
+        :param direct: if true, only the individuals asserted to be of :param cls itself; if false, also those of its
+        sub classes, transitively
+        :return:
+        """
+        index = self.instance_index
+
+        #every individual is an owl:Thing, whether or not the ontology declares it, or its classes sub classes of it
+        if getattr(cls, 'uri', cls) == OWL.Thing:
+            if direct:
+                return self._entities(index.instances(OWL.Thing), Individual)
+
+            return set(self.individuals)
+
+        cls = self.convert(cls)
+
+        if not isinstance(cls, Class):
+            raise TypeError("Only classes have instances.  Found " + type(cls).__name__)
+
+        uris = set(index.instances(cls.uri))
+
+        if not direct:
+            for sub_class in self.class_hierarchy.descendants(cls.uri):
+                uris |= index.instances(sub_class)
+
+        return self._entities(uris, Individual)
+
+    def is_subclass_of(self, cls, other):
+        """
+        returns true if :param cls is :param other or one of its sub classes, transitively
+        :param cls:
+        :param other:
+        :return:
+        """
+        cls = self.convert(cls)
+        other = self.convert(other)
+
+        return self.class_hierarchy.is_below(cls.uri, other.uri)
+
+    def is_subproperty_of(self, prop, other):
+        """
+        returns true if :param prop is :param other or one of its sub properties, transitively
+        :param prop:
+        :param other:
+        :return:
+        """
+        prop = self.convert(prop)
+        other = self.convert(other)
+
+        return self.property_hierarchy.is_below(prop.uri, other.uri)
+
+    def materialize(self, rules=OWL_RL_RULES):
+        """
+        adds what :param rules entail to the graph, and keeps it up to date as entities are synced; see owllib.reasoner.
+        materializing again starts afresh, e.g. after changing the graph directly
+        :param rules: the owllib.reasoner.Rules to apply, by default RDFS and the OWL 2 RL rules of OWL_RL_RULES; RDFS
+        alone is RDFS_RULES
+        :return: the owllib.reasoner.Reasoner
+        """
+        self._check_writable()
+        self.dematerialize()
+
+        reasoner = Reasoner(rules)
+
+        with profiling.phase(self.profiler, 'materialize'):
+            inferred = reasoner.materialize(self.graph)
+            self._changed(self._apply_delta(set(), inferred))
+
+        profiling.count(self.profiler, 'triples_inferred', len(inferred))
+
+        self.reasoner = reasoner
+
+        return reasoner
+
+    def dematerialize(self):
+        """
+        removes the inferred triples from the graph, leaving what was asserted, and stops keeping them up to date
+        :return:
+        """
+        self.sync_to_graph()
+
+        if self.reasoner is None:
+            return
+
+        inferred = self.reasoner.inferred
+        self.reasoner = None
+
+        self._changed(self._apply_delta(inferred, set()))
+
+    @contextmanager
+    def profiling(self, hook=None):
+        """
+        profiles the loads run inside the with block, including those of imports; see owllib.profiling.
+
+            with ontology.profiling() as profiler:
+                ontology.load(location='...')
+
+            print(profiler.format())
+
+        :param hook: see owllib.profiling.LoadProfiler
+        :return: the owllib.profiling.LoadProfiler, whose report covers the with block once it ends
+        """
+        profiler = profiling.LoadProfiler(hook)
+        previous = self.profiler
+        self.profiler = profiler
+
+        try:
+            yield profiler
+        finally:
+            self.profiler = previous
+
+            #the imports loaded inside the block were handed the profiler; shared ones already dropped it on register
+            for ont in self.direct_imports | self.indirect_imports:
+                if ont.profiler is profiler:
+                    ont.profiler = None
+
+            profiler.stop()
+
+    def closure_view(self):
+        """
+        returns a read-only view of this ontology and its direct and indirect imports, with the same get_* queries
+        answered over all of them at once, without copying their graphs.  see owllib.closure.  the view is kept, and
+        refreshed for the graphs that change, until the imports change
+        :return: an owllib.closure.ClosureView
+        """
+        view = self._closure_view
+
+        if view is None or view.imports != (self.direct_imports | self.indirect_imports) - {self}:
+            view = self._closure_view = ClosureView(self)
+        elif not view.current():
+            view.refresh()
+
+        return view
+
+    def _mentions(self):
+        """
+        returns the uris and blank nodes the graph mentions, in any position.  they are counted once, and the counts
+        kept up to date by _apply_delta; the graph is only scanned again if it was changed some other way
+        :return: a dict of each uri to the number of times it is mentioned, not to be changed
+        """
+        version = getattr(self.graph, 'version', None)
+        mentioned = self._mentioned
+
+        if mentioned is None or version is None or mentioned[0] != version:
+            counts = {}
+
+            for triple in self.graph:
+                for term in triple:
+                    if not isinstance(term, rdflib.Literal):
+                        counts[term] = counts.get(term, 0) + 1
+
+            mentioned = self._mentioned = (version, counts)
+            self._mention_log = []
+
+        return mentioned[1]
+
+    def _mention_changes(self, since):
+        """
+        returns the uris the graph has started and stopped mentioning since its version :param since, from the changes
+        _apply_delta has logged
+        :param since:
+        :return: a pair of sets, of the uris mentioned now but not then, and then but not now; or None if the graph
+        was changed other than by _apply_delta since, or too many times to remember, and has to be scanned again
+        """
+        version = getattr(self.graph, 'version', None)
+        mentioned = self._mentioned
+
+        if version is None or mentioned is None or mentioned[0] != version:
+            return None
+
+        appeared = set()
+        gone = set()
+        current = since
+
+        for before, after, new, old in self._mention_log:
+            if before != current:
+                continue
+
+            for uri in old:
+                if uri in appeared:
+                    appeared.discard(uri)
+                else:
+                    gone.add(uri)
+
+            for uri in new:
+                if uri in gone:
+                    gone.discard(uri)
+                else:
+                    appeared.add(uri)
+
+            current = after
+
+        if current != version:
+            return None
+
+        return appeared, gone
+
+    @property
+    def label_index(self):
+        """
+        the index of the labels, synonyms and definitions of everything in the graph; see owllib.search.  built on
+        first use, and kept up to date as entities are synced to the graph
+        :return:
+        """
+        if self._label_index is None:
+            self._label_index = LabelIndex(self.graph)
+
+        return self._label_index
+
+    def search(self, text, match='exact', distance=1, limit=None):
+        """
+        returns the entities with a label, synonym (oboInOwl or SKOS) or definition matching :param text.  every match
+        looks at all three, so a 'prefix' or 'similar' match may be on a synonym or definition rather than a label
+        :param text:
+        :param match: 'exact'; 'case_insensitive', which also ignores differences in whitespace; 'prefix', for the
+        entities with a label, synonym or definition starting with :param text, ignoring case, in order of the text
+        matched; or 'similar', for those with one within :param distance edits of :param text, ignoring case, closest
+        first
+        :param distance: the most insertions, deletions and substitutions a 'similar' match may take
+        :param limit: the most entities to return from a 'prefix' or 'similar' match
+        :return: a list of entities
+        """
+        index = self._entity_index
+
+        if match == 'exact':
+            uris = sorted(self.label_index.exact(text))
+        elif match == 'case_insensitive':
+            uris = sorted(self.label_index.case_insensitive(text))
+        elif match == 'prefix':
+            uris = self.label_index.prefix(text, limit, accept=index.__contains__)
+        elif match == 'similar':
+            uris = self.label_index.similar(text, distance, limit, accept=index.__contains__)
+        else:
+            raise ValueError("Unknown match, expected 'exact', 'case_insensitive', 'prefix' or 'similar'.  Found "
+                             + str(match))
+
+        return [index[uri] for uri in uris if uri in index]
+
+    def diff(self, other):
+        """
+        returns what changed from this ontology to :param other, a later version of it, once the modified entities of
+        both are synced to their graphs.  blank nodes, such as restrictions, are matched by what they say rather than
+        by id; see owllib.diff
+        :param other: an Ontology
+        :return: an owllib.diff.ChangeSet of the axioms added and removed, and the entities added, removed and modified
+        """
+        if not isinstance(other, Ontology):
+            raise TypeError("Can only diff against an Ontology.  Found " + type(other).__name__)
 
-        children = [aprop for aprop in self.properties if aprop.uri in children_uris]
+        self.sync_to_graph()
+        other.sync_to_graph()
 
-        return set(children)
\ No newline at end of file
+        return diff.diff_graphs(self.graph, other.graph, self._entity_index, other._entity_index)
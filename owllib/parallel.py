@@ -0,0 +1,229 @@
+"""
+parses several ontology documents at once, each in a process of its own, following their imports.
+
+parsing is CPU bound, so threads don't help; worker processes do, but a parsed rdflib graph is slow to send between
+processes, and big.  each worker instead sends back its document's triples as a compact batch, encoded as in a snapshot
+(see owllib.snapshot): every distinct term once, as json, and the triples as an array of term ids.  documents in a
+format that can be streamed (see owllib.streaming) are parsed without building a graph in the worker at all.
+
+batches are decoded in the calling process as they arrive, while the workers go on parsing the rest, so all that is
+left to it is building the graphs from them.  blank nodes are given new ids as they are decoded, as two workers may have
+labelled different blank nodes alike.
+
+the documents asked for are parsed first; then whatever they import that none of them is, by location, ontology IRI or
+version IRI; then whatever those import, and so on.
+"""
+
+import array
+import os
+import urllib.request as url
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import rdflib
+from rdflib import RDF, OWL, BNode, URIRef
+
+from owllib import formats, snapshot, streaming
+from owllib.cache import is_remote
+
+
+def load_documents(locations, workers=None, cache=None):
+    """
+    yields the documents at :param locations, and their imports, as they are parsed; see parse_document for what a
+    document is
+    :param locations: file paths or urls
+    :param workers: the most documents to parse at once; the number of cpus by default.  1 parses them one after another
+    in this process
+    :param cache: an owllib.cache.OntologyCache to fetch remote documents through
+    :return:
+    """
+    workers = workers or os.cpu_count() or 1
+
+    requested = set()
+    batch = []
+
+    for location in locations:
+        location = str(location)
+
+        if location not in requested:
+            requested.add(location)
+            batch.append(location)
+
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+
+    try:
+        while batch:
+            known = set()
+            imported = set()
+
+            for document in _parse_all(pool, batch, cache):
+                yield document
+
+                known.add(document['location'])
+                known.update(str(term) for term in (document['uri'], document['version']) if term is not None)
+                imported.update(str(uri) for uri in document['imports'])
+
+            requested |= known
+            batch = sorted(imported - requested)
+            requested.update(batch)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _parse_all(pool, locations, cache):
+    """
+    yields the documents at :param locations as they are parsed on :param pool, or in turn if there is no pool
+    :param pool:
+    :param locations:
+    :param cache:
+    :return:
+    """
+    if pool is None:
+        for location in locations:
+            yield decode(parse_document(location, cache))
+        return
+
+    futures = [pool.submit(parse_document, location, cache) for location in locations]
+
+    for future in as_completed(futures):
+        yield decode(future.result())
+
+
+def parse_document(location, cache=None):
+    """
+    parses the document at :param location into a batch to send back from a worker: a dict of its location, its terms
+    as json, its triples as the bytes of an array of term ids, and the ids of its ontology IRI, version IRI and the
+    IRIs it imports
+    :param location:
+    :param cache: see load_documents
+    :return:
+    """
+    triples = _triples(location, cache)
+    terms, ids, encoded = snapshot.encode_terms(triples)
+    uri, version, imports = _header(triples)
+
+    return {'location': location,
+            'terms': snapshot.dump_terms(terms),
+            'triples': encoded.tobytes(),
+            'uri': ids.get(uri),
+            'version': ids.get(version),
+            'imports': [ids[term] for term in imports]}
+
+
+def decode(batch):
+    """
+    decodes a :param batch from parse_document into a document: a dict of its location, its terms, its triples as an
+    array of term ids, its ontology IRI and version IRI, which may be None, and a list of the IRIs it imports
+    :param batch:
+    :return:
+    """
+    terms = snapshot.load_terms(batch['terms'])
+
+    #the worker's blank node ids may clash with another's
+    for i, term in enumerate(terms):
+        if isinstance(term, BNode):
+            terms[i] = BNode()
+
+    triples = array.array('I')
+    triples.frombytes(batch['triples'])
+
+    def term(term_id):
+        return None if term_id is None else terms[term_id]
+
+    return {'location': batch['location'],
+            'terms': terms,
+            'triples': triples,
+            'uri': term(batch['uri']),
+            'version': term(batch['version']),
+            'imports': [terms[term_id] for term_id in batch['imports']]}
+
+
+def iter_triples(document):
+    """
+    yields the triples of a decoded :param document
+    :param document:
+    :return:
+    """
+    terms = document['terms']
+    triples = document['triples']
+
+    for i in range(0, len(triples), 3):
+        yield terms[triples[i]], terms[triples[i + 1]], terms[triples[i + 2]]
+
+
+def _triples(location, cache):
+    """
+    returns the triples of the document at :param location, streamed if it is a local file in a format that can be,
+    or else parsed as Ontology.load would
+    :param location:
+    :param cache:
+    :return: a list of triples
+    """
+    if not is_remote(location):
+        head = _head(location)
+        format = rdflib.util.guess_format(location) or (head and formats.sniff_format(head))
+
+        if format in streaming.STREAMABLE:
+            return list(streaming.iter_triples(location, format))
+
+    #the ontology module imports this one
+    from owllib.ontology import Ontology
+
+    ontology = Ontology()
+    ontology.cache = cache
+    ontology.graph = ontology._new_graph()
+    ontology._parse(location=location)
+
+    return list(ontology.graph)
+
+
+def _head(location):
+    """
+    returns the first few KB of the local document at :param location
+    :param location:
+    :return:
+    """
+    if location.startswith('file://'):
+        location = url.url2pathname(location[len('file://'):])
+
+    try:
+        with open(location, 'rb') as f:
+            return f.read(formats.SNIFF_SIZE)
+    except (IOError, OSError):
+        return None
+
+
+def _header(triples):
+    """
+    returns the ontology IRI of :param triples, its version IRI and the IRIs it imports.  if more than one ontology is
+    declared, the one with the most triples is chosen, as in Ontology._load_uri
+    :param triples:
+    :return: a (uri, version, imports) tuple; the uri and version are None if not declared
+    """
+    declared = [s for s, p, o in triples if p == RDF.type and o == OWL.Ontology]
+
+    if not declared:
+        return None, None, []
+
+    uri = declared[0]
+
+    if len(declared) > 1:
+        counts = dict((s, 0) for s in declared)
+
+        for s, _, _ in triples:
+            if s in counts:
+                counts[s] += 1
+
+        uri = max(declared, key=lambda s: counts[s])
+
+    version = None
+    imports = []
+
+    for s, p, o in triples:
+        if s == uri:
+            if p == OWL.versionIRI:
+                version = o
+            elif p == OWL.imports and isinstance(o, URIRef):
+                imports.append(o)
+
+    return uri, version, imports
@@ -0,0 +1,182 @@
+"""
+times and counts what loading an ontology spends its time on: fetching, parsing, loading imports, scanning the graph
+for entities and filling them in.
+
+    with ontology.profiling() as profiler:
+        ontology.load(location='...')
+
+    print(profiler.format())
+    report = profiler.report()
+
+phases nest, and are reported by their path, e.g. 'load/parse/fetch'.  imports are loaded on threads of their own, under
+an 'import' phase, so their phases overlap each other in time, and can add up to more than the load took.  a hook, if
+given, is called with a dict for each phase as it ends, and with the report when profiling stops.
+
+an ontology without a profiler, as they are by default, only checks that it has none at each phase, so profiling costs
+nothing worth measuring when it is off.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _Nothing:
+    """
+    a context manager that does nothing, standing in for a phase when there is no profiler
+    """
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOTHING = _Nothing()
+
+
+def phase(profiler, name):
+    """
+    returns a context manager timing the phase :param name on :param profiler, or doing nothing if it is None
+    :param profiler:
+    :param name:
+    :return:
+    """
+    if profiler is None:
+        return _NOTHING
+
+    return profiler.phase(name)
+
+
+def count(profiler, name, n=1):
+    """
+    adds :param n to the counter :param name on :param profiler, unless it is None
+    :param profiler:
+    :param name:
+    :param n:
+    :return:
+    """
+    if profiler is not None:
+        profiler.count(name, n)
+
+
+class LoadProfiler:
+    """
+    Collects the time spent in each phase of loading an ontology, and counts of what was done
+    """
+
+    def __init__(self, hook=None):
+        """
+        :param hook: if given, called with {'event': 'phase', 'phase': path, 'seconds': seconds} as each phase ends, and
+        with {'event': 'report', 'report': report} when profiling stops
+        :return:
+        """
+        self.hook = hook
+
+        #phase path to [seconds, calls], in the order the phases first started
+        self.phases = {}
+        self.counters = {}
+
+        self.started = time.perf_counter()
+        self.stopped = None
+
+        self._lock = threading.Lock()
+
+        #the phases open on each thread
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        times the phase :param name, nested in whatever phase is open on this thread
+        :param name:
+        :return:
+        """
+        stack = getattr(self._local, 'stack', None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        stack.append(name)
+        path = '/'.join(stack)
+
+        #so phases are reported in the order they first started, each under the one it is part of
+        with self._lock:
+            totals = self.phases.setdefault(path, [0.0, 0])
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+
+            with self._lock:
+                totals[0] += seconds
+                totals[1] += 1
+
+            if self.hook is not None:
+                self.hook({'event': 'phase', 'phase': path, 'seconds': seconds})
+
+    def count(self, name, n=1):
+        """
+        adds :param n to the counter :param name
+        :param name:
+        :param n:
+        :return:
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self):
+        """
+        stops the clock, and passes the report to the hook
+        :return:
+        """
+        self.stopped = time.perf_counter()
+
+        if self.hook is not None:
+            self.hook({'event': 'report', 'report': self.report()})
+
+    def report(self):
+        """
+        returns the report so far: the seconds profiled, the seconds and calls of each phase by path, and the counters
+        :return: a dict
+        """
+        with self._lock:
+            started = dict((path, i) for i, path in enumerate(self.phases))
+
+            #each phase under the one it is part of, rather than after phases on other threads that started between
+            def order(path):
+                names = path.split('/')
+                return [started.get('/'.join(names[:i + 1]), -1) for i in range(len(names))]
+
+            phases = dict((path, {'seconds': self.phases[path][0], 'calls': self.phases[path][1]})
+                          for path in sorted(self.phases, key=order))
+            counters = dict(self.counters)
+
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+
+        return {'seconds': end - self.started, 'phases': phases, 'counters': counters}
+
+    def format(self):
+        """
+        returns the report as a table, with the phases indented under the ones they are part of
+        :return:
+        """
+        report = self.report()
+
+        lines = ['%-40s %10s %8s' % ('phase', 'seconds', 'calls')]
+
+        for path, totals in report['phases'].items():
+            names = path.split('/')
+            lines.append('%-40s %10.3f %8d' % ('  ' * (len(names) - 1) + names[-1], totals['seconds'], totals['calls']))
+
+        lines.append('%-40s %10.3f' % ('total', report['seconds']))
+
+        for name in sorted(report['counters']):
+            lines.append('%-40s %10d' % (name, report['counters'][name]))
+
+        return '\n'.join(lines)
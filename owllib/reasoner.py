@@ -0,0 +1,540 @@
+"""
+materializes what RDFS and a practical subset of OWL 2 RL entail from an ontology's graph, and keeps the inferences up
+to date as triples are added and removed.
+
+    reasoner = ontology.materialize()
+
+rules are triple patterns, e.g. cax-sco: (?x rdf:type ?c), (?c rdfs:subClassOf ?d) -> (?x rdf:type ?d).  the reasoner
+keeps its own index of every triple, asserted and inferred, by predicate then subject and by predicate then object, so a
+rule's body is joined one pattern at a time, most bound first, each a dict lookup.  the order of the joins is worked out
+once per rule and pattern a triple can match, not per triple.
+
+evaluation is semi-naive: each new triple is joined with the triples known so far, rather than every rule being run
+again over everything.  a rule firing is found when the last of the triples it needs arrives, so nothing is derived
+twice over from the same triples.
+
+removals use delete and rederive: everything derived from the removed triples, directly or not, is removed too, then
+whatever of that can still be derived in one step from what is left is put back, and what follows from it derived again.
+
+inferred triples are written to the graph, so everything that reads the graph sees them, including save; call
+Ontology.dematerialize to take them out again.  the reasoner follows the changes synced from entities, not those made
+to the graph directly, after which the ontology is to be materialized again.  a triple asserted when the graph already
+holds it as an inference isn't written, and so stays an inference, to be retracted with its premises.
+"""
+
+from rdflib import RDF, RDFS, OWL, BNode, Literal, URIRef
+
+
+class Rule:
+    """
+    A rule: when every triple pattern of its body matches, with each variable bound the same throughout, the triple
+    pattern of its head holds.  variables are plain strings starting with '?'; anything else is a term to match
+    """
+
+    def __init__(self, name, body, head):
+        self.name = name
+        self.body = body
+        self.head = head
+
+    def __repr__(self):
+        return '<Rule %s>' % self.name
+
+
+#the rules of RDFS that derive new triples about the terms of an ontology, rather than about RDFS itself
+RDFS_RULES = (
+    Rule('cax-sco', (('?x', RDF.type, '?c'), ('?c', RDFS.subClassOf, '?d')), ('?x', RDF.type, '?d')),
+    Rule('scm-sco', (('?a', RDFS.subClassOf, '?b'), ('?b', RDFS.subClassOf, '?c')), ('?a', RDFS.subClassOf, '?c')),
+    Rule('scm-spo', (('?a', RDFS.subPropertyOf, '?b'), ('?b', RDFS.subPropertyOf, '?c')),
+         ('?a', RDFS.subPropertyOf, '?c')),
+    Rule('prp-spo1', (('?x', '?p', '?y'), ('?p', RDFS.subPropertyOf, '?q')), ('?x', '?q', '?y')),
+    Rule('prp-dom', (('?p', RDFS.domain, '?c'), ('?x', '?p', '?y')), ('?x', RDF.type, '?c')),
+    Rule('prp-rng', (('?p', RDFS.range, '?c'), ('?x', '?p', '?y')), ('?y', RDF.type, '?c')),
+)
+
+#those, and the rules of OWL 2 RL for inverse, symmetric and transitive properties, and equivalent classes and
+#properties
+OWL_RL_RULES = RDFS_RULES + (
+    Rule('prp-inv1', (('?p', OWL.inverseOf, '?q'), ('?x', '?p', '?y')), ('?y', '?q', '?x')),
+    Rule('prp-inv2', (('?p', OWL.inverseOf, '?q'), ('?x', '?q', '?y')), ('?y', '?p', '?x')),
+    Rule('prp-symp', (('?p', RDF.type, OWL.SymmetricProperty), ('?x', '?p', '?y')), ('?y', '?p', '?x')),
+    Rule('prp-trp', (('?p', RDF.type, OWL.TransitiveProperty), ('?x', '?p', '?y'), ('?y', '?p', '?z')),
+         ('?x', '?p', '?z')),
+    Rule('scm-eqc1a', (('?c', OWL.equivalentClass, '?d'),), ('?c', RDFS.subClassOf, '?d')),
+    Rule('scm-eqc1b', (('?c', OWL.equivalentClass, '?d'),), ('?d', RDFS.subClassOf, '?c')),
+    Rule('scm-eqc2', (('?c', RDFS.subClassOf, '?d'), ('?d', RDFS.subClassOf, '?c')), ('?c', OWL.equivalentClass, '?d')),
+    Rule('scm-eqp1a', (('?p', OWL.equivalentProperty, '?q'),), ('?p', RDFS.subPropertyOf, '?q')),
+    Rule('scm-eqp1b', (('?p', OWL.equivalentProperty, '?q'),), ('?q', RDFS.subPropertyOf, '?p')),
+    Rule('scm-eqp2', (('?p', RDFS.subPropertyOf, '?q'), ('?q', RDFS.subPropertyOf, '?p')),
+         ('?p', OWL.equivalentProperty, '?q')),
+)
+
+
+#terms of these exact types are known to be, or not to be, literals and uris without an isinstance check, which rdflib's
+#abstract term classes make slow enough to dominate materializing a big graph
+_KNOWN = frozenset([URIRef, BNode, Literal])
+
+
+def _is_variable(term):
+    return type(term) is str
+
+
+class _Plan:
+    """
+    How to join the rest of a rule once one of its triple patterns, of the body or the head, matches a triple; worked
+    out once per rule and pattern, joining the patterns with the most terms bound first.  a match is a list with a slot
+    for each variable and constant of the rule, the constants filled in from the start
+    """
+
+    def __init__(self, rule, first, rest, checked=False):
+        """
+        :param rule:
+        :param first: the triple pattern matched first
+        :param rest: the triple patterns joined after it
+        :param checked: true if the triples :param first is matched to have its predicate already
+        :return:
+        """
+        self.rule = rule
+
+        slots = {}
+        self.template = []
+
+        for pattern in (rule.head,) + tuple(rule.body):
+            for term in pattern:
+                if term not in slots:
+                    slots[term] = len(self.template)
+                    self.template.append(None if _is_variable(term) else term)
+
+        bound = set(term for term in slots if not _is_variable(term))
+
+        self.first = _assigns(first, slots, bound, (False, checked, False))
+
+        #each step is the slots of the subject, predicate and object to look up, None for those to match anything, and
+        #the assigns filling in the rest
+        self.steps = []
+        rest = list(rest)
+
+        while rest:
+            pattern = max(rest, key=lambda pattern: _boundness(pattern, bound))
+            rest.remove(pattern)
+
+            keys = tuple(slots[term] if term in bound else None for term in pattern)
+            self.steps.append(keys + (_assigns(pattern, slots, bound, [key is not None for key in keys]),))
+
+        self.head = tuple(slots[term] for term in rule.head)
+
+        #a head needs checking only if a variable bound to an object, which may be a literal, ends up its subject, or
+        #its predicate
+        subjects = set(pattern[0] for pattern in rule.body)
+        predicates = set(pattern[1] for pattern in rule.body)
+        s, p, _ = rule.head
+
+        self.check_head = (_is_variable(s) and s not in subjects) or (_is_variable(p) and p not in predicates)
+
+        #a (predicate, side, position) check that the first step can match anything, before a match is started: that
+        #the term at position in the triple matched first is a subject (side 0) or object (side 1) of the predicate
+        self.guard = None
+
+        if self.steps:
+            keys = self.steps[0][:3]
+            positions = dict((slots[term], position) for position, term in enumerate(first) if _is_variable(term))
+
+            if keys[1] is not None and keys[1] not in positions:
+                for side, key in enumerate((keys[0], keys[2])):
+                    if key in positions:
+                        self.guard = (self.template[keys[1]], side, positions[key])
+                        break
+
+
+def _assigns(pattern, slots, bound, looked_up):
+    """
+    returns the (position, slot, check) triples filling in the slots of the terms of :param pattern from a triple it
+    matches, or checking them if :param bound already, skipping the positions the triple was :param looked_up by.  the
+    variables are then bound
+    :param pattern:
+    :param slots:
+    :param bound:
+    :param looked_up:
+    :return:
+    """
+    assigns = []
+
+    for position, term in enumerate(pattern):
+        if looked_up[position]:
+            continue
+
+        assigns.append((position, slots[term], term in bound))
+        bound.add(term)
+
+    return tuple(assigns)
+
+
+def _boundness(pattern, bound):
+    """
+    returns how well :param pattern can be looked up with the terms :param bound: a bound predicate counts most, as the
+    index is by predicate first
+    :param pattern:
+    :param bound:
+    :return:
+    """
+    s, p, o = (term in bound for term in pattern)
+
+    return 4 * p + s + o
+
+
+def _writable(triple):
+    """
+    returns true if :param triple can be written to a graph: its subject isn't a literal, and its predicate is a uri
+    :param triple:
+    :return:
+    """
+    s, p, _ = triple
+    s_kind = type(s)
+    p_kind = type(p)
+
+    if s_kind is Literal or (s_kind not in _KNOWN and isinstance(s, Literal)):
+        return False
+
+    return p_kind is URIRef or (p_kind not in _KNOWN and isinstance(p, URIRef))
+
+
+class Reasoner:
+    """
+    Materializes the consequences of a set of rules over a graph, incrementally
+    """
+
+    def __init__(self, rules=OWL_RL_RULES):
+        """
+        :param rules: the Rules to apply
+        :return:
+        """
+        self.rules = tuple(rules)
+
+        #predicate to ({subject: objects}, {object: subjects}), for every triple known, asserted or inferred
+        self._index = {}
+
+        #the triples known by inference alone
+        self.inferred = set()
+
+        #predicate to the plans for the body patterns a triple with it matches; None for patterns of any predicate
+        self._triggers = {}
+
+        for rule in self.rules:
+            body = tuple(rule.body)
+
+            for position, pattern in enumerate(body):
+                predicate = None if _is_variable(pattern[1]) else pattern[1]
+                plan = _Plan(rule, pattern, body[:position] + body[position + 1:], checked=predicate is not None)
+                self._triggers.setdefault(predicate, []).append(plan)
+
+        #the plans joining each rule's body once its head matches, to check a triple is derivable
+        self._derivations = [_Plan(rule, rule.head, tuple(rule.body)) for rule in self.rules]
+
+        #the constants of the rules, which the equal terms of the triples given are swapped for: equal terms that are
+        #not the same object are compared by rdflib in python, every time one is looked up in the index
+        self._constants = {}
+
+        for plan in self._derivations:
+            for term in plan.template:
+                if term is not None:
+                    self._constants.setdefault(term, term)
+
+    def __contains__(self, triple):
+        s, p, o = triple
+        entry = self._index.get(p)
+
+        return entry is not None and o in entry[0].get(s, ())
+
+    def materialize(self, triples):
+        """
+        takes :param triples as asserted, and derives everything they entail
+        :param triples:
+        :return: the set of triples inferred
+        """
+        asserted = [triple for triple in self._canonical(triples) if self._insert(triple)]
+
+        inferred = set()
+        self._derive(asserted, inferred)
+
+        return inferred
+
+    def update(self, removed=(), added=()):
+        """
+        takes :param removed as no longer asserted, and :param added as asserted, and works out the inferences to
+        retract and those to make.  :param removed should already be gone from the graph, and :param added in it
+        :param removed:
+        :param added:
+        :return: a (retracted, inferred) tuple of sets of triples, to remove from the graph and to add to it
+        """
+        #everything derived from the removed triples goes, then whatever can still be derived comes back
+        removed = set(triple for triple in self._canonical(removed) if triple in self)
+        added = self._canonical(added)
+        overdeleted = self._overdelete(removed)
+
+        #the inferences still in the graph; the removed triples are gone from it, even those that were inferred
+        was_inferred = set(triple for triple in overdeleted - removed if triple in self.inferred)
+
+        for triple in overdeleted:
+            self._delete(triple)
+            self.inferred.discard(triple)
+
+        inferred = set()
+        rederived = [triple for triple in overdeleted if self._derivable(triple)]
+
+        for triple in rederived:
+            self._insert(triple)
+            self.inferred.add(triple)
+            inferred.add(triple)
+
+        seeds = list(rederived)
+
+        for triple in added:
+            if self._insert(triple):
+                seeds.append(triple)
+            else:
+                #asserted now, so it stays whatever happens to what it was inferred from
+                self.inferred.discard(triple)
+
+                #an asserted triple removed above and put back as an inference in the same update is asserted after all
+                inferred.discard(triple)
+
+        self._derive(seeds, inferred)
+
+        #inferences that were in the graph all along needn't be written again; asserted ones removed, and rederived,
+        #need to be, as the graph has lost them
+        retracted = was_inferred - inferred
+        inferred -= was_inferred
+
+        return retracted, inferred
+
+    def _canonical(self, triples):
+        """
+        returns :param triples with their terms equal to a constant of the rules swapped for it
+        :param triples:
+        :return: a list
+        """
+        constants = self._constants
+        get = constants.get
+
+        return [(get(s, s), get(p, p), get(o, o)) for s, p, o in triples]
+
+    def _derive(self, seeds, inferred):
+        """
+        derives everything that follows from the newly known :param seeds, semi-naively, adding the triples inferred to
+        :param inferred
+        :param seeds:
+        :param inferred:
+        :return:
+        """
+        pending = list(seeds)
+
+        while pending:
+            triple = pending.pop()
+
+            for head in self._consequences(triple):
+                if self._insert(head):
+                    self.inferred.add(head)
+                    inferred.add(head)
+                    pending.append(head)
+
+    def _overdelete(self, removed):
+        """
+        returns :param removed and everything inferred that was derived from them, directly or not, from the triples
+        known before any are deleted
+        :param removed:
+        :return: a set
+        """
+        overdeleted = set(removed)
+        pending = list(removed)
+
+        while pending:
+            triple = pending.pop()
+
+            for head in self._consequences(triple):
+                if head in self.inferred and head not in overdeleted and head in self:
+                    overdeleted.add(head)
+                    pending.append(head)
+
+        return overdeleted
+
+    def _consequences(self, triple):
+        """
+        returns the heads of the rules that fire with :param triple matching one of their body patterns, and the rest
+        of the body matched by the triples known
+        :param triple:
+        :return: a list of triples
+        """
+        heads = []
+        triggers = self._triggers
+        plans = triggers.get(triple[1], ())
+
+        if None in triggers:
+            plans = list(plans) + triggers[None]
+
+        index = self._index
+
+        for plan in plans:
+            #most triples can't fire most rules, which the guard tells before a match is started
+            guard = plan.guard
+
+            if guard is not None:
+                entry = index.get(guard[0])
+
+                if entry is None or triple[guard[2]] not in entry[guard[1]]:
+                    continue
+
+            self._run(plan, triple, heads)
+
+        return heads
+
+    def _derivable(self, triple):
+        """
+        returns true if :param triple follows in one step from the triples known
+        :param triple:
+        :return:
+        """
+        heads = []
+
+        for plan in self._derivations:
+            self._run(plan, triple, heads)
+
+            if heads:
+                return True
+
+        return False
+
+    def _run(self, plan, triple, heads):
+        """
+        matches the first pattern of :param plan to :param triple, joins the rest, and adds the heads that can be
+        written to :param heads
+        :param plan:
+        :param triple:
+        :param heads:
+        :return:
+        """
+        match = list(plan.template)
+
+        for position, slot, check in plan.first:
+            if not check:
+                match[slot] = triple[position]
+            elif match[slot] != triple[position]:
+                return
+
+        self._join(plan, 0, match, heads)
+
+    def _join(self, plan, step, match, heads):
+        """
+        joins the patterns of :param plan from :param step on with the triples known, given the slots filled in so far
+        in :param match, adding the heads that can be written to :param heads
+        :param plan:
+        :param step:
+        :param match:
+        :param heads:
+        :return:
+        """
+        steps = plan.steps
+
+        if step == len(steps):
+            s_slot, p_slot, o_slot = plan.head
+            head = (match[s_slot], match[p_slot], match[o_slot])
+
+            if not plan.check_head or _writable(head):
+                heads.append(head)
+
+            return
+
+        s_key, p_key, o_key, assigns = steps[step]
+
+        s = None if s_key is None else match[s_key]
+        o = None if o_key is None else match[o_key]
+
+        if p_key is not None:
+            p = match[p_key]
+            entry = self._index.get(p)
+
+            if entry is None:
+                return
+
+            entries = ((p, entry),)
+        else:
+            entries = list(self._index.items())
+
+        for predicate, (by_subject, by_object) in entries:
+            if s is not None:
+                objects = by_subject.get(s, ())
+
+                if o is not None:
+                    found = [(s, o)] if o in objects else []
+                else:
+                    found = [(s, obj) for obj in objects]
+            elif o is not None:
+                found = [(subject, o) for subject in by_object.get(o, ())]
+            else:
+                found = [(subject, obj) for subject, objects in by_subject.items() for obj in objects]
+
+            for subject, obj in found:
+                triple = (subject, predicate, obj)
+
+                for position, slot, check in assigns:
+                    if not check:
+                        match[slot] = triple[position]
+                    elif match[slot] != triple[position]:
+                        break
+                else:
+                    self._join(plan, step + 1, match, heads)
+
+    def _insert(self, triple):
+        """
+        adds :param triple to the index
+        :param triple:
+        :return: true if it wasn't there already
+        """
+        s, p, o = triple
+        entry = self._index.get(p)
+
+        if entry is None:
+            entry = self._index[p] = ({}, {})
+
+        by_subject, by_object = entry
+        objects = by_subject.get(s)
+
+        if objects is None:
+            by_subject[s] = {o}
+        elif o in objects:
+            return False
+        else:
+            objects.add(o)
+
+        subjects = by_object.get(o)
+
+        if subjects is None:
+            by_object[o] = {s}
+        else:
+            subjects.add(s)
+
+        return True
+
+    def _delete(self, triple):
+        """
+        removes :param triple from the index
+        :param triple:
+        :return:
+        """
+        s, p, o = triple
+        entry = self._index.get(p)
+
+        if entry is None:
+            return
+
+        by_subject, by_object = entry
+
+        for index, key, value in ((by_subject, s, o), (by_object, o, s)):
+            values = index.get(key)
+
+            if values is not None:
+                values.discard(value)
+
+                if not values:
+                    del index[key]
+
+        if not by_subject:
+            del self._index[p]
@@ -0,0 +1,219 @@
+"""
+a process-wide registry of imported ontologies, so that ontologies importing the same ontology share one copy of it,
+rather than each loading its own.
+
+    ont.load(location='...', registry=owllib.registry.REGISTRY)
+
+an import is looked up by the IRI it is imported by before it is fetched; failing that, once it is parsed, by the
+ontology IRI and version IRI it declares, so the same ontology imported from two places is still shared.  an import
+declaring no ontology IRI is only shared with those importing it from the same location.  an import
+not found is loaded as usual, and registered once its own imports are wired up.
+
+a shared import is read-only: adding, removing or syncing its entities raises a ValueError, as it would change the
+ontology for every importer at once.
+
+the registry only holds weak references, so a shared import is dropped once no ontology imports it any longer and it
+is garbage collected.  it keeps a weak set of the ontologies using each import, from which it estimates the memory
+that sharing saves.
+"""
+
+import threading
+import weakref
+
+from rdflib import OWL
+
+#rough bytes an ontology takes per triple in an in-memory graph, with its entities; see ImportRegistry.stats
+TRIPLE_BYTES = 1200
+
+
+class ImportRegistry:
+    """
+    Shared, read-only imported ontologies, keyed by ontology IRI and version IRI
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        #key to a weak reference to the ontology shared under it
+        self._shared = {}
+
+        #the IRIs an import was imported by, and those it declares, to its key
+        self._names = {}
+
+        #key to the number of triples of the ontology, and to a weak set of the ontologies importing it
+        self._triples = {}
+        self._users = {}
+
+        #reentrant, as an eviction can happen whenever the garbage collector runs, including while the lock is held
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._shared)
+
+    @staticmethod
+    def key(ont):
+        """
+        returns the key :param ont is shared under: its ontology IRI and version IRI, which may be None.  an ontology
+        declaring no IRI is keyed by the location it was retrieved from, as ontologies that declare none have nothing
+        else in common; one with no location either has no key, and isn't shared
+        :param ont:
+        :return: a tuple, or None
+        """
+        if ont.uri is not None:
+            return ont.uri, ont.graph.value(ont.uri, OWL.versionIRI)
+
+        if ont.location is not None:
+            return ont.location, None
+
+        return None
+
+    def get(self, name):
+        """
+        returns the shared ontology imported as, or declaring, the IRI :param name, or None if there is none
+        :param name:
+        :return:
+        """
+        with self._lock:
+            ont = self._alive(self._names.get(name))
+
+            #a miss here is counted by find, once the import is parsed
+            if ont is not None:
+                self.hits += 1
+
+            return ont
+
+    def find(self, ont):
+        """
+        returns the shared ontology with the same ontology IRI and version IRI as the newly parsed :param ont, or None
+        :param ont:
+        :return:
+        """
+        key = self.key(ont)
+
+        if key is None:
+            return None
+
+        with self._lock:
+            shared = self._alive(key)
+
+            if shared is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            return shared
+
+    def register(self, ont, names=()):
+        """
+        shares :param ont, unless an ontology with the same key is shared already, and records :param names as IRIs it
+        is imported by.  the ontology is made read-only
+        :param ont: a loaded ontology whose imports are wired up
+        :param names:
+        :return: the ontology now shared under the key, which is :param ont unless another was shared first, or one
+        with no key
+        """
+        key = self.key(ont)
+
+        if key is None:
+            return ont
+
+        with self._lock:
+            shared = self._alive(key)
+
+            if shared is None:
+                shared = ont
+                shared.shared = True
+
+                #the profiler timed the importer's load, and is no business of the other importers
+                shared.profiler = None
+
+                self._shared[key] = weakref.ref(shared, lambda ref, key=key: self._evict(key, ref))
+                self._triples[key] = len(shared.graph)
+                self._users[key] = weakref.WeakSet()
+
+            for name in (key[0], key[1]) + tuple(names):
+                if name is not None:
+                    self._names[name] = key
+
+            return shared
+
+    def use(self, ont, user):
+        """
+        records that :param user imports the shared :param ont, directly or not
+        :param ont:
+        :param user:
+        :return:
+        """
+        key = self.key(ont)
+
+        if key is None:
+            return
+
+        with self._lock:
+            if self._alive(key) is ont:
+                self._users[key].add(user)
+
+    def stats(self):
+        """
+        returns the number of ontologies shared and of the ontologies using them; the hits, misses and evictions so far;
+        and the triples, and an estimate of the bytes, that would be held again were each user to load its own copy
+        :return: a dict
+        """
+        with self._lock:
+            users = dict((key, len(self._users[key])) for key in list(self._shared))
+            triples = sum(self._triples[key] * (count - 1) for key, count in users.items() if count > 1)
+
+            return {'shared': len(self._shared),
+                    'users': sum(users.values()),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'triples_saved': triples,
+                    'bytes_saved': triples * TRIPLE_BYTES}
+
+    def clear(self):
+        """
+        forgets every shared ontology.  the ontologies stay read-only, and stay imported by those that import them
+        :return:
+        """
+        with self._lock:
+            self._shared = {}
+            self._names = {}
+            self._triples = {}
+            self._users = {}
+
+    def _alive(self, key):
+        """
+        returns the ontology shared under :param key, if it hasn't been garbage collected
+        :param key:
+        :return:
+        """
+        ref = self._shared.get(key)
+
+        return None if ref is None else ref()
+
+    def _evict(self, key, ref):
+        """
+        forgets the ontology under :param key once :param ref to it is dead
+        :param key:
+        :param ref:
+        :return:
+        """
+        with self._lock:
+            if self._shared.get(key) is not ref:
+                return
+
+            del self._shared[key]
+            del self._triples[key]
+            del self._users[key]
+
+            for name in [name for name, name_key in list(self._names.items()) if name_key == key]:
+                del self._names[name]
+
+            self.evictions += 1
+
+
+#the registry for the whole process
+REGISTRY = ImportRegistry()
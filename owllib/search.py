@@ -0,0 +1,270 @@
+"""
+an index from label text to the things labelled, for finding entities by their labels, synonyms and definitions.
+
+every text is kept as given, for exact lookups, and folded (case folded, with runs of whitespace made single spaces)
+for the rest.  the folded texts are also kept in one sorted list, which serves as a flattened trie: the texts under any
+prefix are a contiguous run of it, found by bisection.  edit distance lookups walk that trie depth first, carrying one
+row of the Levenshtein table per character of the path, so texts sharing a prefix share its rows, and a whole run is
+skipped as soon as its prefix is too far from the query for anything under it to match.
+"""
+
+from bisect import bisect_left, insort
+
+from rdflib import RDFS, Namespace
+
+from owllib.entities import DEFINITION
+
+OBO_IN_OWL = Namespace("http://www.geneontology.org/formats/oboInOwl#")
+SKOS = Namespace("http://www.w3.org/2004/02/skos/core#")
+
+#the annotation properties whose values are indexed
+SEARCH_PROPERTIES = (RDFS.label,
+                     SKOS.prefLabel,
+                     SKOS.altLabel,
+                     OBO_IN_OWL.hasExactSynonym,
+                     OBO_IN_OWL.hasRelatedSynonym,
+                     OBO_IN_OWL.hasBroadSynonym,
+                     OBO_IN_OWL.hasNarrowSynonym,
+                     DEFINITION)
+
+#sorts after every character, to find the end of the run of texts under a prefix
+_LAST = '\U0010ffff'
+
+
+def fold(text):
+    """
+    returns :param text case folded, with its whitespace collapsed
+    :param text:
+    :return:
+    """
+    return ' '.join(str(text).split()).casefold()
+
+
+class LabelIndex:
+    """
+    Finds the subjects with a given label, synonym or definition, exactly, ignoring case, by prefix or within an edit
+    distance
+    """
+
+    def __init__(self, graph=None, predicates=SEARCH_PROPERTIES):
+        """
+        builds the index from the values of :param predicates in :param graph
+        :param graph:
+        :param predicates:
+        :return:
+        """
+        self.predicates = frozenset(predicates)
+
+        #text to subjects, as given and folded
+        self._exact = {}
+        self._folded = {}
+
+        #the folded texts, sorted
+        self._keys = []
+
+        #subject to the texts indexed for it
+        self._texts = {}
+
+        if graph is not None:
+            for predicate in self.predicates:
+                for subject, obj in graph.subject_objects(predicate):
+                    self._add(subject, str(obj), False)
+
+            self._keys = sorted(self._folded)
+
+    def __len__(self):
+        return len(self._folded)
+
+    def _add(self, subject, text, keep_sorted=True):
+        """
+        indexes :param text for :param subject
+        :param subject:
+        :param text:
+        :param keep_sorted: if false, the sorted texts are left for the caller to rebuild
+        :return:
+        """
+        self._exact.setdefault(text, set()).add(subject)
+        self._texts.setdefault(subject, set()).add(text)
+
+        folded = fold(text)
+        subjects = self._folded.get(folded)
+
+        if subjects is None:
+            subjects = self._folded[folded] = set()
+
+            if keep_sorted:
+                insort(self._keys, folded)
+
+        subjects.add(subject)
+
+    def _discard(self, subject):
+        """
+        removes everything indexed for :param subject
+        :param subject:
+        :return:
+        """
+        for text in self._texts.pop(subject, ()):
+            _discard_from(self._exact, text, subject)
+
+            folded = fold(text)
+
+            if _discard_from(self._folded, folded, subject):
+                del self._keys[bisect_left(self._keys, folded)]
+
+    def refresh(self, subjects, graph):
+        """
+        reindexes :param subjects from :param graph, e.g. after their triples change
+        :param subjects:
+        :param graph:
+        :return:
+        """
+        for subject in subjects:
+            self._discard(subject)
+
+            for predicate, obj in graph.predicate_objects(subject):
+                if predicate in self.predicates:
+                    self._add(subject, str(obj))
+
+    def exact(self, text):
+        """
+        returns the subjects with :param text as a label, synonym or definition
+        :param text:
+        :return:
+        """
+        return set(self._exact.get(str(text), ()))
+
+    def case_insensitive(self, text):
+        """
+        returns the subjects with :param text as a label, synonym or definition, ignoring case and whitespace
+        :param text:
+        :return:
+        """
+        return set(self._folded.get(fold(text), ()))
+
+    def prefix(self, prefix, limit=None, accept=None):
+        """
+        returns the subjects with a label, synonym or definition starting with :param prefix, ignoring case, in order
+        of the text that matched
+        :param prefix:
+        :param limit: the most subjects to return
+        :param accept: if given, only the subjects it returns true for are returned
+        :return:
+        """
+        prefix = fold(prefix)
+        keys = self._keys
+
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + _LAST, start)
+
+        return self._collect((keys[i] for i in range(start, end)), limit, accept)
+
+    def similar(self, text, distance=1, limit=None, accept=None):
+        """
+        returns the subjects with a label, synonym or definition within :param distance edits of :param text, ignoring
+        case, closest first
+        :param text:
+        :param distance: the most insertions, deletions and substitutions
+        :param limit: the most subjects to return
+        :param accept: see prefix
+        :return:
+        """
+        query = fold(text)
+        keys = self._keys
+        count = len(keys)
+
+        matches = []
+
+        #rows[d] is the edit distance table row for the first d characters of path
+        rows = [list(range(len(query) + 1))]
+        path = ''
+
+        i = 0
+        while i < count:
+            key = keys[i]
+
+            common = 0
+            limit_common = min(len(path), len(key))
+            while common < limit_common and path[common] == key[common]:
+                common += 1
+
+            del rows[common + 1:]
+            path = key[:common]
+
+            for char in key[common:]:
+                rows.append(_next_row(rows[-1], char, query))
+                path += char
+
+                if min(rows[-1]) > distance:
+                    break
+            else:
+                if rows[-1][-1] <= distance:
+                    matches.append((rows[-1][-1], key))
+                i += 1
+                continue
+
+            #nothing under path can match
+            i = bisect_left(keys, path + _LAST, i)
+
+        matches.sort()
+
+        return self._collect([key for _, key in matches], limit, accept)
+
+    def _collect(self, keys, limit, accept):
+        """
+        returns the subjects of the folded :param keys, in order, without repeats
+        :param keys:
+        :param limit:
+        :param accept:
+        :return:
+        """
+        subjects = []
+        seen = set()
+
+        for key in keys:
+            for subject in sorted(self._folded[key]):
+                if subject not in seen and (accept is None or accept(subject)):
+                    seen.add(subject)
+                    subjects.append(subject)
+
+                    if limit is not None and len(subjects) >= limit:
+                        return subjects
+
+        return subjects
+
+
+def _next_row(row, char, query):
+    """
+    returns the edit distance table row after :param row, for one more character :param char of the text
+    :param row:
+    :param char:
+    :param query:
+    :return:
+    """
+    next_row = [row[0] + 1]
+
+    for j, query_char in enumerate(query, 1):
+        next_row.append(min(row[j] + 1, next_row[j - 1] + 1, row[j - 1] + (query_char != char)))
+
+    return next_row
+
+
+def _discard_from(index, key, subject):
+    """
+    removes :param subject from the set at :param key of :param index, dropping the key once its set is empty
+    :param index:
+    :param key:
+    :param subject:
+    :return: true if the key was dropped
+    """
+    subjects = index.get(key)
+
+    if subjects is None:
+        return False
+
+    subjects.discard(subject)
+
+    if not subjects:
+        del index[key]
+        return True
+
+    return False
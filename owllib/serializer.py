@@ -0,0 +1,587 @@
+"""
+writes a graph out as N-Triples, Turtle or RDF/XML a chunk at a time, rather than building the whole document in memory
+as rdflib's serializers do.
+
+the graph is read twice: once to list its subjects, count the references to each blank node and find the namespaces in
+use, then once more a subject at a time, each subject's triples looked up in the store's index and written as a block.
+memory is therefore O(subjects), for the list of them, besides the chunk being written; sorting needs them all anyway,
+and Turtle needs the blank node counts to know which to write inline.  unsorted N-Triples, and unsorted RDF/XML, which
+can describe a subject in more than one place, aren't grouped by subject: the graph is written as it is read the second
+time, and memory is O(namespaces and blank nodes), for their labels, besides the chunk, and the triples of one subject
+for RDF/XML.
+
+in Turtle, a blank node referenced exactly once is written inline where it is referenced, as [ ... ], or as ( ... ) if
+it heads an RDF collection; one referenced nowhere is written as a [] subject.  other blank nodes are labelled, in the
+order they are first written.
+
+when sorted, subjects are written uris first, in order, then blank nodes, ordered by what they say; and each subject's
+triples in order of predicate and object.  saving the same graph twice then gives the same document, blank node labels
+included.
+"""
+
+import io
+import os
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+from rdflib import RDF, BNode, Literal, URIRef
+
+#formats that can be written
+FORMATS = ('nt', 'turtle', 'xml')
+
+#other names the formats go by
+ALIASES = {'ntriples': 'nt', 'nt11': 'nt', 'n-triples': 'nt', 'ttl': 'turtle', 'rdf': 'xml', 'owl': 'xml',
+           'application/n-triples': 'nt', 'text/turtle': 'turtle', 'application/rdf+xml': 'xml'}
+
+#characters written before the output is flushed to the file
+CHUNK_SIZE = 1 << 16
+
+#a name that can follow a prefix in Turtle, and in XML
+_TURTLE_LOCAL = re.compile(r'^[A-Za-z0-9_](?:[A-Za-z0-9_\-.]*[A-Za-z0-9_\-])?$')
+_XML_LOCAL = re.compile(r'^[A-Za-z_][A-Za-z0-9_\-.]*$')
+
+#a prefix that can be declared in both
+_PREFIX = re.compile(r'^[A-Za-z](?:[A-Za-z0-9_\-]*[A-Za-z0-9_])?$')
+
+_STRING_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'})
+_IRI_ESCAPES = str.maketrans(dict((c, '\\u%04X' % ord(c)) for c in [chr(i) for i in range(0x21)] + list('<>"{}|^`\\')))
+
+#most strings have nothing to escape, and can be checked far faster than translated
+_STRING_UNSAFE = re.compile(r'[\\"\n\r]')
+_IRI_UNSAFE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+
+
+def serialize(graph, destination, format='turtle', sort=False, encoding='utf-8'):
+    """
+    writes :param graph to :param destination a chunk at a time
+    :param graph:
+    :param destination: a file path, or a file object open for writing, as text or bytes
+    :param format: 'nt', 'turtle' or 'xml'
+    :param sort: if true, the output is in a fixed order; see the module docstring
+    :param encoding: of the bytes written to a path or binary file
+    :return:
+    """
+    format = ALIASES.get(format, format)
+
+    if format not in FORMATS:
+        raise ValueError("Only N-Triples, Turtle and RDF/XML can be saved.  Found " + str(format))
+
+    writer = _WRITERS[format]
+
+    with _Output(destination, encoding) as out:
+        writer(graph, out, sort).write()
+
+
+class _Output:
+    """
+    buffers text written to a file, writing it a chunk at a time
+    """
+
+    def __init__(self, destination, encoding):
+        if isinstance(destination, (str, os.PathLike)):
+            self.file = open(destination, 'wb')
+            self.owned = True
+        else:
+            self.file = destination
+            self.owned = False
+
+        self.text = isinstance(self.file, io.TextIOBase)
+        self.encoding = encoding
+
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+
+        if self.size >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        data = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+
+        self.file.write(data if self.text else data.encode(self.encoding))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if exc_info[0] is None:
+                self.flush()
+        finally:
+            if self.owned:
+                self.file.close()
+
+        return False
+
+
+def _quote(text):
+    text = str(text)
+
+    return '"' + (text.translate(_STRING_ESCAPES) if _STRING_UNSAFE.search(text) else text) + '"'
+
+
+def _iri(uri):
+    uri = str(uri)
+
+    return '<' + (uri.translate(_IRI_ESCAPES) if _IRI_UNSAFE.search(uri) else uri) + '>'
+
+
+def _split(uri):
+    """
+    returns :param uri split after its last '#' or '/' into a namespace and a local name
+    :param uri:
+    :return:
+    """
+    i = max(uri.rfind('#'), uri.rfind('/')) + 1
+
+    return uri[:i], uri[i:]
+
+
+def _literal_key(literal):
+    return str(literal), literal.language or '', str(literal.datatype or '')
+
+
+class _Writer:
+    """
+    writes a graph a subject at a time; subclasses write the subjects in their format
+    """
+
+    def __init__(self, graph, out, sort):
+        self.graph = graph
+        self.out = out
+        self.sort = sort
+
+        #blank node to its label, in the order they were first written
+        self.labels = {}
+
+    def write(self):
+        subjects, self.references, names = self.survey()
+        self.prefixes = self.choose_prefixes(names)
+
+        self.write_header()
+
+        for subject in self.order(subjects):
+            self.write_subject(subject)
+
+        self.write_footer()
+
+    def survey(self, keep=True):
+        """
+        reads through the graph once
+        :param keep: if false, the subjects aren't listed, nor the blank nodes counted
+        :return: its subjects, in the order they were found; the number of times each blank node is an object; and the
+        namespaces of the subjects, predicates, classes and datatypes, which are the ones worth a prefix
+        """
+        subjects = {}
+        references = {}
+        namespaces = set()
+        predicates = set()
+        last = None
+
+        for s, p, o in self.graph:
+            #without the subjects to check against, a subject's namespace is found each time it comes up in a new run
+            if s != last and s not in subjects:
+                last = s
+
+                if keep:
+                    subjects[s] = None
+
+                if isinstance(s, URIRef):
+                    namespaces.add(_split(s)[0])
+
+            predicates.add(p)
+
+            if isinstance(o, BNode):
+                if keep:
+                    references[o] = references.get(o, 0) + 1
+            elif p == RDF.type and isinstance(o, URIRef):
+                namespaces.add(_split(o)[0])
+            elif isinstance(o, Literal) and o.datatype is not None:
+                namespaces.add(_split(o.datatype)[0])
+
+        self.predicates = predicates
+        namespaces.update(_split(p)[0] for p in predicates)
+
+        return list(subjects), references, namespaces
+
+    def choose_prefixes(self, namespaces):
+        """
+        returns the prefix to write for each of :param namespaces that the graph has one bound for
+        :param namespaces:
+        :return: a dict of namespace to prefix
+        """
+        prefixes = {}
+
+        for prefix, namespace in self.graph.namespaces():
+            namespace = str(namespace)
+
+            if namespace in namespaces and namespace not in prefixes and _PREFIX.match(prefix) \
+                    and prefix not in prefixes.values():
+                prefixes[namespace] = prefix
+
+        return prefixes
+
+    def order(self, subjects):
+        """
+        returns :param subjects in the order they are written
+        :param subjects:
+        :return:
+        """
+        if not self.sort:
+            return subjects
+
+        uris = sorted(s for s in subjects if not isinstance(s, BNode))
+        blanks = sorted((s for s in subjects if isinstance(s, BNode)), key=self.describe)
+
+        return uris + blanks
+
+    def predicate_objects(self, subject):
+        """
+        returns the (predicate, object) pairs of :param subject, in order if sorting
+        :param subject:
+        :return:
+        """
+        pairs = list(self.graph.predicate_objects(subject))
+
+        if self.sort:
+            pairs.sort(key=lambda pair: (str(pair[0]), self.key(pair[1])))
+
+        return pairs
+
+    def key(self, term):
+        """
+        returns what :param term is sorted by; blank nodes by what they say, as their ids differ from load to load
+        :param term:
+        :return:
+        """
+        if isinstance(term, URIRef):
+            return 0, str(term)
+        if isinstance(term, Literal):
+            return (1,) + _literal_key(term)
+
+        return 2, self.describe(term)
+
+    def describe(self, node, depth=2):
+        """
+        returns a sortable description of the blank :param node, from its own triples and those of the blank nodes
+        they lead to, up to :param depth deep
+        :param node:
+        :param depth:
+        :return:
+        """
+        description = []
+
+        for p, o in self.graph.predicate_objects(node):
+            if isinstance(o, BNode):
+                o = self.describe(o, depth - 1) if depth > 0 else ''
+            elif isinstance(o, Literal):
+                o = _literal_key(o)
+            else:
+                o = str(o)
+
+            description.append((str(p), str(o)))
+
+        return str(sorted(description))
+
+    def label(self, node):
+        label = self.labels.get(node)
+
+        if label is None:
+            label = self.labels[node] = 'b%d' % len(self.labels)
+
+        return label
+
+    def write_header(self):
+        pass
+
+    def write_subject(self, subject):
+        raise NotImplementedError
+
+    def write_footer(self):
+        pass
+
+
+class _NTriplesWriter(_Writer):
+    """
+    writes N-Triples, a line per triple
+    """
+
+    def write(self):
+        if self.sort:
+            return _Writer.write(self)
+
+        #lines needn't be grouped by subject, so the graph is written as it is read
+        term = self.term
+        write = self.out.write
+
+        for s, p, o in self.graph:
+            write('%s %s %s .\n' % (term(s), term(p), term(o)))
+
+    def choose_prefixes(self, namespaces):
+        return {}
+
+    def term(self, term):
+        if isinstance(term, URIRef):
+            return _iri(term)
+        if isinstance(term, BNode):
+            return '_:' + self.label(term)
+
+        text = _quote(term)
+
+        if term.language:
+            return text + '@' + term.language
+        if term.datatype:
+            return text + '^^' + _iri(term.datatype)
+
+        return text
+
+    def write_subject(self, subject):
+        s = self.term(subject)
+        term = self.term
+        write = self.out.write
+
+        for p, o in self.predicate_objects(subject):
+            write('%s %s %s .\n' % (s, term(p), term(o)))
+
+
+class _TurtleWriter(_NTriplesWriter):
+    """
+    writes Turtle, a block per subject, with prefixed names and blank nodes inline where they can be
+    """
+
+    def choose_prefixes(self, namespaces):
+        return _Writer.choose_prefixes(self, namespaces)
+
+    def write(self):
+        #blank nodes written inline, and those being written
+        self.inlined = set()
+        self.open = set()
+
+        _Writer.write(self)
+
+        #blank nodes referenced once, but only from inside a cycle of such nodes, are never reached; they are written
+        #with labels instead
+        for node, count in list(self.references.items()):
+            if count == 1 and node not in self.inlined and (node, None, None) in self.graph:
+                self.write_block(node, '_:' + self.label(node))
+
+    def write_header(self):
+        for namespace, prefix in sorted(self.prefixes.items(), key=lambda item: item[1]):
+            self.out.write('@prefix %s: %s .\n' % (prefix, _iri(namespace)))
+
+        #blocks are separated by a blank line, as is the first from the prefixes
+        self.separate = bool(self.prefixes)
+
+    def term(self, term):
+        if isinstance(term, URIRef):
+            namespace, local = _split(term)
+            prefix = self.prefixes.get(namespace)
+
+            if prefix is not None and _TURTLE_LOCAL.match(local):
+                return prefix + ':' + local
+
+            return _iri(term)
+
+        if isinstance(term, Literal) and term.datatype:
+            return _quote(term) + '^^' + self.term(term.datatype)
+
+        return _NTriplesWriter.term(self, term)
+
+    def write_subject(self, subject):
+        if isinstance(subject, BNode):
+            count = self.references.get(subject, 0)
+
+            #written where it is referenced
+            if count == 1:
+                return
+
+            self.write_block(subject, '[]' if count == 0 else '_:' + self.label(subject))
+        else:
+            self.write_block(subject, self.term(subject))
+
+    def write_block(self, subject, text):
+        self.open.add(subject)
+        self.out.write(('\n' if self.separate else '') + text + ' ' + self.properties(subject, ' ;\n    ') + ' .\n')
+        self.separate = True
+        self.open.discard(subject)
+
+    def properties(self, subject, separator):
+        """
+        returns the predicates and objects of :param subject in Turtle, the objects of each predicate together
+        :param subject:
+        :param separator: between predicates
+        :return:
+        """
+        grouped = {}
+
+        for p, o in self.predicate_objects(subject):
+            grouped.setdefault(p, []).append(o)
+
+        return separator.join(('a' if p == RDF.type else self.term(p)) + ' ' +
+                              ', '.join(self.object(o) for o in objects) for p, objects in grouped.items())
+
+    def object(self, term):
+        if not isinstance(term, BNode) or self.references.get(term) != 1 or term in self.open:
+            return self.term(term)
+
+        items = self.collection(term)
+
+        if items is not None:
+            return '( ' + ' '.join(self.object(item) for item in items) + ' )' if items else '( )'
+
+        self.inlined.add(term)
+        self.open.add(term)
+
+        try:
+            properties = self.properties(term, ' ; ')
+        finally:
+            self.open.discard(term)
+
+        return '[ ' + properties + ' ]' if properties else '[ ]'
+
+    def collection(self, head):
+        """
+        returns the items of the RDF collection starting at the blank :param head, if it is one that can be written
+        as ( ... ): every node in it is a blank node referenced once, with just an rdf:first and an rdf:rest
+        :param head:
+        :return: a list of the items, or None
+        """
+        items = []
+        nodes = []
+        node = head
+
+        while node != RDF.nil:
+            if not isinstance(node, BNode) or self.references.get(node) != 1 or node in nodes or node in self.open:
+                return None
+
+            pairs = list(self.graph.predicate_objects(node))
+
+            if len(pairs) != 2:
+                return None
+
+            values = dict(pairs)
+
+            if RDF.first not in values or RDF.rest not in values:
+                return None
+
+            items.append(values[RDF.first])
+            nodes.append(node)
+            node = values[RDF.rest]
+
+        self.inlined.update(nodes)
+
+        return items
+
+
+class _XMLWriter(_Writer):
+    """
+    writes RDF/XML, an rdf:Description per subject
+    """
+
+    def choose_prefixes(self, namespaces):
+        prefixes = _Writer.choose_prefixes(self, namespaces)
+        prefixes[str(RDF)] = 'rdf'
+
+        #every predicate has to be written as a qualified name
+        self.names = {}
+
+        for p in self.predicates:
+            namespace, local = _split(p)
+
+            if not namespace or not _XML_LOCAL.match(local):
+                raise ValueError("Cannot write predicate as RDF/XML: " + str(p))
+
+            if namespace not in prefixes:
+                prefix = 'ns%d' % len(prefixes)
+
+                while prefix in prefixes.values():
+                    prefix += '_'
+
+                prefixes[namespace] = prefix
+
+            self.names[p] = prefixes[namespace] + ':' + local
+
+        return prefixes
+
+    def write(self):
+        if self.sort:
+            return _Writer.write(self)
+
+        #a subject can be described more than once, so each run of triples with the same subject is written as the
+        #graph is read, rather than looking up all of a subject's triples together
+        _, self.references, names = self.survey(keep=False)
+        self.prefixes = self.choose_prefixes(names)
+
+        self.write_header()
+
+        subject = None
+        pairs = []
+
+        for s, p, o in self.graph:
+            if s != subject:
+                if pairs:
+                    self.write_description(subject, pairs)
+
+                subject = s
+                pairs = []
+
+            pairs.append((p, o))
+
+        if pairs:
+            self.write_description(subject, pairs)
+
+        self.write_footer()
+
+    def write_header(self):
+        out = self.out
+        out.write('<?xml version="1.0" encoding="utf-8"?>\n<rdf:RDF')
+
+        for namespace, prefix in sorted(self.prefixes.items(), key=lambda item: item[1]):
+            out.write('\n   xmlns:%s=%s' % (prefix, quoteattr(namespace)))
+
+        out.write('>\n')
+
+    def write_subject(self, subject):
+        self.write_description(subject, self.predicate_objects(subject))
+
+    def write_description(self, subject, pairs):
+        """
+        writes an rdf:Description of :param subject
+        :param subject:
+        :param pairs: the (predicate, object) pairs to write
+        :return:
+        """
+        out = self.out
+
+        if isinstance(subject, BNode):
+            out.write('  <rdf:Description rdf:nodeID="%s">\n' % self.label(subject))
+        else:
+            out.write('  <rdf:Description rdf:about=%s>\n' % quoteattr(str(subject)))
+
+        for p, o in pairs:
+            name = self.names[p]
+
+            if isinstance(o, URIRef):
+                out.write('    <%s rdf:resource=%s/>\n' % (name, quoteattr(str(o))))
+            elif isinstance(o, BNode):
+                out.write('    <%s rdf:nodeID="%s"/>\n' % (name, self.label(o)))
+            elif o.language:
+                out.write('    <%s xml:lang=%s>%s</%s>\n' % (name, quoteattr(o.language), escape(str(o)), name))
+            elif o.datatype:
+                out.write('    <%s rdf:datatype=%s>%s</%s>\n' % (name, quoteattr(str(o.datatype)), escape(str(o)),
+                                                                 name))
+            else:
+                out.write('    <%s>%s</%s>\n' % (name, escape(str(o)), name))
+
+        out.write('  </rdf:Description>\n')
+
+    def write_footer(self):
+        self.out.write('</rdf:RDF>\n')
+
+
+_WRITERS = {'nt': _NTriplesWriter, 'turtle': _TurtleWriter, 'xml': _XMLWriter}
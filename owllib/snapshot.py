@@ -0,0 +1,331 @@
+"""
+a compact binary snapshot of an ontology, which loads without parsing the document it was taken from.  a snapshot
+holds
+
+* a json header with the ontology uri, the source it was loaded from and a fingerprint of that source
+* a dictionary of every term in the graph, as json
+* the graph as triples of integer term ids
+* the entity tables, as term ids for each kind of entity
+* the class, property and individual type hierarchy, as (child, parent) term id pairs
+
+the integer sections are read straight out of a memory map of the file, which is open until close_snapshot.
+"""
+
+import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import urllib.request as url
+
+from rdflib import RDF, RDFS, URIRef, BNode, Literal
+
+from owllib.cache import is_remote
+from owllib.entities import Class, Individual, Property
+
+MAGIC = b'OWLSNAP1'
+VERSION = 1
+
+#entity tables, in the order they are written
+TABLES = ('classes', 'individuals', 'object_properties', 'annotation_properties', 'data_properties')
+
+_LENGTH = struct.Struct('<Q')
+
+
+def fingerprint(source):
+    """
+    returns a string identifying the current contents of :param source: a hash of a local file, or the ETag or
+    Last-Modified of a remote document, or a hash of its content if it is served with neither.  a local file that
+    doesn't exist has no fingerprint
+    :param source: a path or url
+    :return: the fingerprint, or None if :param source is a local file that doesn't exist
+    """
+    source = str(source)
+
+    if not is_remote(source):
+        path = url.url2pathname(source[len('file://'):]) if source.startswith('file://') else source
+
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, 'rb') as f:
+            return _content_fingerprint(f)
+
+    with url.urlopen(url.Request(source, method='HEAD')) as response:
+        found = remote_fingerprint(response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+    if found is None:
+        with url.urlopen(source) as response:
+            found = _content_fingerprint(response)
+
+    return found
+
+
+def remote_fingerprint(etag, modified, data=None):
+    """
+    returns the fingerprint of a remote document served with :param etag and Last-Modified :param modified, or, if it
+    has neither, a hash of its content :param data
+    :param etag:
+    :param modified:
+    :param data: the document, as bytes
+    :return: the fingerprint, or None if there is nothing to take it from
+    """
+    if etag:
+        return 'etag:' + etag
+    if modified:
+        return 'modified:' + modified
+    if data is not None:
+        return 'sha1:' + hashlib.sha1(data).hexdigest()
+
+    return None
+
+
+def _content_fingerprint(stream):
+    """
+    returns the fingerprint of the content of the binary :param stream, read a chunk at a time
+    :param stream:
+    :return:
+    """
+    digest = hashlib.sha1()
+
+    for chunk in iter(lambda: stream.read(1 << 20), b''):
+        digest.update(chunk)
+
+    return 'sha1:' + digest.hexdigest()
+
+
+def encode_terms(triples):
+    """
+    dictionary-encodes :param triples
+    :param triples:
+    :return: a tuple of the list of terms, a dict from term to id, and an array of 3 ids per triple
+    """
+    terms = []
+    ids = {}
+    encoded = array.array('I')
+
+    for triple in triples:
+        for term in triple:
+            term_id = ids.get(term)
+
+            if term_id is None:
+                term_id = ids[term] = len(terms)
+                terms.append(term)
+
+            encoded.append(term_id)
+
+    return terms, ids, encoded
+
+
+def dump_terms(terms):
+    """
+    serializes rdflib :param terms to json
+    :param terms:
+    :return:
+    """
+    rows = []
+
+    for term in terms:
+        if isinstance(term, Literal):
+            rows.append(['l', str(term), term.language, term.datatype and str(term.datatype)])
+        elif isinstance(term, BNode):
+            rows.append(['b', str(term)])
+        else:
+            rows.append(['u', str(term)])
+
+    return json.dumps(rows, separators=(',', ':')).encode('utf-8')
+
+
+def load_terms(data):
+    """
+    deserializes rdflib terms from :param data written by dump_terms
+    :param data:
+    :return:
+    """
+    terms = []
+    append = terms.append
+
+    for row in json.loads(data.decode('utf-8')):
+        kind = row[0]
+
+        if kind == 'u':
+            append(URIRef(row[1]))
+        elif kind == 'b':
+            append(BNode(row[1]))
+        else:
+            append(Literal(row[1], lang=row[2], datatype=row[3]))
+
+    return terms
+
+
+def hierarchy_edges(ontology):
+    """
+    returns the (child, parent) uri pairs of the class and property hierarchies and individual types of
+    :param ontology, straight from the graph
+    :param ontology:
+    :return:
+    """
+    for predicate, child_kind, parent_kind in ((RDFS.subClassOf, Class, Class),
+                                               (RDFS.subPropertyOf, Property, Property),
+                                               (RDF.type, Individual, Class)):
+        for edge in ontology._hierarchy_edges(predicate, child_kind, parent_kind):
+            yield edge
+
+
+def write_snapshot(ontology, path, source=None, source_fingerprint=None):
+    """
+    writes a snapshot of :param ontology to :param path.  if :param source is given, its fingerprint is recorded so
+    that a stale snapshot can be detected when it is read
+    :param ontology:
+    :param path:
+    :param source:
+    :param source_fingerprint: the fingerprint of :param source when :param ontology was loaded from it; taken now if
+    not given
+    :return:
+    """
+    path = os.fspath(path)
+    terms, ids, triples = encode_terms(ontology.graph)
+
+    def term_id(term):
+        if term not in ids:
+            ids[term] = len(terms)
+            terms.append(term)
+        return ids[term]
+
+    tables = []
+    for name in TABLES:
+        tables.append(array.array('I', (term_id(entity.uri) for entity in getattr(ontology, name))))
+
+    hierarchy = array.array('I')
+    for child, parent in hierarchy_edges(ontology):
+        hierarchy.append(ids[child])
+        hierarchy.append(ids[parent])
+
+    uri = term_id(ontology.uri) if ontology.uri is not None else None
+
+    sections = [dump_terms(terms), triples.tobytes()] + [table.tobytes() for table in tables] + [hierarchy.tobytes()]
+
+    header = {
+        'version': VERSION,
+        'byteorder': sys.byteorder,
+        'itemsize': triples.itemsize,
+        'uri': uri,
+        'source': source and str(source),
+        'fingerprint': source and (source_fingerprint or fingerprint(source)),
+        'sections': [len(section) for section in sections]
+    }
+    header = json.dumps(header).encode('utf-8')
+
+    temp = path + '.tmp'
+
+    with open(temp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+
+        for section in sections:
+            f.write(section)
+
+    os.replace(temp, path)
+
+
+def read_snapshot(path, check=True):
+    """
+    reads the snapshot at :param path.  raises a ValueError if :param check is true and the source it was taken from
+    has changed or gone since.  the snapshot is to be closed with close_snapshot once read
+    :param path:
+    :param check:
+    :return: a dict with the 'uri', 'source', 'fingerprint', 'terms', 'triples' and 'hierarchy', and the entity
+    tables by name; the integer sections are memoryviews into a memory map of the file
+    """
+    path = os.fspath(path)
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    #every view into the map, which are released before it is closed
+    views = [memoryview(mapped)]
+
+    def section(start, end, format=None):
+        views.append(views[0][start:end])
+        if format is not None:
+            views.append(views[-1].cast(format))
+        return views[-1]
+
+    try:
+        view = views[0]
+
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not an owllib snapshot: " + path)
+
+        offset = len(MAGIC)
+        length, = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+
+        header = json.loads(bytes(view[offset:offset + length]).decode('utf-8'))
+        offset += length
+
+        if header['version'] != VERSION:
+            raise ValueError("Unsupported snapshot version: " + str(header['version']))
+        if header['byteorder'] != sys.byteorder or header['itemsize'] != array.array('I').itemsize:
+            raise ValueError("Snapshot was written on an incompatible platform: " + path)
+
+        if check and header['source']:
+            current = fingerprint(header['source'])
+
+            if current is None:
+                raise ValueError("Snapshot is stale; its source no longer exists: " + header['source'])
+            if current != header['fingerprint']:
+                raise ValueError("Snapshot is stale; its source has changed: " + header['source'])
+
+        bounds = []
+        for size in header['sections']:
+            bounds.append((offset, offset + size))
+            offset += size
+
+        terms = load_terms(bytes(view[bounds[0][0]:bounds[0][1]]))
+
+        snapshot = {
+            'uri': terms[header['uri']] if header['uri'] is not None else None,
+            'source': header['source'],
+            'fingerprint': header['fingerprint'],
+            'terms': terms,
+            'triples': section(*bounds[1], format='I'),
+            'hierarchy': section(*bounds[-1], format='I'),
+            '_mapped': (mapped, views)
+        }
+
+        for name, bound in zip(TABLES, bounds[2:-1]):
+            snapshot[name] = section(*bound, format='I')
+    except Exception:
+        _close(mapped, views)
+        raise
+
+    return snapshot
+
+
+def close_snapshot(snapshot):
+    """
+    closes the memory map of :param snapshot, read by read_snapshot; its integer sections can't be read after
+    :param snapshot:
+    :return:
+    """
+    mapped = snapshot.pop('_mapped', None)
+
+    if mapped is not None:
+        _close(*mapped)
+
+
+def _close(mapped, views):
+    """
+    releases :param views into :param mapped, then closes it
+    :param mapped:
+    :param views:
+    :return:
+    """
+    for view in reversed(views):
+        view.release()
+
+    mapped.close()
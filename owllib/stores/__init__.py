@@ -0,0 +1,24 @@
+"""
+alternative rdflib stores that an Ontology can be loaded into, in place of rdflib's in-memory store.  each is registered
+as an rdflib store plugin, so it is picked by name:
+
+    ontology = Ontology(store='Columnar')
+
+* Columnar: dictionary-encoded triples held in sorted NumPy columns; see owllib.stores.columnar.  needs numpy
+* SQLite: a persistent store in a SQLite database file; see owllib.stores.sqlite.  it needs a path, so is passed as an
+  instance, and can be reopened later without parsing:
+
+    ontology = Ontology(store=SQLiteStore('ontology.db'))
+    ontology.load(location=...)
+
+    ontology = Ontology(store=SQLiteStore('ontology.db'))
+    ontology.open()
+"""
+
+from rdflib import plugin
+from rdflib.store import Store
+
+plugin.register('Columnar', Store, 'owllib.stores.columnar', 'ColumnarStore')
+plugin.register('SQLite', Store, 'owllib.stores.sqlite', 'SQLiteStore')
+
+from owllib.stores.sqlite import SQLiteStore
@@ -0,0 +1,347 @@
+"""
+a read-mostly rdflib store that keeps triples in sorted NumPy columns rather than nested dicts of term objects.
+
+every term is given an integer id, and each triple is held as three ids, sorted three ways: by subject, predicate,
+object (SPO), by predicate, object, subject (POS) and by object, subject, predicate (OSP).  a pattern with any terms
+bound is answered from the permutation that leads with them, by binary searching its columns with numpy.searchsorted,
+so it costs a few searches plus the size of the answer.
+
+triples added or removed since the columns were last sorted are held apart, in sets of ids indexed by term, and taken
+into account by every lookup.  they are merged into the columns, in one vectorized sort, once there are enough of them,
+so bulk loads sort a handful of times and an occasional edit doesn't resort anything.
+"""
+
+from rdflib.store import Store
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#the integer type of term ids
+ID = 'uint32'
+
+#pending changes that are merged without waiting for a lookup, at least; or a quarter of the store, if more
+MERGE_BATCH = 1 << 16
+
+
+class ColumnarStore(Store):
+    """
+    A dictionary-encoded triple store over sorted NumPy columns, for a single graph
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        if np is None:
+            raise ImportError("The columnar store needs numpy; install owllib[columnar]")
+
+        super(ColumnarStore, self).__init__(configuration)
+        self.identifier = identifier
+
+        self._clear()
+
+        self._namespace = {}
+        self._prefix = {}
+
+    def _clear(self):
+        """
+        empties the store of triples and terms
+        :return:
+        """
+        #the term with each id, and the id of each term
+        self._terms = []
+        self._ids = {}
+
+        empty = np.empty(0, dtype=ID)
+
+        #the columns of each permutation, in the order they are sorted by
+        self._spo = (empty, empty, empty)
+        self._pos = (empty, empty, empty)
+        self._osp = (empty, empty, empty)
+
+        #id triples added but not yet in the columns, indexed by subject, predicate and object, and ones in the
+        #columns that have been removed
+        self._added = set()
+        self._added_by = ({}, {}, {})
+        self._removed = set()
+
+    def _id(self, term):
+        """
+        returns the id of :param term, assigning one if it is new
+        :param term:
+        :return:
+        """
+        term_id = self._ids.get(term)
+
+        if term_id is None:
+            term_id = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+
+        return term_id
+
+    def _encode(self, triple):
+        s, p, o = triple
+        return self._id(s), self._id(p), self._id(o)
+
+    def _sorted(self, triple_ids):
+        """
+        returns true if :param triple_ids is in the sorted columns
+        :param triple_ids:
+        :return:
+        """
+        lo, hi = _search(self._spo, triple_ids)
+
+        return lo < hi
+
+    def add(self, triple, context=None, quoted=False):
+        triple_ids = self._encode(triple)
+
+        self._add(triple_ids)
+        self._merge_if_full()
+
+    def addN(self, quads):
+        encode = self._encode
+        add = self._add
+
+        for s, p, o, _ in quads:
+            add(encode((s, p, o)))
+
+            if len(self._added) >= MERGE_BATCH:
+                self._merge_if_full()
+
+    def _add(self, triple_ids):
+        """
+        adds the id triple :param triple_ids, unless it is already in the store
+        :param triple_ids:
+        :return:
+        """
+        if triple_ids in self._removed:
+            self._removed.discard(triple_ids)
+        elif triple_ids not in self._added and not self._sorted(triple_ids):
+            self._added.add(triple_ids)
+
+            for term_id, by in zip(triple_ids, self._added_by):
+                triples = by.get(term_id)
+
+                if triples is None:
+                    by[term_id] = {triple_ids}
+                else:
+                    triples.add(triple_ids)
+
+    def remove(self, triple_pattern, context=None):
+        if triple_pattern == (None, None, None):
+            self._clear()
+            return
+
+        for triple_ids in list(self._match(triple_pattern)):
+            if triple_ids in self._added:
+                self._added.discard(triple_ids)
+
+                for term_id, by in zip(triple_ids, self._added_by):
+                    by[term_id].discard(triple_ids)
+            else:
+                self._removed.add(triple_ids)
+
+        self._merge_if_full()
+
+    def triples(self, triple_pattern, context=None):
+        terms = self._terms
+
+        for s, p, o in self._match(triple_pattern):
+            yield (terms[s], terms[p], terms[o]), iter(())
+
+    def __len__(self, context=None):
+        return len(self._spo[0]) - len(self._removed) + len(self._added)
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def bind(self, prefix, namespace, override=True):
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace)
+
+        if not override and (bound_namespace is not None or bound_prefix is not None):
+            return
+
+        if bound_namespace is not None:
+            del self._prefix[bound_namespace]
+        if bound_prefix is not None:
+            del self._namespace[bound_prefix]
+
+        self._namespace[prefix] = namespace
+        self._prefix[namespace] = prefix
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        return iter(list(self._namespace.items()))
+
+    def _match(self, triple_pattern):
+        """
+        yields the id triples matching :param triple_pattern
+        :param triple_pattern:
+        :return:
+        """
+        ids = []
+
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+            else:
+                term_id = self._ids.get(term)
+
+                if term_id is None:
+                    return
+                ids.append(term_id)
+
+        s, p, o = ids
+
+        #the permutation that leads with the bound terms, and where s, p and o are among its columns
+        if s is not None:
+            if p is None and o is not None:
+                columns, keys, order = self._osp, (o, s), (1, 2, 0)
+            else:
+                columns, keys, order = self._spo, tuple(k for k in (s, p, o) if k is not None), (0, 1, 2)
+        elif p is not None:
+            columns, keys, order = self._pos, tuple(k for k in (p, o) if k is not None), (2, 0, 1)
+        elif o is not None:
+            columns, keys, order = self._osp, (o,), (1, 2, 0)
+        else:
+            columns, keys, order = self._spo, (), (0, 1, 2)
+
+        lo, hi = _search(columns, keys)
+
+        if lo < hi:
+            rows = zip(*(column[lo:hi].tolist() for column in columns))
+            removed = self._removed
+            i, j, k = order
+
+            for row in rows:
+                triple_ids = (row[i], row[j], row[k])
+
+                if not removed or triple_ids not in removed:
+                    yield triple_ids
+
+        if not self._added:
+            return
+
+        #the pending triples sharing the rarest bound term, or all of them if none is bound
+        candidates = self._added
+
+        for term_id, by in zip(ids, self._added_by):
+            if term_id is not None:
+                triples = by.get(term_id, ())
+                if len(triples) < len(candidates):
+                    candidates = triples
+
+        for triple_ids in list(candidates):
+            if (s is None or triple_ids[0] == s) and (p is None or triple_ids[1] == p) \
+                    and (o is None or triple_ids[2] == o):
+                yield triple_ids
+
+    def _merge_if_full(self):
+        """
+        merges the pending changes into the columns once there are enough of them
+        :return:
+        """
+        if len(self._added) + len(self._removed) >= max(MERGE_BATCH, len(self._spo[0]) >> 2):
+            self.merge()
+
+    def merge(self):
+        """
+        merges the pending additions and removals into the sorted columns
+        :return:
+        """
+        if not self._added and not self._removed:
+            return
+
+        s, p, o = self._spo
+
+        added = _columns(self._added)
+        removed = _columns(self._removed)
+
+        s = np.concatenate((s, added[0], removed[0]))
+        p = np.concatenate((p, added[1], removed[1]))
+        o = np.concatenate((o, added[2], removed[2]))
+
+        #removed rows are flagged, and sort just after the row they remove
+        flag = np.zeros(len(s), dtype=bool)
+        flag[len(s) - len(removed[0]):] = True
+
+        order = np.lexsort((flag, o, p, s))
+        s, p, o, flag = s[order], p[order], o[order], flag[order]
+
+        same = np.zeros(len(s), dtype=bool)
+        same[1:] = (s[1:] == s[:-1]) & (p[1:] == p[:-1]) & (o[1:] == o[:-1])
+
+        group = np.cumsum(~same) - 1
+        dropped = np.zeros(group[-1] + 1 if len(group) else 0, dtype=bool)
+        dropped[group[flag]] = True
+
+        keep = ~flag & ~same & ~dropped[group]
+
+        self._set_columns(s[keep], p[keep], o[keep])
+
+        self._added.clear()
+        self._removed.clear()
+
+        for by in self._added_by:
+            by.clear()
+
+    def _set_columns(self, s, p, o):
+        """
+        makes :param s, :param p and :param o, already sorted by subject, predicate then object, the columns of the
+        store, and sorts the other two permutations from them
+        :param s:
+        :param p:
+        :param o:
+        :return:
+        """
+        self._spo = (s, p, o)
+
+        order = np.lexsort((s, o, p))
+        self._pos = (p[order], o[order], s[order])
+
+        order = np.lexsort((p, s, o))
+        self._osp = (o[order], s[order], p[order])
+
+
+def _columns(triple_ids):
+    """
+    returns the subject, predicate and object id columns of :param triple_ids
+    :param triple_ids:
+    :return:
+    """
+    rows = np.array(list(triple_ids), dtype=ID).reshape(-1, 3)
+
+    return rows[:, 0], rows[:, 1], rows[:, 2]
+
+
+def _search(columns, keys):
+    """
+    returns the range of rows of the sorted :param columns whose leading columns equal :param keys, by binary searching
+    each column in turn within the range found so far
+    :param columns:
+    :param keys:
+    :return: a (lo, hi) tuple
+    """
+    lo, hi = 0, len(columns[0])
+
+    for column, key in zip(columns, keys):
+        if lo >= hi:
+            break
+
+        #a key of the column's own type, or numpy converts the whole column to search it
+        key = column.dtype.type(key)
+        part = column[lo:hi]
+        lo, hi = lo + int(part.searchsorted(key, 'left')), lo + int(part.searchsorted(key, 'right'))
+
+    return lo, hi
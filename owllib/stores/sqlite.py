@@ -0,0 +1,381 @@
+"""
+a persistent rdflib store in a local SQLite database, for ontologies too big to hold in memory, and for reopening an
+ontology without parsing it again.
+
+terms are kept once each in a terms table, and triples as three term ids.  the triples table is keyed on subject,
+predicate, object, and has predicate-object-subject and object-subject-predicate indexes besides, so every pattern the
+get_* methods ask for is an index lookup.  terms stay when the triples using them are removed, until every triple is, as
+when an ontology is loaded afresh into the same file.
+
+added triples are buffered, and written in large batches inside one transaction, which is only committed by commit or
+close.  when triples are loaded into an empty store, the two secondary indexes are dropped for the load and built once
+afterwards, on the first lookup, which is much faster than keeping them up to date row by row.
+"""
+
+import os
+import sqlite3
+
+from rdflib import URIRef, BNode, Literal
+from rdflib.store import Store, VALID_STORE, NO_STORE
+
+#kinds of term, as stored
+URI = 0
+BLANK = 1
+LITERAL = 2
+
+#added triples buffered before they are written
+BATCH = 100000
+
+#terms whose ids are remembered, to spare looking them up
+CACHE_SIZE = 1 << 20
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    lang TEXT NOT NULL DEFAULT '',
+    datatype TEXT NOT NULL DEFAULT '',
+    UNIQUE (value, kind, lang, datatype)
+);
+CREATE TABLE IF NOT EXISTS triples (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL UNIQUE
+);
+'''
+
+#run one at a time rather than as a script, which would commit the transaction they are in
+_INDEXES = ('CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s)',
+            'CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p)')
+
+_DROP_INDEXES = ('DROP INDEX IF EXISTS triples_pos',
+                 'DROP INDEX IF EXISTS triples_osp')
+
+
+class SQLiteStore(Store):
+    """
+    A triple store in a SQLite database file, for a single graph
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = True
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        """
+        :param configuration: the path of the database file, which is opened, and created if it doesn't exist
+        :param identifier:
+        :return:
+        """
+        self.identifier = identifier
+        self._connection = None
+
+        super(SQLiteStore, self).__init__(configuration)
+
+    def open(self, configuration, create=True):
+        """
+        opens the database at the path :param configuration
+        :param configuration:
+        :param create: if false, a missing database isn't created, and NO_STORE is returned
+        :return:
+        """
+        if not create and not os.path.exists(configuration):
+            return NO_STORE
+
+        self.path = configuration
+
+        self._connection = sqlite3.connect(configuration)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+        self._pending = []
+        self._ids = {}
+        self._indexed = self._has_indexes()
+
+        if not self._indexed and not self._empty():
+            self._index()
+
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        """
+        commits and closes the database.  rdflib's Graph.close doesn't ask for a commit by default, but what has been
+        written is kept regardless, as the other rdflib disk stores do; call rollback first to discard it
+        :param commit_pending_transaction:
+        :return:
+        """
+        if self._connection is None:
+            return
+
+        self.commit()
+        self._connection.close()
+        self._connection = None
+
+    def commit(self):
+        """
+        writes any buffered triples, and commits everything since the last commit
+        :return:
+        """
+        self._flush()
+        self._connection.commit()
+
+    def rollback(self):
+        """
+        drops any buffered triples, and everything written since the last commit
+        :return:
+        """
+        self._pending = []
+        self._ids = {}
+        self._connection.rollback()
+
+    def destroy(self, configuration):
+        """
+        deletes the database at the path :param configuration
+        :param configuration:
+        :return:
+        """
+        if self._connection is not None and self.path == configuration:
+            self.rollback()
+            self.close()
+
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(configuration + suffix):
+                os.remove(configuration + suffix)
+
+    def add(self, triple, context=None, quoted=False):
+        self._pending.append(triple)
+
+        if len(self._pending) >= BATCH:
+            self._flush()
+
+    def addN(self, quads):
+        pending = self._pending
+
+        for s, p, o, _ in quads:
+            pending.append((s, p, o))
+
+            if len(pending) >= BATCH:
+                self._flush()
+                pending = self._pending
+
+    def remove(self, triple_pattern, context=None):
+        """
+        removes the triples matching :param triple_pattern.  removing every triple, as loading an ontology afresh does,
+        drops the terms too; other removals leave their terms, to be reused if they are added again
+        :param triple_pattern:
+        :param context:
+        :return:
+        """
+        self._flush()
+
+        if triple_pattern == (None, None, None):
+            self._connection.execute('DELETE FROM triples')
+            self._connection.execute('DELETE FROM terms')
+            self._ids = {}
+            return
+
+        where, parameters = self._where(triple_pattern)
+
+        if where is not None:
+            self._connection.execute('DELETE FROM triples AS t' + where, parameters)
+
+    def triples(self, triple_pattern, context=None):
+        self._flush()
+        self._index()
+
+        where, parameters = self._where(triple_pattern)
+
+        if where is None:
+            return
+
+        #only the unbound terms are read back; the bound ones are the pattern's own
+        columns = []
+        joins = []
+
+        for name, term in zip('spo', triple_pattern):
+            if term is None:
+                columns.append('%s.kind, %s.value, %s.lang, %s.datatype' % (name, name, name, name))
+                joins.append(' CROSS JOIN terms AS %s ON %s.id = t.%s' % (name, name, name))
+
+        if not columns:
+            for _ in self._connection.execute('SELECT 1 FROM triples AS t' + where, parameters):
+                yield triple_pattern, iter(())
+            return
+
+        query = 'SELECT ' + ', '.join(columns) + ' FROM triples AS t' + ''.join(joins) + where
+
+        for row in self._connection.execute(query, parameters):
+            values = iter(row)
+            triple = []
+
+            for term in triple_pattern:
+                if term is None:
+                    term = _decode(next(values), next(values), next(values), next(values))
+                triple.append(term)
+
+            yield tuple(triple), iter(())
+
+    def __len__(self, context=None):
+        self._flush()
+        return self._count()
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def bind(self, prefix, namespace, override=True):
+        prefix = str(prefix)
+        namespace = str(namespace)
+
+        if override:
+            self._connection.execute('DELETE FROM namespaces WHERE prefix = ? OR namespace = ?', (prefix, namespace))
+            self._connection.execute('INSERT INTO namespaces VALUES (?, ?)', (prefix, namespace))
+        else:
+            self._connection.execute('INSERT OR IGNORE INTO namespaces VALUES (?, ?)', (prefix, namespace))
+
+    def namespace(self, prefix):
+        row = self._connection.execute('SELECT namespace FROM namespaces WHERE prefix = ?', (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace):
+        row = self._connection.execute('SELECT prefix FROM namespaces WHERE namespace = ?',
+                                       (str(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self):
+        for prefix, namespace in self._connection.execute('SELECT prefix, namespace FROM namespaces').fetchall():
+            yield prefix, URIRef(namespace)
+
+    def _count(self):
+        return self._connection.execute('SELECT COUNT(*) FROM triples').fetchone()[0]
+
+    def _empty(self):
+        return self._connection.execute('SELECT 1 FROM triples LIMIT 1').fetchone() is None
+
+    def _has_indexes(self):
+        """
+        returns true if the secondary indexes exist
+        :return:
+        """
+        rows = self._connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'triples'"
+                                        " AND name IN ('triples_pos', 'triples_osp')").fetchall()
+        return len(rows) == 2
+
+    def _index(self):
+        """
+        builds the secondary indexes, if they were dropped for a bulk load
+        :return:
+        """
+        if not self._indexed:
+            for statement in _INDEXES:
+                self._connection.execute(statement)
+            self._indexed = True
+
+    def _flush(self):
+        """
+        writes the buffered triples.  the first write to an empty store drops the secondary indexes until the next
+        lookup
+        :return:
+        """
+        if not self._pending:
+            return
+
+        if self._indexed and self._empty():
+            for statement in _DROP_INDEXES:
+                self._connection.execute(statement)
+            self._indexed = False
+
+        term_id = self._id
+        rows = [(term_id(s), term_id(p), term_id(o)) for s, p, o in self._pending]
+        self._pending = []
+
+        self._connection.executemany('INSERT OR IGNORE INTO triples VALUES (?, ?, ?)', rows)
+
+    def _id(self, term, create=True):
+        """
+        returns the id of :param term, adding it to the terms table if it is new and :param create is true
+        :param term:
+        :param create:
+        :return: the id, or None if the term isn't stored and :param create is false
+        """
+        term_id = self._ids.get(term)
+
+        if term_id is not None:
+            return term_id
+
+        key = _encode(term)
+        row = self._connection.execute('SELECT id FROM terms '
+                                       'WHERE value = ? AND kind = ? AND lang = ? AND datatype = ?', key).fetchone()
+
+        if row is not None:
+            term_id = row[0]
+        elif create:
+            term_id = self._connection.execute('INSERT INTO terms (value, kind, lang, datatype) VALUES (?, ?, ?, ?)',
+                                               key).lastrowid
+        else:
+            return None
+
+        if len(self._ids) >= CACHE_SIZE:
+            self._ids = {}
+        self._ids[term] = term_id
+
+        return term_id
+
+    def _where(self, triple_pattern):
+        """
+        returns the where clause matching :param triple_pattern, and its parameters; the clause is None if a bound
+        term isn't in the store, so nothing can match
+        :param triple_pattern:
+        :return:
+        """
+        clauses = []
+        parameters = []
+
+        for name, term in zip('spo', triple_pattern):
+            if term is not None:
+                term_id = self._id(term, create=False)
+
+                if term_id is None:
+                    return None, None
+
+                clauses.append('t.%s = ?' % name)
+                parameters.append(term_id)
+
+        if not clauses:
+            return '', parameters
+
+        return ' WHERE ' + ' AND '.join(clauses), parameters
+
+
+def _encode(term):
+    """
+    returns the value, kind, language and datatype :param term is stored as
+    :param term:
+    :return:
+    """
+    if isinstance(term, Literal):
+        return str(term), LITERAL, term.language or '', str(term.datatype or '')
+    if isinstance(term, BNode):
+        return str(term), BLANK, '', ''
+
+    return str(term), URI, '', ''
+
+
+def _decode(kind, value, lang, datatype):
+    """
+    returns the term stored as :param kind, :param value, :param lang and :param datatype
+    :return:
+    """
+    if kind == URI:
+        return URIRef(value)
+    if kind == BLANK:
+        return BNode(value)
+
+    return Literal(value, lang=lang or None, datatype=datatype or None)
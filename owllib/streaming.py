@@ -0,0 +1,460 @@
+"""
+walks the entities of an ontology document without loading it into a graph.  the document is parsed a chunk at a time,
+and its triples grouped by subject; each subject block that declares an entity is turned into an owllib entity, with its
+labels, comments, definitions, annotations and triples, and yielded as soon as the block is complete.
+
+documents whose triples are grouped by subject, as Turtle and RDF/XML written by most tools are, and as N-Triples are
+once sorted, are streamed in memory bounded by the chunk size and the window of subjects kept open.  for documents that
+aren't, the triples are first spilled to temporary files partitioned by subject, then grouped a partition at a time.
+"""
+
+import codecs
+import io
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import urllib.request as url
+from collections import OrderedDict
+from xml.sax.xmlreader import InputSource
+
+from rdflib import RDF, RDFS, OWL
+from rdflib.plugins.parsers.notation3 import SinkParser, RDFSink
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.plugins.parsers.rdfxml import create_parser
+from rdflib.util import guess_format
+
+from owllib import formats
+from owllib.cache import is_remote
+from owllib.entities import *
+
+#formats that can be parsed a chunk at a time
+STREAMABLE = ('nt', 'turtle', 'xml')
+
+#bytes read from the document at a time
+CHUNK_SIZE = 1 << 20
+
+#subjects whose blocks are kept open at once; a subject not seen among the most recent this many is taken to be complete
+WINDOW = 64
+
+#temporary files the triples of an ungrouped document are spread over
+PARTITIONS = 64
+
+#triples held for each temporary file before they are written to it
+SPILL_BATCH = 1024
+
+#the characters that start or end something a Turtle statement can't end inside
+_SPECIAL = re.compile(r'[#<"\'\[\]().]')
+
+#the entity each rdf:type declares, as in the Ontology._load_* methods
+ENTITY_TYPES = OrderedDict([(OWL.Class, Class),
+                            (OWL.Restriction, Class),
+                            (OWL.NamedIndividual, Individual),
+                            (OWL.ObjectProperty, ObjectProperty),
+                            (OWL.AnnotationProperty, AnnotationProperty),
+                            (OWL.DatatypeProperty, DataProperty)])
+
+
+def iter_entities(location, format=None, grouped=True, window=WINDOW, partitions=PARTITIONS, directory=None):
+    """
+    yields the entities declared in the document at :param location, each with the labels, comments, definitions,
+    annotations and triples it is the subject of.  the entities belong to no ontology, so their parents and children
+    are empty; their rdfs:subClassOf and similar triples are among their triples.  as with Ontology.get_annotations,
+    their annotations are those with a property the document declares an owl:AnnotationProperty; when the document is
+    streamed grouped, only those declared before the entity's block are known
+    :param location: a file path, or an http(s) url
+    :param format: 'nt', 'turtle' or 'xml'; guessed from the content type, file extension or content if not given
+    :param grouped: true if each subject's triples are together in the document.  if false, the triples are spilled
+    to disk and grouped there first
+    :param window: see WINDOW
+    :param partitions: see PARTITIONS
+    :param directory: where to spill triples to; a temporary directory by default
+    :return:
+    """
+    annotations = set()
+
+    if grouped:
+        blocks = _group(_declaring(iter_triples(location, format), annotations), window)
+    else:
+        blocks = _spill(_declaring(iter_triples(location, format), annotations), partitions, directory)
+
+    for subject, triples in blocks:
+        for entity in _entities(subject, triples, annotations):
+            yield entity
+
+
+def iter_triples(location, format=None):
+    """
+    yields the triples of the document at :param location, parsing it a chunk at a time
+    :param location:
+    :param format: see iter_entities
+    :return:
+    """
+    stream, content_type = open_source(location)
+
+    with stream:
+        head = stream.peek(formats.SNIFF_SIZE)[:formats.SNIFF_SIZE] if hasattr(stream, 'peek') else b''
+
+        format = format or formats.format_from_content_type(content_type) or guess_format(str(location)) \
+            or formats.sniff_format(head)
+
+        if format not in STREAMABLE:
+            raise ValueError("Only N-Triples, Turtle and RDF/XML can be streamed.  Found " + str(format))
+
+        if format == 'nt':
+            parse = _parse_ntriples
+        elif format == 'turtle':
+            parse = _parse_turtle
+        else:
+            parse = _parse_xml
+
+        for triples in parse(stream, str(location)):
+            for triple in triples:
+                yield triple
+
+
+class _Collector:
+    """
+    stands in for the graph an rdflib parser writes to, keeping the triples until they are taken
+    """
+
+    def __init__(self):
+        self.triples = []
+
+    def add(self, triple):
+        self.triples.append(triple)
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+    def bind(self, prefix, namespace, override=True):
+        pass
+
+    def take(self):
+        """
+        returns the triples collected since the last take
+        :return:
+        """
+        triples = self.triples
+        self.triples = []
+        return triples
+
+
+def open_source(location):
+    """
+    opens :param location, a path, file:// url or remote url, for reading as bytes, a chunk at a time
+    :param location:
+    :return: the stream and its content type, if known
+    """
+    location = str(location)
+
+    if is_remote(location):
+        response = url.urlopen(url.Request(location, headers={'Accept': formats.ACCEPT}))
+        return io.BufferedReader(response, CHUNK_SIZE), response.headers.get('Content-Type')
+
+    if location.startswith('file://'):
+        location = url.url2pathname(location[len('file://'):])
+
+    return open(location, 'rb', CHUNK_SIZE), None
+
+
+def _chunks(stream):
+    """
+    yields the text of :param stream a chunk at a time
+    :param stream:
+    :return:
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+
+    for data in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        yield decoder.decode(data)
+
+    yield decoder.decode(b'', True)
+
+
+def _parse_ntriples(stream, location):
+    """
+    yields lists of the triples in the N-Triples :param stream, a chunk of whole lines at a time
+    :param stream:
+    :param location:
+    :return:
+    """
+    collector = _Collector()
+    parser = W3CNTriplesParser(collector)
+    bnodes = {}
+    rest = ''
+
+    for text in _chunks(stream):
+        text = rest + text
+        end = text.rfind('\n') + 1
+        rest = text[end:]
+
+        parser.parse(io.StringIO(text[:end]), bnode_context=bnodes)
+        yield collector.take()
+
+    if rest.strip():
+        parser.parse(io.StringIO(rest), bnode_context=bnodes)
+        yield collector.take()
+
+
+def _parse_turtle(stream, location):
+    """
+    yields lists of the triples in the Turtle :param stream, a chunk of whole statements at a time
+    :param stream:
+    :param location:
+    :return:
+    """
+    collector = _Collector()
+    parser = SinkParser(RDFSink(collector), baseURI=_base(location), turtle=True)
+    parser.startDoc()
+    rest = ''
+
+    for text in _chunks(stream):
+        text = rest + text
+        end = _statements_end(text)
+        rest = text[end:]
+
+        parser.feed(text[:end])
+        yield collector.take()
+
+    if rest.strip():
+        parser.feed(rest)
+
+    parser.endDoc()
+    yield collector.take()
+
+
+def _parse_xml(stream, location):
+    """
+    yields lists of the triples in the RDF/XML :param stream, as each chunk of it is parsed
+    :param stream:
+    :param location:
+    :return:
+    """
+    collector = _Collector()
+    parser = create_parser(InputSource(_base(location)), collector)
+
+    for data in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        parser.feed(data)
+        yield collector.take()
+
+    parser.close()
+    yield collector.take()
+
+
+def _base(location):
+    """
+    returns the base uri that relative uris in the document at :param location resolve against
+    :param location:
+    :return:
+    """
+    if is_remote(location) or location.startswith('file://'):
+        return location
+
+    return 'file://' + url.pathname2url(os.path.abspath(location))
+
+
+def _statements_end(text):
+    """
+    returns where the last complete Turtle statement in :param text ends, skipping over iris, strings, comments and
+    nested blank nodes and collections
+    :param text:
+    :return:
+    """
+    end = 0
+    depth = 0
+    length = len(text)
+
+    match = _SPECIAL.search(text)
+
+    while match:
+        i = match.start()
+        char = text[i]
+
+        if char == '#':
+            i = text.find('\n', i)
+            if i < 0:
+                break
+        elif char == '<':
+            i = text.find('>', i)
+            if i < 0:
+                break
+        elif char == '"' or char == "'":
+            quote = char * 3 if text.startswith(char * 3, i) else char
+            i = _string_end(text, i + len(quote), quote)
+            if i < 0:
+                break
+        elif char == '[' or char == '(':
+            depth += 1
+        elif char == ']' or char == ')':
+            depth -= 1
+        elif char == '.' and depth == 0 and i + 1 < length and text[i + 1] in ' \t\r\n#':
+            end = i + 1
+
+        match = _SPECIAL.search(text, i + 1)
+
+    return end
+
+
+def _string_end(text, start, quote):
+    """
+    returns where the last character of the :param quote closing a string begun at :param start is, or -1 if the
+    string isn't closed in :param text
+    :param text:
+    :param start:
+    :param quote:
+    :return:
+    """
+    i = start
+
+    while True:
+        i = text.find(quote, i)
+        if i < 0:
+            return -1
+
+        #a quote after an odd number of backslashes is escaped
+        escapes = 0
+        while i - escapes - 1 >= start and text[i - escapes - 1] == '\\':
+            escapes += 1
+
+        if escapes % 2 == 0:
+            return i + len(quote) - 1
+
+        i += 1
+
+
+def _declaring(triples, annotations):
+    """
+    passes :param triples through, adding each annotation property they declare to :param annotations
+    :param triples:
+    :param annotations:
+    :return:
+    """
+    for triple in triples:
+        if triple[2] == OWL.AnnotationProperty and triple[1] == RDF.type:
+            annotations.add(triple[0])
+
+        yield triple
+
+
+def _group(triples, window):
+    """
+    yields (subject, triples) blocks from :param triples that are grouped by subject.  a block is complete once
+    :param window other subjects have been seen since its own
+    :param triples:
+    :param window:
+    :return:
+    """
+    blocks = OrderedDict()
+
+    for triple in triples:
+        subject = triple[0]
+        block = blocks.get(subject)
+
+        if block is None:
+            block = blocks[subject] = []
+
+            if len(blocks) > window:
+                yield blocks.popitem(last=False)
+        else:
+            blocks.move_to_end(subject)
+
+        block.append(triple)
+
+    while blocks:
+        yield blocks.popitem(last=False)
+
+
+def _spill(triples, partitions, directory=None):
+    """
+    yields (subject, triples) blocks from :param triples in any order, by spreading them over :param partitions
+    temporary files by subject, then grouping one file at a time
+    :param triples:
+    :param partitions:
+    :param directory:
+    :return:
+    """
+    directory = tempfile.mkdtemp(prefix='owllib-', dir=directory)
+
+    try:
+        paths = [os.path.join(directory, '%d.part' % i) for i in range(partitions)]
+        buffers = [[] for _ in paths]
+
+        def flush(i):
+            with open(paths[i], 'ab') as f:
+                pickle.dump(buffers[i], f, pickle.HIGHEST_PROTOCOL)
+            buffers[i] = []
+
+        for triple in triples:
+            i = hash(triple[0]) % partitions
+            buffers[i].append(triple)
+
+            if len(buffers[i]) >= SPILL_BATCH:
+                flush(i)
+
+        for i, buffer in enumerate(buffers):
+            if buffer:
+                flush(i)
+
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+
+            blocks = {}
+
+            with open(path, 'rb') as f:
+                while True:
+                    try:
+                        batch = pickle.load(f)
+                    except EOFError:
+                        break
+
+                    for triple in batch:
+                        blocks.setdefault(triple[0], []).append(triple)
+
+            os.remove(path)
+
+            for block in blocks.items():
+                yield block
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _entities(subject, triples, annotations):
+    """
+    returns the entities the block of :param triples about :param subject declares, filled in from the block
+    :param subject:
+    :param triples:
+    :param annotations: the annotation properties known so far
+    :return:
+    """
+    kinds = []
+
+    for _, pred, obj in triples:
+        if pred == RDF.type:
+            kind = ENTITY_TYPES.get(obj)
+
+            if kind is not None and kind not in kinds:
+                kinds.append(kind)
+
+    entities = []
+
+    for kind in kinds:
+        entity = kind(uri=subject)
+
+        for _, pred, obj in triples:
+            if pred in annotations:
+                entity.annotations.add((pred, obj))
+
+            if pred == RDFS.label:
+                entity.labels.add(obj)
+            elif pred == RDFS.comment:
+                entity.comments.add(obj)
+            elif pred == DEFINITION:
+                entity.definitions.add(obj)
+
+        entity._triples = TripleSet(entity, triples)
+        entities.append(entity)
+
+    return entities
@@ -0,0 +1,218 @@
+"""
+builds entities from a table of terms, a TSV or CSV file with a row per entity, as it is read a row at a time.
+
+    ontology.load_table('terms.tsv', prefixes={'EX': 'http://example.org/EX_'})
+
+the first row names the columns.  those known, in any case, are:
+
+    id          the entity's IRI; a CURIE with one of the prefixes given; or a name relative to the base given
+    label       an rdfs:label
+    comment     an rdfs:comment
+    definition  an IAO definition
+    parent      the IRI or CURIE of a parent: a super class of a class, a super property of a property, or the type of
+                an individual
+
+other columns are left out, unless mapped to one of those.  a cell can hold several values split by a separator, by
+default '|', e.g. for several parents.  rows without an id, such as blank lines, are skipped.
+
+each entity comes with the labels, comments and definitions of its row, and with its triples: its declaration, and one
+for each value, so Ontology.add_entities writes them to the graph a batch at a time, with nothing looked up per entity.
+"""
+
+import csv
+import io
+import itertools
+import os
+from collections import OrderedDict
+
+from rdflib import RDF, RDFS, OWL, Literal, URIRef
+
+from owllib.entities import *
+from owllib.streaming import open_source
+
+#splits the values of a cell
+SEPARATOR = '|'
+
+#column names, in lower case, to what they hold; see the module docstring
+COLUMNS = {'id': 'id',
+           'iri': 'id',
+           'uri': 'id',
+           'label': 'label',
+           'comment': 'comment',
+           'definition': 'definition',
+           'parent': 'parent',
+           'subclassof': 'parent'}
+
+#the rdf:type declaring each kind of entity, as in owllib.streaming.ENTITY_TYPES
+DECLARATIONS = OrderedDict([(Class, OWL.Class),
+                            (Individual, OWL.NamedIndividual),
+                            (ObjectProperty, OWL.ObjectProperty),
+                            (AnnotationProperty, OWL.AnnotationProperty),
+                            (DataProperty, OWL.DatatypeProperty)])
+
+#file extensions to the delimiter of their columns
+DELIMITERS = {'.tsv': '\t', '.tab': '\t', '.csv': ','}
+
+#the predicates of the values of each column, and the attribute of the entity they are kept in
+_ANNOTATIONS = (('label', RDFS.label, '_labels'),
+                ('comment', RDFS.comment, '_comments'),
+                ('definition', DEFINITION, '_definitions'))
+
+
+def iter_table(location, kind=Class, delimiter=None, columns=None, prefixes=None, base=None, separator=SEPARATOR,
+               lang=None):
+    """
+    yields an entity for each row of the table at :param location, as it is read
+    :param location: a file path, an http(s) url, or a text file object
+    :param kind: the class of the entities, e.g. Class or Individual
+    :param delimiter: the delimiter of the columns; guessed from the file extension, or else the first row, if not
+    given
+    :param columns: column names to what they hold, 'id', 'label', 'comment', 'definition' or 'parent', on top of
+    COLUMNS; a name mapped to None is left out
+    :param prefixes: the prefixes of the CURIEs in the table, to their namespaces
+    :param base: the namespace ids that are neither IRIs nor CURIEs are relative to
+    :param separator: splits the values of a cell
+    :param lang: the language tag of the labels, comments and definitions
+    :return:
+    """
+    declaration = DECLARATIONS.get(kind)
+
+    if declaration is None:
+        raise TypeError("Only classes, individuals and object, annotation and data properties can be read from a "
+                        "table.  Found " + getattr(kind, '__name__', type(kind).__name__))
+
+    if kind is Class:
+        parent_predicate = RDFS.subClassOf
+    elif kind is Individual:
+        parent_predicate = RDF.type
+    else:
+        parent_predicate = RDFS.subPropertyOf
+
+    roles = dict(COLUMNS)
+    roles.update((name.strip().lower(), role) for name, role in (columns or {}).items())
+
+    prefixes = prefixes or {}
+
+    stream, close = _open_text(location)
+
+    try:
+        #a byte order mark, as spreadsheets write, is dropped
+        first = stream.readline().lstrip('\ufeff')
+
+        if delimiter is None:
+            delimiter = _delimiter(location, first)
+
+        rows = csv.reader(itertools.chain([first], stream), delimiter=delimiter)
+        header = next(rows, None)
+
+        if header is None:
+            return
+
+        #each role to the positions of the columns holding it
+        positions = {}
+
+        for position, name in enumerate(header):
+            role = roles.get(name.strip().lower())
+
+            if role is not None:
+                positions.setdefault(role, []).append(position)
+
+        if 'id' not in positions:
+            raise ValueError("A table needs an id column.  Found " + ', '.join(header))
+
+        def values(row, role):
+            found = []
+
+            for position in positions.get(role, ()):
+                if position < len(row):
+                    found.extend(value.strip() for value in row[position].split(separator) if value.strip())
+
+            return found
+
+        for row in rows:
+            ids = values(row, 'id')
+
+            if not ids:
+                continue
+
+            uri = _term(ids[0], prefixes, base)
+
+            entity = kind(uri=uri)
+            triples = [(uri, RDF.type, declaration)]
+
+            for role, predicate, attribute in _ANNOTATIONS:
+                literals = [Literal(value, lang=lang) for value in values(row, role)]
+
+                if literals:
+                    setattr(entity, attribute, set(literals))
+                    triples.extend((uri, predicate, literal) for literal in literals)
+
+            for parent in values(row, 'parent'):
+                triples.append((uri, parent_predicate, _term(parent, prefixes, base)))
+
+            entity._triples = TripleSet(entity, triples)
+
+            yield entity
+    finally:
+        if close:
+            stream.close()
+
+
+def _open_text(location):
+    """
+    opens :param location for reading as text, unless it is open already
+    :param location:
+    :return: the stream, and whether it is to be closed once read
+    """
+    if hasattr(location, 'readline'):
+        return location, False
+
+    stream, _ = open_source(location)
+
+    return io.TextIOWrapper(stream, encoding='utf-8', newline=''), True
+
+
+def _delimiter(location, first):
+    """
+    returns the delimiter of the table at :param location: that of its file extension, or else a tab if :param first,
+    the header row, has one, and a comma if not
+    :param location:
+    :param first:
+    :return:
+    """
+    if isinstance(location, str):
+        delimiter = DELIMITERS.get(os.path.splitext(location.split('?')[0])[1].lower())
+
+        if delimiter is not None:
+            return delimiter
+
+    return '\t' if '\t' in first else ','
+
+
+def _term(value, prefixes, base):
+    """
+    returns the IRI :param value is: an IRI, possibly in angle brackets; a CURIE with one of :param prefixes; or a
+    name relative to :param base
+    :param value:
+    :param prefixes:
+    :param base:
+    :return:
+    """
+    if value.startswith('<') and value.endswith('>'):
+        return URIRef(value[1:-1])
+
+    if ':' in value:
+        prefix, local = value.split(':', 1)
+
+        if prefix in prefixes:
+            return URIRef(prefixes[prefix] + local)
+
+        if local.startswith('//') or prefix in ('urn', 'mailto'):
+            return URIRef(value)
+
+        raise ValueError("Not an IRI, or a CURIE with a known prefix.  Found " + value)
+
+    if base is None:
+        raise ValueError("A name needs a base to be an IRI.  Found " + value)
+
+    return URIRef(base + value)
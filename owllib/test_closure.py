@@ -0,0 +1,134 @@
+"""
+checks that a closure view, refreshed as its ontologies' entities are changed and synced, or their graphs changed
+directly, knows which ontologies mention each uri just as one built from scratch would; and that changes synced through
+an ontology are caught up with without comparing every uri again.  runs under pytest, or with
+python -m owllib.test_closure
+"""
+
+import random
+
+from rdflib import RDF, RDFS, OWL, BNode, Literal, URIRef
+
+from owllib.closure import ClosureView
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+CLASSES = [URIRef(EX + 'C%d' % i) for i in range(12)]
+
+SEEDS = range(10)
+
+
+def _ontology(name, classes):
+    """
+    returns an ontology named :param name declaring :param classes
+    :param name:
+    :param classes:
+    :return:
+    """
+    ont = Ontology()
+    ont.load(data=''.join('<%s> a <%s> .\n' % (cls, OWL.Class) for cls in classes), format='turtle')
+    ont.uri = URIRef(EX + name)
+
+    return ont
+
+
+def _expected(view):
+    """
+    returns each uri the members of :param view mention, to the set of members mentioning it, from their graphs
+    :param view:
+    :return:
+    """
+    expected = {}
+
+    for member in view.members:
+        for triple in member.graph:
+            for term in triple:
+                if not isinstance(term, Literal):
+                    expected.setdefault(term, set()).add(member)
+
+    return expected
+
+
+def _check(view):
+    expected = _expected(view)
+
+    assert set(view._holders) == set(expected)
+
+    for uri, members in expected.items():
+        assert set(view.holders(uri)) == members, uri
+        assert len(view.holders(uri)) == len(members), uri
+
+
+def _edit(ont, rng):
+    """
+    changes a random class of :param ont, adding a triple or taking one away, as a user of the entities would
+    :param ont:
+    :param rng:
+    :return:
+    """
+    cls = rng.choice(sorted(ont.classes, key=lambda entity: str(entity.uri)))
+    uri = cls.uri
+    own = sorted(triple for triple in cls.triples if triple[1] != RDF.type)
+
+    if own and rng.random() < 0.4:
+        cls.triples.discard(own[0])
+    elif rng.random() < 0.5:
+        cls.triples.add((uri, RDFS.subClassOf, rng.choice(CLASSES)))
+    elif rng.random() < 0.5:
+        cls.triples.add((uri, RDFS.seeAlso, BNode()))
+    else:
+        cls.triples.add((uri, RDFS.label, Literal(str(rng.random()))))
+
+    ont.sync_to_graph()
+
+
+def test_refresh():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+
+        #each declaring some classes the other only mentions
+        ont = _ontology('a', CLASSES[:8])
+        imported = _ontology('b', CLASSES[4:])
+        ont.direct_imports.add(imported)
+        ont.sync_to_graph()
+
+        view = ont.closure_view()
+        _check(view)
+
+        #counts the members whose uris were all compared again
+        rescans = []
+        view._refresh_holders = lambda member, refresh=view._refresh_holders: (rescans.append(member),
+                                                                               refresh(member))
+
+        for step in range(30):
+            _edit(rng.choice([ont, imported]), rng)
+
+            assert ont.closure_view() is view
+            _check(view)
+
+        assert rescans == [], seed
+
+        #changed without the ontology knowing, so there is nothing to catch up from but the graph
+        imported.graph.add((CLASSES[-1], RDFS.comment, CLASSES[-2]))
+
+        ont.closure_view()
+        _check(view)
+        assert rescans == [imported], seed
+
+        #and the counts start again from there
+        _edit(imported, rng)
+        ont.closure_view()
+        _check(view)
+        assert rescans == [imported], seed
+
+        #the same as one built from scratch, though perhaps in another order
+        built = ClosureView(ont)
+
+        assert set(view._holders) == set(built._holders)
+        assert all(set(view.holders(uri)) == set(built.holders(uri)) for uri in built._holders)
+
+
+if __name__ == '__main__':
+    test_refresh()
+    print("closure ok")
@@ -0,0 +1,217 @@
+"""
+checks that diffing matches blank nodes by what they say rather than by id: a graph is unchanged against a copy with
+its blank nodes relabelled, and an edit anywhere, even deep inside a restriction or a list, is found as the axioms it
+changes.  runs under pytest, or with python -m owllib.test_diff
+"""
+
+import random
+
+from rdflib import Graph, RDF, RDFS, OWL, BNode, Literal, URIRef
+from rdflib.collection import Collection
+
+from owllib.diff import axioms, diff_graphs
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+CLASSES = [URIRef(EX + 'C%d' % i) for i in range(6)]
+PROPERTIES = [URIRef(EX + 'p%d' % i) for i in range(3)]
+
+SEEDS = range(25)
+
+
+def _restriction(graph, rng, depth):
+    """
+    adds a random restriction to :param graph, its filler a class, another restriction, or an intersection
+    :param graph:
+    :param rng:
+    :param depth: how many more blank nodes deep it may go
+    :return: the blank node of the restriction
+    """
+    node = BNode()
+    graph.add((node, RDF.type, OWL.Restriction))
+    graph.add((node, OWL.onProperty, rng.choice(PROPERTIES)))
+
+    kind = rng.random() if depth > 0 else 0
+
+    if kind < 0.5:
+        filler = rng.choice(CLASSES)
+    elif kind < 0.75:
+        filler = _restriction(graph, rng, depth - 1)
+    else:
+        filler = BNode()
+        graph.add((filler, RDF.type, OWL.Class))
+
+        items = [rng.choice(CLASSES), _restriction(graph, rng, depth - 1)]
+        head = BNode()
+        Collection(graph, head, items)
+        graph.add((filler, OWL.intersectionOf, head))
+
+    graph.add((node, rng.choice([OWL.someValuesFrom, OWL.allValuesFrom]), filler))
+
+    return node
+
+
+def _random_graph(rng):
+    """
+    returns a random graph of classes with labels, parents and restrictions, and an owl:AllDisjointClasses axiom, a
+    blank node nothing refers to
+    :param rng:
+    :return:
+    """
+    graph = Graph()
+
+    for cls in CLASSES:
+        graph.add((cls, RDF.type, OWL.Class))
+
+        if rng.random() < 0.5:
+            graph.add((cls, RDFS.label, Literal(cls[-2:], lang='en')))
+
+        for _ in range(rng.randint(0, 3)):
+            parent = rng.choice(CLASSES) if rng.random() < 0.4 else _restriction(graph, rng, 2)
+            graph.add((cls, RDFS.subClassOf, parent))
+
+    disjoint = BNode()
+    graph.add((disjoint, RDF.type, OWL.AllDisjointClasses))
+    members = BNode()
+    Collection(graph, members, rng.sample(CLASSES, 3))
+    graph.add((disjoint, OWL.members, members))
+
+    return graph
+
+
+def _relabelled(graph):
+    """
+    returns a copy of :param graph with every blank node given a new id, as parsing it again would
+    :param graph:
+    :return:
+    """
+    labels = {}
+
+    def relabel(term):
+        if isinstance(term, BNode):
+            return labels.setdefault(term, BNode())
+        return term
+
+    copy = Graph()
+    copy.addN((relabel(s), relabel(p), relabel(o), copy) for s, p, o in graph)
+
+    return copy
+
+
+def _expanded(graph, term):
+    """
+    returns :param term with each blank node written out as the set of what it says, recursively; the graphs here
+    have no cycles of blank nodes
+    :param graph:
+    :param term:
+    :return:
+    """
+    if not isinstance(term, BNode):
+        return term
+
+    return frozenset((p, _expanded(graph, o)) for p, o in graph.predicate_objects(term))
+
+
+def _expected_axioms(graph):
+    """
+    returns the axioms of :param graph written out with _expanded, worked out without hashing
+    :param graph:
+    :return: a dict of the written out axiom to its triple
+    """
+    referenced = set(o for _, _, o in graph if isinstance(o, BNode))
+
+    return dict(((_expanded(graph, s), p, _expanded(graph, o)), (s, p, o)) for s, p, o in graph
+                if s not in referenced)
+
+
+def test_relabelled():
+    for seed in SEEDS:
+        graph = _random_graph(random.Random(seed))
+        copy = _relabelled(graph)
+
+        #no triple with a blank node is in both
+        assert not set(copy) & set(triple for triple in graph if any(isinstance(term, BNode) for term in triple))
+
+        changes = diff_graphs(graph, copy)
+
+        assert not changes, (seed, changes.added, changes.removed)
+        assert set(axioms(graph)) == set(axioms(copy)), seed
+
+
+def test_edited():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        graph = _random_graph(rng)
+        copy = _relabelled(graph)
+
+        #a change deep among the blank nodes, which aren't axioms themselves, changes the axioms they are part of
+        for _ in range(rng.randint(1, 3)):
+            s, p, o = rng.choice(sorted(triple for triple in copy if isinstance(triple[0], BNode)))
+            copy.remove((s, p, o))
+            copy.add((s, p, rng.choice(CLASSES + [BNode()])))
+
+        old = _expected_axioms(graph)
+        new = _expected_axioms(copy)
+
+        changes = diff_graphs(graph, copy)
+
+        assert set(changes.removed) == set(old[key] for key in old.keys() - new.keys()), seed
+        assert set(changes.added) == set(new[key] for key in new.keys() - old.keys()), seed
+
+        #a plain triple added and removed is found as itself
+        copy = _relabelled(graph)
+        removed = (CLASSES[0], RDF.type, OWL.Class)
+        added = (CLASSES[1], RDFS.comment, Literal(str(seed)))
+        copy.remove(removed)
+        copy.add(added)
+
+        changes = diff_graphs(graph, copy)
+
+        assert changes.removed == [removed] and changes.added == [added], seed
+
+
+def test_entities():
+    old = Ontology()
+    old.load(data='''@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.org/> .
+ex:A a owl:Class .
+ex:B a owl:Class ; rdfs:subClassOf [ a owl:Restriction ; owl:onProperty ex:p ; owl:someValuesFrom ex:A ] .
+ex:C a owl:Class .
+ex:p a owl:ObjectProperty .
+''', format='turtle')
+
+    new = Ontology()
+    new.load(data='''@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.org/> .
+ex:A a owl:Class .
+ex:B a owl:Class ; rdfs:subClassOf [ a owl:Restriction ; owl:onProperty ex:p ; owl:someValuesFrom ex:D ] .
+ex:D a owl:Class .
+ex:p a owl:ObjectProperty .
+''', format='turtle')
+
+    changes = old.diff(new)
+
+    assert changes.added_entities == {URIRef(EX + 'D')}
+    assert changes.removed_entities == {URIRef(EX + 'C')}
+    assert set(changes.modified_entities) == {URIRef(EX + 'B')}
+
+    change = changes.modified_entities[URIRef(EX + 'B')]
+
+    assert len(change.added_objects(RDFS.subClassOf)) == 1
+    assert len(change.removed_objects(RDFS.subClassOf)) == 1
+
+    #parsed again, with new blank node ids, nothing changed
+    again = Ontology()
+    again.load(data=old.graph.serialize(format='turtle'), format='turtle')
+
+    assert not old.diff(again)
+
+
+if __name__ == '__main__':
+    test_relabelled()
+    test_edited()
+    test_entities()
+    print("diff ok")
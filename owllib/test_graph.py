@@ -0,0 +1,144 @@
+"""
+checks that an OntologyGraph holds one instance of each uri and blank node, and lets go of the ones no triple is left in
+however the triples go; and that every change gives a graph a new version.  runs under pytest, or with
+python -m owllib.test_graph
+"""
+
+import random
+
+from rdflib import BNode, Literal, URIRef
+
+from owllib import graph as graphs
+from owllib.graph import OntologyGraph
+
+EX = 'http://example.org/'
+
+TERMS = [URIRef(EX + 't%d' % i) for i in range(6)] + [BNode('b0'), BNode('b1')]
+
+SEEDS = range(20)
+
+
+def _random_triple(rng):
+    return rng.choice(TERMS), URIRef(rng.choice(TERMS[:3])), rng.choice(TERMS + [Literal('x')])
+
+
+def _check(graph):
+    """
+    asserts that the terms :param graph interns include those its triples are made of, as the very instances they
+    hold, and no others once pruned
+    :param graph:
+    :return:
+    """
+    used = set(term for triple in graph for term in triple if not isinstance(term, Literal))
+
+    assert set(graph._terms) >= used
+
+    if graph._removals == 0:
+        assert set(graph._terms) == used
+
+    for triple in graph:
+        for term in triple:
+            if not isinstance(term, Literal):
+                assert graph._terms[term] is term
+
+
+def test_intern():
+    graph = OntologyGraph()
+
+    #a new instance for every mention, as a parser makes
+    graph.add((URIRef(EX + 'a'), URIRef(EX + 'p'), URIRef(EX + 'b')))
+    graph.add((URIRef(EX + 'b'), URIRef(EX + 'p'), URIRef(EX + 'a')))
+
+    subjects = dict((s, s) for s in graph.subjects())
+    for s, p, o in graph:
+        assert subjects[o] is o
+
+    _check(graph)
+
+
+def test_pruned():
+    prune_after = graphs.PRUNE_AFTER
+
+    try:
+        #pruned as soon as the removals add up to the terms, as in a big graph
+        graphs.PRUNE_AFTER = 0
+
+        for seed in SEEDS:
+            _exercise(random.Random(seed))
+    finally:
+        graphs.PRUNE_AFTER = prune_after
+
+
+def _exercise(rng):
+    """
+    adds and removes random triples and patterns, checking the terms interned after each step
+    :param rng:
+    :return:
+    """
+    graph = OntologyGraph()
+
+    for step in range(30):
+        graph.addN((s, p, o, graph) for s, p, o in (_random_triple(rng) for _ in range(rng.randint(0, 6))))
+
+        for _ in range(rng.randint(0, 4)):
+            s, p, o = _random_triple(rng)
+            kind = rng.random()
+
+            if kind < 0.5:
+                graph.remove((s, p, o))
+            elif kind < 0.95:
+                graph.remove((rng.choice([s, None]), rng.choice([p, None]), rng.choice([o, None])))
+            else:
+                graph.remove((None, None, None))
+
+        _check(graph)
+
+    graph.prune()
+    _check(graph)
+
+
+def test_churn():
+    graph = OntologyGraph()
+    previous = []
+
+    #triples replaced by others with new terms again and again, as an edited ontology's are, never all at once
+    for round in range(20):
+        triples = [(URIRef(EX + 's%d' % i), URIRef(EX + 'p'), URIRef(EX + 'o%d.%d' % (round, i))) for i in range(1000)]
+
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+
+        for triple in previous:
+            graph.remove(triple)
+
+        previous = triples
+
+        assert len(graph._terms) < 2 * graphs.PRUNE_AFTER + 2 * len(triples)
+        _check(graph)
+
+
+def test_versions():
+    graph = OntologyGraph()
+    versions = [graph.version]
+
+    graph.add((TERMS[0], TERMS[1], TERMS[2]))
+    versions.append(graph.version)
+
+    graph.addN([(TERMS[1], TERMS[1], TERMS[2], graph)])
+    versions.append(graph.version)
+
+    graph.remove((TERMS[0], None, None))
+    versions.append(graph.version)
+
+    graph.rollback()
+    versions.append(graph.version)
+
+    assert len(set(versions)) == len(versions)
+    assert OntologyGraph().version not in versions
+
+
+if __name__ == '__main__':
+    test_intern()
+    test_pruned()
+    test_churn()
+    test_versions()
+    print("graph ok")
@@ -0,0 +1,125 @@
+"""
+checks the hierarchy index's interval labels against walking the edges, on seeded random hierarchies with cycles,
+self-loops and nodes with no edges; and that cycles are collapsed into one component.  runs under pytest, or with
+python -m owllib.test_hierarchy
+"""
+
+import random
+
+from owllib.hierarchy import Hierarchy
+
+SEEDS = range(50)
+
+
+def _random_hierarchy(rng):
+    """
+    returns random nodes and (child, parent) edges, mostly pointing up a random order of the nodes, so there are long
+    chains and shared ancestors, with a few pointing back down to make cycles
+    :param rng:
+    :return:
+    """
+    nodes = ['n%d' % i for i in range(rng.randint(1, 40))]
+    edges = []
+
+    for _ in range(rng.randint(0, 2 * len(nodes))):
+        child, parent = sorted(rng.sample(range(len(nodes)), 2)) if len(nodes) > 1 else (0, 0)
+
+        if rng.random() < 0.1:
+            child, parent = parent, child
+        elif rng.random() < 0.03:
+            parent = child
+
+        edges.append((nodes[child], nodes[parent]))
+
+    return nodes, edges
+
+
+def _walk(node, edges):
+    """
+    returns every node reached from :param node by following :param edges one or more times
+    :param node:
+    :param edges: each node to the nodes it points to
+    :return:
+    """
+    reached = set()
+    stack = [node]
+
+    while stack:
+        for target in edges.get(stack.pop(), ()):
+            if target not in reached:
+                reached.add(target)
+                stack.append(target)
+
+    return reached
+
+
+def test_random():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        nodes, edges = _random_hierarchy(rng)
+
+        #some nodes only come up in edges
+        hierarchy = Hierarchy(rng.sample(nodes, len(nodes) // 2), edges)
+
+        up = {}
+        down = {}
+
+        for child, parent in edges:
+            up.setdefault(child, set()).add(parent)
+            down.setdefault(parent, set()).add(child)
+
+        known = set(node for node in nodes if node in hierarchy)
+        assert known >= set(node for edge in edges for node in edge), seed
+
+        for node in known:
+            ancestors = _walk(node, up) - {node}
+            descendants = _walk(node, down) - {node}
+
+            assert hierarchy.ancestors(node) == ancestors, (seed, node)
+            assert hierarchy.descendants(node) == descendants, (seed, node)
+
+            assert hierarchy.parents(node) == up.get(node, set()) - {node}, (seed, node)
+            assert hierarchy.children(node) == down.get(node, set()) - {node}, (seed, node)
+
+            for other in known:
+                assert hierarchy.is_below(node, other) == (node == other or other in ancestors), (seed, node, other)
+
+
+def test_cycles():
+    #a and b are each other's subclass, and c is below both; d is below c and itself
+    hierarchy = Hierarchy(edges=[('a', 'b'), ('b', 'a'), ('c', 'a'), ('d', 'c'), ('d', 'd'), ('a', 'top')])
+
+    components = hierarchy._component
+    ids = hierarchy._ids
+
+    assert components[ids['a']] == components[ids['b']]
+    assert len(set(components)) == 4
+
+    assert hierarchy.ancestors('a') == {'b', 'top'}
+    assert hierarchy.ancestors('d') == {'a', 'b', 'c', 'top'}
+    assert hierarchy.descendants('b') == {'a', 'c', 'd'}
+    assert hierarchy.is_below('a', 'b') and hierarchy.is_below('b', 'a')
+    assert hierarchy.parents('d') == {'c'}
+
+    #nodes that aren't in it are below nothing but themselves
+    assert hierarchy.ancestors('missing') == set()
+    assert hierarchy.is_below('missing', 'missing')
+    assert not hierarchy.is_below('missing', 'a')
+
+
+def test_deep():
+    #deeper than Python's recursion limit, which the labelling doesn't use
+    nodes = ['n%d' % i for i in range(5000)]
+    hierarchy = Hierarchy(edges=zip(nodes[1:], nodes))
+
+    assert hierarchy.is_below(nodes[-1], nodes[0])
+    assert not hierarchy.is_below(nodes[0], nodes[-1])
+    assert len(hierarchy.descendants(nodes[0])) == len(nodes) - 1
+    assert hierarchy.ancestors(nodes[2500]) == set(nodes[:2500])
+
+
+if __name__ == '__main__':
+    test_random()
+    test_cycles()
+    test_deep()
+    print("hierarchy ok")
@@ -0,0 +1,111 @@
+"""
+loads a small import chain with a cycle from a local HTTP server, checking each document is fetched once and the direct
+and indirect imports are wired up.  runs under pytest, or with python -m owllib.test_imports
+"""
+
+import collections
+import functools
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+
+from rdflib import URIRef
+
+from owllib.ontology import Ontology
+
+#each document to the documents it imports: a imports b, which imports c, which imports b and a back
+CHAIN = collections.OrderedDict([('a', ['b']),
+                                 ('b', ['c']),
+                                 ('c', ['b', 'a'])])
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    """
+    serves the documents of a directory, counting the requests for each path
+    """
+    extensions_map = {'.ttl': 'text/turtle', '': 'application/octet-stream'}
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests[self.path] += 1
+
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(directory):
+    """
+    starts an HTTP server for :param directory on a free localhost port
+    :param directory:
+    :return: the server, whose requests counts the requests for each path
+    """
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_Handler, directory=directory))
+    server.requests = collections.Counter()
+    server.lock = threading.Lock()
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def _write_chain(directory, base):
+    """
+    writes the documents of CHAIN to :param directory, each declaring the ontology IRI it is served at under
+    :param base
+    :param directory:
+    :param base:
+    :return:
+    """
+    for name, imports in CHAIN.items():
+        with open(os.path.join(directory, name + '.ttl'), 'w') as f:
+            f.write('@prefix owl: <http://www.w3.org/2002/07/owl#> .\n')
+            f.write('<%s%s.ttl> a owl:Ontology' % (base, name))
+
+            for imported in imports:
+                f.write(' ;\n    owl:imports <%s%s.ttl>' % (base, imported))
+
+            f.write(' .\n<%s%s#Thing> a owl:Class .\n' % (base, name))
+
+
+def test_import_closure():
+    directory = tempfile.mkdtemp()
+    server = _serve(directory)
+
+    try:
+        base = 'http://127.0.0.1:%d/' % server.server_address[1]
+        _write_chain(directory, base)
+
+        ont = Ontology()
+        ont.load(location=base + 'a.ttl')
+
+        uris = dict((name, URIRef(base + name + '.ttl')) for name in CHAIN)
+
+        assert ont.uri == uris['a']
+        assert set(imp.uri for imp in ont.direct_imports) == {uris['b']}
+        assert set(imp.uri for imp in ont.indirect_imports) == {uris['c']}
+
+        #every import is loaded once, and the ontologies importing it share that one
+        b, = ont.direct_imports
+        c, = ont.indirect_imports
+
+        assert c in b.direct_imports
+        assert b in c.direct_imports
+
+        #a document imported back by the cycle is the ontology doing the importing, rather than a second copy
+        assert set(imp.uri for imp in c.direct_imports) == {uris['a'], uris['b']}
+        assert [imp for imp in c.direct_imports if imp.uri == uris['a']] == [ont]
+
+        assert dict(server.requests) == {'/a.ttl': 1, '/b.ttl': 1, '/c.ttl': 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_import_closure()
+    print("import closure loaded")
@@ -0,0 +1,177 @@
+"""
+checks the query memo: that results are dropped least recently used first, by uri, by query, and all at once when the
+graph is found at another version; and that an ontology's memoized get_* queries answer as the graph does through
+random changes, synced from entities or made to the graph directly.  runs under pytest, or with
+python -m owllib.test_memo
+"""
+
+import random
+
+from rdflib import RDF, RDFS, OWL, Literal, URIRef
+
+from owllib.memo import QueryMemo
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+CLASSES = [URIRef(EX + 'C%d' % i) for i in range(8)]
+NOTE = URIRef(EX + 'note')
+
+SEEDS = range(10)
+
+
+def test_memo():
+    memo = QueryMemo(size=3)
+
+    assert memo.get('labels', 'a', 1) is None
+    memo.put('labels', 'a', frozenset(['A']))
+    memo.put('labels', 'b', frozenset(['B']))
+    memo.put('comments', 'a', frozenset())
+
+    assert memo.get('labels', 'a', 1) == frozenset(['A'])
+    assert memo.get('comments', 'a', 1) == frozenset()
+
+    #b was used least recently
+    memo.put('labels', 'c', frozenset(['C']))
+
+    assert memo.get('labels', 'b', 1) is None
+    assert len(memo) == 3 and memo.evictions == 1
+
+    memo.invalidate(['a'])
+
+    assert memo.get('labels', 'a', 1) is None and memo.get('comments', 'a', 1) is None
+    assert memo.get('labels', 'c', 1) == frozenset(['C'])
+
+    memo.put('comments', 'c', frozenset())
+    memo.invalidate_query('labels')
+
+    assert memo.get('labels', 'c', 1) is None
+    assert memo.get('comments', 'c', 1) == frozenset()
+    assert memo._queries == {'c': {'comments'}}
+
+    #moved on with a change made by the ontology, which invalidates what it touched itself
+    memo.advance(1, 2)
+    assert memo.get('comments', 'c', 2) == frozenset()
+
+    #not from the version the memo is at, so it is left behind
+    memo.advance(1, 3)
+    assert memo.get('comments', 'c', 3) is None
+    assert len(memo) == 0
+
+    stats = memo.stats()
+    assert stats['hits'] + stats['misses'] == memo.hits + memo.misses and stats['entries'] == 0
+
+    #keeping nothing
+    memo = QueryMemo(size=0)
+    memo.put('labels', 'a', frozenset(['A']))
+    assert memo.get('labels', 'a', None) is None
+
+
+def _ontology():
+    """
+    returns an ontology declaring the classes and an annotation property
+    :return:
+    """
+    ont = Ontology()
+    ont.load(data=''.join('<%s> a <%s> .\n' % (cls, OWL.Class) for cls in CLASSES) +
+             '<%s> a <%s> .\n' % (NOTE, OWL.AnnotationProperty), format='turtle')
+
+    return ont
+
+
+def _random_triple(rng):
+    cls = rng.choice(CLASSES)
+    kind = rng.random()
+
+    if kind < 0.3:
+        return cls, RDFS.subClassOf, rng.choice(CLASSES)
+    if kind < 0.6:
+        return cls, RDFS.label, Literal(rng.choice('abc'))
+    if kind < 0.8:
+        return cls, NOTE, Literal(rng.choice('xy'))
+
+    return cls, RDFS.comment, Literal(rng.choice('xy'))
+
+
+def _check(ont):
+    """
+    asserts that the get_* queries of :param ont answer as its graph does
+    :param ont:
+    :return:
+    """
+    graph = ont.graph
+    annotations = set(graph.subjects(RDF.type, OWL.AnnotationProperty))
+
+    for uri in CLASSES:
+        assert ont.get_labels(uri) == set(graph.objects(uri, RDFS.label)), uri
+        assert ont.get_comments(uri) == set(graph.objects(uri, RDFS.comment)), uri
+        assert set(entity.uri for entity in ont.get_super_classes(uri)) == set(graph.objects(uri, RDFS.subClassOf))
+        assert ont.get_annotations(uri) == set(pair for pair in graph.predicate_objects(uri) if pair[0] in annotations)
+        assert ont.get_triples(uri) == set(graph.triples((uri, None, None))) | set(graph.triples((None, uri, None))) | \
+            set(graph.triples((None, None, uri)))
+
+
+def test_ontology():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        ont = _ontology()
+
+        for step in range(30):
+            _check(ont)
+
+            s, p, o = triple = _random_triple(rng)
+            kind = rng.random()
+
+            if kind < 0.6:
+                cls = ont.convert(s)
+                (cls.triples.discard if triple in cls.triples else cls.triples.add)(triple)
+
+                ont.sync_to_graph()
+
+                #only what the change touched is dropped, and the memo moves on to the graph's version
+                assert ont.memo.version == ont.graph.version, (seed, step)
+            elif kind < 0.9:
+                #behind the ontology's back, so everything is dropped on the next query; the entity is invalidated as the
+                #caller of a direct change has to, only so its triples are read again for the next edit
+                (ont.graph.remove if triple in ont.graph else ont.graph.add)(triple)
+                ont.invalidate(s)
+            else:
+                #declaring an annotation property changes the annotations of everything using it
+                note = ont.convert(NOTE)
+                declaration = (NOTE, RDF.type, OWL.AnnotationProperty)
+                (note.triples.discard if declaration in note.triples else note.triples.add)(declaration)
+                ont.sync_to_graph()
+
+        _check(ont)
+
+
+def test_kept_for_other_uris():
+    ont = _ontology()
+
+    ont.get_labels(CLASSES[0])
+    ont.get_labels(CLASSES[1])
+
+    cls = ont.convert(CLASSES[0])
+    cls.triples.add((CLASSES[0], RDFS.label, Literal('zero')))
+    ont.sync_to_graph()
+
+    hits = ont.memo.hits
+
+    assert ont.get_labels(CLASSES[1]) == set()
+    assert ont.memo.hits == hits + 1
+
+    assert ont.get_labels(CLASSES[0]) == {Literal('zero')}
+    assert ont.memo.hits == hits + 1
+
+    #changed directly, so nothing kept can be trusted
+    ont.graph.add((CLASSES[1], RDFS.label, Literal('one')))
+
+    assert ont.get_labels(CLASSES[1]) == {Literal('one')}
+    assert len(ont.memo) == 1
+
+
+if __name__ == '__main__':
+    test_memo()
+    test_ontology()
+    test_kept_for_other_uris()
+    print("memo ok")
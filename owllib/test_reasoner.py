@@ -0,0 +1,217 @@
+"""
+checks the reasoner's semi-naive materialization, and its incremental updates, against a naive fixpoint of the same
+rules worked out from scratch, on seeded random ontologies.  runs under pytest, or with python -m owllib.test_reasoner
+"""
+
+import random
+
+from rdflib import RDF, RDFS, OWL, Literal, URIRef
+
+from owllib.ontology import Ontology
+from owllib.reasoner import OWL_RL_RULES, RDFS_RULES, Reasoner
+
+EX = 'http://example.org/'
+
+CLASSES = [URIRef(EX + 'C%d' % i) for i in range(10)]
+PROPERTIES = [URIRef(EX + 'p%d' % i) for i in range(5)]
+INDIVIDUALS = [URIRef(EX + 'i%d' % i) for i in range(8)]
+
+SEEDS = range(25)
+
+
+def _random_triple(rng):
+    """
+    returns a random triple over a few classes, properties and individuals, using the predicates the rules match on
+    :param rng:
+    :return:
+    """
+    kind = rng.random()
+
+    if kind < 0.25:
+        return rng.choice(CLASSES), RDFS.subClassOf, rng.choice(CLASSES)
+    if kind < 0.4:
+        return rng.choice(INDIVIDUALS), RDF.type, rng.choice(CLASSES)
+    if kind < 0.6:
+        return rng.choice(INDIVIDUALS), rng.choice(PROPERTIES), rng.choice(INDIVIDUALS + [Literal('x')])
+    if kind < 0.67:
+        return rng.choice(PROPERTIES), RDFS.subPropertyOf, rng.choice(PROPERTIES)
+    if kind < 0.74:
+        return rng.choice(PROPERTIES), rng.choice([RDFS.domain, RDFS.range]), rng.choice(CLASSES)
+    if kind < 0.8:
+        return rng.choice(PROPERTIES), OWL.inverseOf, rng.choice(PROPERTIES)
+    if kind < 0.86:
+        return rng.choice(PROPERTIES), RDF.type, rng.choice([OWL.SymmetricProperty, OWL.TransitiveProperty])
+    if kind < 0.93:
+        return rng.choice(CLASSES), OWL.equivalentClass, rng.choice(CLASSES)
+
+    return rng.choice(PROPERTIES), OWL.equivalentProperty, rng.choice(PROPERTIES)
+
+
+def _variable(term):
+    """
+    returns true if :param term is a rule variable rather than an rdflib term
+    :param term:
+    :return:
+    """
+    return type(term) is str and term.startswith('?')
+
+
+def _matches(pattern, triple, bindings):
+    """
+    returns :param bindings extended so :param pattern matches :param triple, or None if it can't
+    :param pattern:
+    :param triple:
+    :param bindings:
+    :return:
+    """
+    bindings = dict(bindings)
+
+    for term, value in zip(pattern, triple):
+        if _variable(term):
+            if bindings.setdefault(term, value) != value:
+                return None
+        elif term != value:
+            return None
+
+    return bindings
+
+
+def _closure(triples, rules):
+    """
+    returns :param triples and everything :param rules entail from them, by applying every rule to every fact until
+    nothing new turns up
+    :param triples:
+    :param rules:
+    :return:
+    """
+    facts = set(triples)
+
+    while True:
+        new = set()
+
+        #only to narrow down the facts each pattern is tried against
+        by_predicate = {}
+        for fact in facts:
+            by_predicate.setdefault(fact[1], []).append(fact)
+
+        for rule in rules:
+            solutions = [{}]
+
+            for pattern in rule.body:
+                extended = []
+
+                for bindings in solutions:
+                    predicate = bindings.get(pattern[1], pattern[1])
+                    candidates = facts if _variable(predicate) else by_predicate.get(predicate, ())
+
+                    for fact in candidates:
+                        found = _matches(pattern, fact, bindings)
+
+                        if found is not None:
+                            extended.append(found)
+
+                solutions = extended
+
+            for bindings in solutions:
+                head = tuple(bindings.get(term, term) for term in rule.head)
+
+                #what can't be written to a graph isn't inferred
+                if not isinstance(head[0], Literal) and isinstance(head[1], URIRef) and head not in facts:
+                    new.add(head)
+
+        if not new:
+            return facts
+
+        facts |= new
+
+
+def test_materialize():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+
+        for rules in (RDFS_RULES, OWL_RL_RULES):
+            asserted = set(_random_triple(rng) for _ in range(30))
+            inferred = Reasoner(rules).materialize(asserted)
+
+            assert inferred == _closure(asserted, rules) - asserted, seed
+
+
+def test_update():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+
+        asserted = set(_random_triple(rng) for _ in range(30))
+        reasoner = Reasoner(OWL_RL_RULES)
+        graph = asserted | reasoner.materialize(asserted)
+
+        for step in range(10):
+            removed = set(rng.sample(sorted(asserted), min(len(asserted), rng.randint(0, 4))))
+            #as from an ontology: triples already in the graph aren't added again
+            added = set(_random_triple(rng) for _ in range(rng.randint(0, 4))) - graph
+
+            retracted, inferred = reasoner.update(removed, added)
+
+            graph = ((graph - removed) | added) - retracted | inferred
+            asserted = (asserted - removed) | added
+
+            expected = _closure(asserted, OWL_RL_RULES)
+
+            assert graph == expected, (seed, step)
+            assert reasoner.inferred == expected - asserted, (seed, step)
+
+
+def _declarations():
+    """
+    returns the triples declaring the classes, properties and individuals, so each is an entity of the ontology
+    :return:
+    """
+    declarations = set((cls, RDF.type, OWL.Class) for cls in CLASSES)
+    declarations |= set((prop, RDF.type, OWL.ObjectProperty) for prop in PROPERTIES)
+    declarations |= set((individual, RDF.type, OWL.NamedIndividual) for individual in INDIVIDUALS)
+
+    return declarations
+
+
+def test_ontology():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+
+        ont = Ontology()
+
+        #the ontology's own declaration is asserted too
+        asserted = set(ont.graph) | _declarations() | set(_random_triple(rng) for _ in range(30))
+
+        ont.graph.addN((s, p, o, ont.graph) for s, p, o in asserted)
+        ont.sync_from_graph()
+        ont.materialize()
+
+        assert set(ont.graph) == _closure(asserted, OWL_RL_RULES), seed
+
+        for step in range(8):
+            for _ in range(rng.randint(1, 3)):
+                triple = _random_triple(rng)
+                entity = ont.convert(triple[0])
+
+                own = sorted((t for t in asserted if t[0] == entity.uri and t[1] != RDF.type), key=str)
+
+                if own and rng.random() < 0.5:
+                    entity.triples.discard(own[0])
+                    asserted.discard(own[0])
+                elif triple not in ont.graph:
+                    entity.triples.add(triple)
+                    asserted.add(triple)
+
+            ont.sync_to_graph()
+
+            assert set(ont.graph) == _closure(asserted, OWL_RL_RULES), (seed, step)
+
+        ont.dematerialize()
+
+        assert set(ont.graph) == asserted, seed
+
+
+if __name__ == '__main__':
+    test_materialize()
+    test_update()
+    test_ontology()
+    print("reasoner ok")
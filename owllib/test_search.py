@@ -0,0 +1,73 @@
+"""
+checks that every kind of search finds entities by their labels, synonyms and definitions alike, as Ontology.search
+documents.  runs under pytest, or with python -m owllib.test_search
+"""
+
+from rdflib import URIRef
+
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+DOCUMENT = '''@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix oio: <http://www.geneontology.org/formats/oboInOwl#> .
+@prefix skos: <http://www.w3.org/2004/02/skos/core#> .
+@prefix ex: <http://example.org/> .
+
+ex:heart a owl:Class ; rdfs:label "heart" .
+ex:liver a owl:Class ; rdfs:label "liver" ; oio:hasExactSynonym "hepar" .
+ex:lung a owl:Class ; rdfs:label "lung" ; skos:altLabel "pulmo" ;
+    <http://purl.obolibrary.org/obo/IAO_0000115> "a hollow organ of respiration" .
+'''
+
+
+def _ontology():
+    ont = Ontology()
+    ont.load(data=DOCUMENT, format='turtle')
+
+    return ont
+
+
+def _uris(entities):
+    return [entity.uri for entity in entities]
+
+
+def test_labels():
+    ont = _ontology()
+
+    assert _uris(ont.search('heart')) == [URIRef(EX + 'heart')]
+    assert _uris(ont.search('  HEART ', match='case_insensitive')) == [URIRef(EX + 'heart')]
+    assert _uris(ont.search('li', match='prefix')) == [URIRef(EX + 'liver')]
+    assert _uris(ont.search('hart', match='similar')) == [URIRef(EX + 'heart')]
+
+
+def test_synonyms_and_definitions():
+    ont = _ontology()
+
+    assert _uris(ont.search('hepar')) == [URIRef(EX + 'liver')]
+    assert _uris(ont.search('PULMO', match='case_insensitive')) == [URIRef(EX + 'lung')]
+
+    #prefix and similar matches aren't confined to labels
+    assert _uris(ont.search('hep', match='prefix')) == [URIRef(EX + 'liver')]
+    assert _uris(ont.search('a hollow', match='prefix')) == [URIRef(EX + 'lung')]
+    assert _uris(ont.search('pulmu', match='similar')) == [URIRef(EX + 'lung')]
+
+    #the text matched orders prefix matches, whichever kind it is
+    assert _uris(ont.search('h', match='prefix')) == [URIRef(EX + 'heart'), URIRef(EX + 'liver')]
+
+
+def test_unknown_match():
+    try:
+        _ontology().search('heart', match='regex')
+    except ValueError as e:
+        assert 'regex' in str(e)
+    else:
+        raise AssertionError("An unknown match was accepted")
+
+
+if __name__ == '__main__':
+    test_labels()
+    test_synonyms_and_definitions()
+    test_unknown_match()
+    print("search ok")
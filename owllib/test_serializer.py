@@ -0,0 +1,171 @@
+"""
+checks that what owllib.serializer writes, as N-Triples, Turtle and RDF/XML, sorted or not, parses back to the graph it
+was written from, and that sorted output doesn't depend on the order the graph was built in.  runs under pytest, or with
+python -m owllib.test_serializer
+"""
+
+import io
+import os
+import pathlib
+import random
+import shutil
+import tempfile
+
+from rdflib import Graph, RDF, RDFS, OWL, BNode, Literal, URIRef, XSD
+from rdflib.collection import Collection
+from rdflib.compare import isomorphic
+
+from owllib import serializer
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+SEEDS = range(10)
+
+
+def _graph():
+    """
+    returns a graph with what the writers treat specially: literals of every kind and with characters to escape, blank
+    nodes referenced once, more than once, not at all and in a cycle, and collections
+    :return:
+    """
+    graph = Graph()
+    graph.bind('ex', EX)
+    graph.bind('owl', str(OWL))
+
+    a = URIRef(EX + 'A')
+    b = URIRef(EX + 'B')
+    p = URIRef(EX + 'p')
+
+    graph.add((a, RDF.type, OWL.Class))
+    graph.add((b, RDFS.subClassOf, a))
+    graph.add((a, RDFS.label, Literal('A "quoted"\nline \\ and ünïcode')))
+    graph.add((a, RDFS.label, Literal('a', lang='en')))
+    graph.add((a, RDFS.comment, Literal('1', datatype=XSD.integer)))
+    graph.add((a, p, URIRef(EX + 'path/not-a-local-name')))
+
+    #referenced once, and so inline in Turtle
+    once = BNode()
+    graph.add((b, p, once))
+    graph.add((once, RDFS.label, Literal('once')))
+
+    #referenced twice, and so labelled
+    twice = BNode()
+    graph.add((a, p, twice))
+    graph.add((b, p, twice))
+    graph.add((twice, RDFS.label, Literal('twice')))
+
+    #referenced nowhere
+    graph.add((BNode(), RDFS.label, Literal('nowhere')))
+
+    #each referenced once, but only by the other
+    first, second = BNode(), BNode()
+    graph.add((first, p, second))
+    graph.add((second, p, first))
+
+    #a collection, an empty one, and a collection nested in one
+    union = BNode()
+    graph.add((a, OWL.unionOf, union))
+    Collection(graph, union, [b, Literal('x'), a])
+    graph.add((b, OWL.unionOf, RDF.nil))
+
+    outer, inner = BNode(), BNode()
+    graph.add((b, OWL.oneOf, outer))
+    Collection(graph, inner, [a])
+    Collection(graph, outer, [inner, b])
+
+    return graph
+
+
+def _written(graph, format, sort):
+    """
+    returns what :param graph is written as in :param format, parsed back
+    :param graph:
+    :param format:
+    :param sort:
+    :return:
+    """
+    out = io.BytesIO()
+    serializer.serialize(graph, out, format, sort)
+
+    parsed = Graph()
+    parsed.parse(data=out.getvalue(), format=format)
+
+    return parsed
+
+
+def test_round_trip():
+    graph = _graph()
+
+    for format in serializer.FORMATS:
+        for sort in (False, True):
+            assert isomorphic(_written(graph, format, sort), graph), (format, sort)
+
+
+def test_random():
+    for seed in SEEDS:
+        rng = random.Random(seed)
+
+        subjects = [URIRef(EX + 's%d' % i) for i in range(5)] + [BNode() for _ in range(4)]
+        objects = subjects + [Literal('x'), Literal('x', lang='en'), Literal(1)]
+        predicates = [URIRef(EX + 'p%d' % i) for i in range(3)] + [RDF.type]
+
+        graph = Graph()
+        for _ in range(rng.randint(1, 40)):
+            graph.add((rng.choice(subjects), rng.choice(predicates), rng.choice(objects)))
+
+        for format in serializer.FORMATS:
+            for sort in (False, True):
+                assert isomorphic(_written(graph, format, sort), graph), (seed, format, sort)
+
+
+def test_sorted():
+    graph = _graph()
+    triples = list(graph)
+
+    for format in serializer.FORMATS:
+        written = set()
+
+        for seed in SEEDS:
+            random.Random(seed).shuffle(triples)
+
+            shuffled = Graph()
+            for prefix, namespace in graph.namespaces():
+                shuffled.bind(prefix, namespace)
+            shuffled.addN((s, p, o, shuffled) for s, p, o in triples)
+
+            out = io.StringIO()
+            serializer.serialize(shuffled, out, format, sort=True)
+            written.add(out.getvalue())
+
+        assert len(written) == 1, format
+
+
+def test_save():
+    directory = pathlib.Path(tempfile.mkdtemp())
+
+    try:
+        graph = _graph()
+
+        ont = Ontology()
+        ont.graph.remove((None, None, None))
+        ont.graph.addN((s, p, o, ont.graph) for s, p, o in graph)
+
+        #the format is guessed from the extension
+        for name, format in (('ontology.nt', 'nt'), ('ontology.ttl', 'turtle'), ('ontology.owl', 'xml')):
+            ont.save(directory / name)
+
+            parsed = Graph()
+            parsed.parse(os.fspath(directory / name), format=format)
+
+            assert isomorphic(parsed, graph), name
+    finally:
+        shutil.rmtree(str(directory), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_round_trip()
+    test_random()
+    test_sorted()
+    test_save()
+    print("serializer ok")
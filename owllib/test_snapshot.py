@@ -0,0 +1,183 @@
+"""
+checks that a snapshot loads back the ontology it was taken of, and is found stale once its source changes or goes,
+whether the source is a local file or served without an ETag or Last-Modified.  runs under pytest, or with
+python -m owllib.test_snapshot
+"""
+
+import functools
+import http.server
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+
+from rdflib import RDFS, URIRef
+
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+DOCUMENT = '''@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.org/> .
+
+ex: a owl:Ontology .
+ex:A a owl:Class ; rdfs:label "A" .
+ex:B a owl:Class ; rdfs:subClassOf ex:A ; rdfs:comment "a B" .
+ex:p a owl:ObjectProperty .
+ex:note a owl:AnnotationProperty .
+ex:i a owl:NamedIndividual, ex:B ; ex:note "noted" ; ex:p [ rdfs:label "anonymous" ] .
+'''
+
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def _uris(entities):
+    return set(entity.uri for entity in entities)
+
+
+def _assert_same(ont, loaded):
+    """
+    asserts that :param loaded holds the graph and entities of :param ont
+    :param ont:
+    :param loaded:
+    :return:
+    """
+    assert loaded.uri == ont.uri
+    assert len(loaded.graph) == len(ont.graph)
+    assert set(loaded.graph) == set(ont.graph)
+
+    for name in ('classes', 'individuals', 'object_properties', 'annotation_properties', 'data_properties'):
+        assert _uris(getattr(loaded, name)) == _uris(getattr(ont, name)), name
+
+    b = loaded.convert(URIRef(EX + 'B'))
+    assert _uris(b.parents) == {URIRef(EX + 'A')}
+    assert _uris(loaded.convert(URIRef(EX + 'A')).children) == {URIRef(EX + 'B')}
+    assert _uris(loaded.convert(URIRef(EX + 'i')).parents) == {URIRef(EX + 'B')}
+
+
+def test_round_trip():
+    directory = pathlib.Path(tempfile.mkdtemp())
+
+    try:
+        source = directory / 'source.ttl'
+        _write(source, DOCUMENT)
+
+        ont = Ontology()
+        ont.load(location=str(source), format='turtle')
+
+        #paths may be pathlib paths
+        ont.save_snapshot(directory / 'ontology.snap')
+
+        for lazy in (False, True):
+            loaded = Ontology()
+            loaded.load_snapshot(directory / 'ontology.snap', lazy=lazy)
+
+            _assert_same(ont, loaded)
+            assert loaded.location == str(source)
+    finally:
+        shutil.rmtree(str(directory), ignore_errors=True)
+
+
+def test_stale():
+    directory = tempfile.mkdtemp()
+
+    try:
+        source = os.path.join(directory, 'source.ttl')
+        path = os.path.join(directory, 'ontology.snap')
+        _write(source, DOCUMENT)
+
+        ont = Ontology()
+        ont.load(location=source, format='turtle')
+
+        #changed after it was loaded, but before the snapshot was saved, so the snapshot doesn't hold the change
+        _write(source, DOCUMENT + '<%sC> <%s> "C" .\n' % (EX, RDFS.label))
+        ont.save_snapshot(path)
+
+        _assert_stale(path, 'changed')
+
+        #as loaded again
+        _write(source, DOCUMENT)
+        Ontology().load_snapshot(path)
+
+        os.remove(source)
+        _assert_stale(path, 'no longer exists')
+
+        #unless asked not to check
+        Ontology().load_snapshot(path, check=False)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _assert_stale(path, reason):
+    """
+    asserts that loading the snapshot at :param path fails for being stale, for :param reason
+    :param path:
+    :param reason:
+    :return:
+    """
+    try:
+        Ontology().load_snapshot(path)
+    except ValueError as e:
+        assert 'stale' in str(e) and reason in str(e), str(e)
+    else:
+        raise AssertionError("A stale snapshot was loaded: " + path)
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    """
+    serves the documents of a directory without an ETag or Last-Modified
+    """
+    extensions_map = {'.ttl': 'text/turtle', '': 'application/octet-stream'}
+
+    def send_header(self, keyword, value):
+        if keyword.lower() not in ('etag', 'last-modified'):
+            super().send_header(keyword, value)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_stale_remote():
+    directory = tempfile.mkdtemp()
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_Handler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        source = os.path.join(directory, 'source.ttl')
+        path = os.path.join(directory, 'ontology.snap')
+        _write(source, DOCUMENT)
+
+        ont = Ontology()
+        ont.load(location='http://127.0.0.1:%d/source.ttl' % server.server_address[1])
+        ont.save_snapshot(path)
+
+        #with nothing else to go by, the content is hashed
+        assert ont.fingerprint.startswith('sha1:')
+
+        _assert_same(ont, _loaded(path))
+
+        _write(source, DOCUMENT + '<%sC> <%s> "C" .\n' % (EX, RDFS.label))
+        _assert_stale(path, 'changed')
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _loaded(path):
+    loaded = Ontology()
+    loaded.load_snapshot(path)
+
+    return loaded
+
+
+if __name__ == '__main__':
+    test_round_trip()
+    test_stale()
+    test_stale_remote()
+    print("snapshot ok")
@@ -0,0 +1,227 @@
+"""
+checks the stores of owllib.stores against rdflib's in-memory store: every triple pattern, removal and count, through
+random additions and removals; and that the SQLite store keeps its triples when closed, rolls back, and builds its
+indexes after a bulk load.  runs under pytest, or with python -m owllib.test_stores
+"""
+
+import itertools
+import os
+import random
+import shutil
+import tempfile
+
+from rdflib import Graph, BNode, Literal, URIRef, XSD
+
+from owllib.stores import columnar
+from owllib.stores.columnar import ColumnarStore
+from owllib.stores.sqlite import SQLiteStore
+
+EX = 'http://example.org/'
+
+#the terms triples are made of: uris, a blank node, and literals plain, tagged and typed, some of them equal in value
+SUBJECTS = [URIRef(EX + 's%d' % i) for i in range(6)] + [BNode('b0')]
+PREDICATES = [URIRef(EX + 'p%d' % i) for i in range(3)]
+OBJECTS = SUBJECTS[:4] + [Literal('x'), Literal('x', lang='en'), Literal('1', datatype=XSD.integer), Literal('1')]
+
+#a term in no triple, so each pattern is also tried with a term the store doesn't hold
+MISSING = URIRef(EX + 'missing')
+
+SEEDS = range(10)
+
+
+def _random_triple(rng):
+    return rng.choice(SUBJECTS), rng.choice(PREDICATES), rng.choice(OBJECTS)
+
+
+def _patterns():
+    """
+    yields a pattern of every shape, with each of the terms, and with a term that isn't stored, in each bound position
+    :return:
+    """
+    for s, p, o in itertools.product([None, MISSING] + SUBJECTS, [None, MISSING] + PREDICATES,
+                                     [None, MISSING] + OBJECTS):
+        yield s, p, o
+
+
+def _check(graph, reference):
+    """
+    asserts that :param graph holds what :param reference, an rdflib in-memory graph, does
+    :param graph:
+    :param reference:
+    :return:
+    """
+    assert len(graph) == len(reference)
+
+    for pattern in _patterns():
+        found = list(graph.triples(pattern))
+
+        assert len(found) == len(set(found)), pattern
+        assert set(found) == set(reference.triples(pattern)), pattern
+
+
+def _exercise(graph, rng, steps=20):
+    """
+    adds and removes random triples and patterns on :param graph and an in-memory graph alike, checking them against
+    each other after each step
+    :param graph:
+    :param rng:
+    :param steps:
+    :return:
+    """
+    reference = Graph()
+
+    for step in range(steps):
+        triples = [_random_triple(rng) for _ in range(rng.randint(0, 30))]
+
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+        reference.addN((s, p, o, reference) for s, p, o in triples)
+
+        for _ in range(rng.randint(0, 3)):
+            s, p, o = _random_triple(rng)
+            pattern = (rng.choice([s, None]), rng.choice([p, None]), rng.choice([o, None]))
+
+            #everything goes now and then, as when an ontology is loaded afresh
+            if pattern == (None, None, None) and rng.random() < 0.7:
+                continue
+
+            graph.remove(pattern)
+            reference.remove(pattern)
+
+        _check(graph, reference)
+
+    return reference
+
+
+def test_columnar():
+    merge_batch = columnar.MERGE_BATCH
+
+    try:
+        for seed in SEEDS:
+            rng = random.Random(seed)
+
+            #small batches, so the pending changes are merged into the columns as the test goes
+            columnar.MERGE_BATCH = rng.choice([4, 16, 1 << 16])
+
+            graph = Graph(store=ColumnarStore())
+            reference = _exercise(graph, rng)
+
+            graph.store.merge()
+            _check(graph, reference)
+    finally:
+        columnar.MERGE_BATCH = merge_batch
+
+
+def _sqlite_graph(path):
+    """
+    returns a graph over a SQLite store in the database at :param path
+    :param path:
+    :return:
+    """
+    return Graph(store=SQLiteStore(path))
+
+
+def test_sqlite():
+    directory = tempfile.mkdtemp()
+
+    try:
+        for seed in SEEDS:
+            graph = _sqlite_graph(os.path.join(directory, '%d.db' % seed))
+            _exercise(graph, random.Random(seed))
+            graph.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_sqlite_reopen():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'reopen.db')
+
+    try:
+        graph = _sqlite_graph(path)
+        reference = _exercise(graph, random.Random(0))
+        graph.close()
+
+        graph = _sqlite_graph(path)
+        _check(graph, reference)
+
+        #namespaces are kept too
+        graph.bind('ex', EX)
+        graph.close()
+
+        graph = _sqlite_graph(path)
+        assert graph.store.namespace('ex') == URIRef(EX)
+        graph.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_sqlite_rollback():
+    directory = tempfile.mkdtemp()
+    rng = random.Random(0)
+
+    try:
+        graph = _sqlite_graph(os.path.join(directory, 'rollback.db'))
+        reference = _exercise(graph, rng, steps=5)
+        graph.commit()
+
+        #added, some still buffered, and removed since the commit; all of it undone
+        graph.addN((s, p, o, graph) for s, p, o in (_random_triple(rng) for _ in range(50)))
+        graph.remove((SUBJECTS[0], None, None))
+        graph.add((MISSING, PREDICATES[0], MISSING))
+        graph.rollback()
+
+        _check(graph, reference)
+        graph.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_sqlite_bulk_load():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bulk.db')
+    rng = random.Random(0)
+
+    try:
+        graph = _sqlite_graph(path)
+        store = graph.store
+        reference = Graph()
+
+        triples = [_random_triple(rng) for _ in range(200)]
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+        reference.addN((s, p, o, reference) for s, p, o in triples)
+
+        #the secondary indexes are dropped for a load into an empty store, and built on the first lookup
+        assert len(graph) == len(reference)
+        assert not store._indexed and not store._has_indexes()
+
+        _check(graph, reference)
+        assert store._indexed and store._has_indexes()
+
+        #a store closed before they were built builds them when it is reopened
+        graph.remove((None, None, None))
+        graph.addN((s, p, o, graph) for s, p, o in triples)
+        len(graph)
+        assert not store._has_indexes()
+        graph.close()
+
+        graph = _sqlite_graph(path)
+        assert graph.store._has_indexes()
+        _check(graph, reference)
+
+        #loading afresh drops the terms of the last load
+        graph.remove((None, None, None))
+        graph.add((MISSING, PREDICATES[0], MISSING))
+        assert len(graph) == 1
+        assert graph.store._connection.execute('SELECT COUNT(*) FROM terms').fetchone()[0] == 2
+        graph.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    test_columnar()
+    test_sqlite()
+    test_sqlite_reopen()
+    test_sqlite_rollback()
+    test_sqlite_bulk_load()
+    print("stores ok")
@@ -0,0 +1,117 @@
+"""
+checks that sync_to_graph writes every changed entity, however it was added to the ontology.  runs under pytest, or
+with python -m owllib.test_sync
+"""
+
+from rdflib import RDF, RDFS, OWL, Literal, URIRef
+
+from owllib.entities import Class
+from owllib.ontology import Ontology
+
+EX = 'http://example.org/'
+
+
+def _ontology():
+    """
+    returns an ontology holding one class
+    :return:
+    """
+    ont = Ontology()
+    ont.load(data='<%sA> a <%s> .' % (EX, OWL.Class), format='turtle')
+
+    return ont
+
+
+def _new_class(name):
+    """
+    returns a class that belongs to no ontology yet, with a declaration and a label, and so dirty
+    :param name:
+    :return:
+    """
+    uri = URIRef(EX + name)
+    cls = Class(uri=uri)
+    cls.triples = {(uri, RDF.type, OWL.Class), (uri, RDFS.label, Literal(name))}
+
+    return cls
+
+
+def test_add_entity_changed_before():
+    ont = _ontology()
+    cls = _new_class('B')
+
+    assert cls.dirty
+
+    ont.add_entity(cls)
+    ont.sync_to_graph()
+
+    assert (cls.uri, RDFS.label, Literal('B')) in ont.graph
+    assert not cls.dirty
+
+
+def test_public_set():
+    ont = _ontology()
+    cls = _new_class('C')
+
+    ont.classes.add(cls)
+    ont.sync_to_graph()
+
+    assert (cls.uri, RDFS.label, Literal('C')) in ont.graph
+    assert not cls.dirty
+
+    #changed again after the sync, still without an ontology to track it
+    cls.triples = {(cls.uri, RDF.type, OWL.Class), (cls.uri, RDFS.label, Literal('C2'))}
+    ont.sync_to_graph()
+
+    assert (cls.uri, RDFS.label, Literal('C2')) in ont.graph
+    assert (cls.uri, RDFS.label, Literal('C')) not in ont.graph
+
+
+def test_public_set_indexed():
+    ont = _ontology()
+    b, c, d, e = [_new_class(name) for name in 'BCDE']
+
+    #however they are put in the public sets, entities are found without the graph knowing of them
+    ont.classes.add(b)
+    ont.classes |= {c}
+    ont.classes.update([d])
+    ont.classes = ont.classes | {e}
+
+    for cls in (b, c, d, e):
+        assert ont._entity_index[cls.uri] is cls
+
+    ont.sync_to_graph()
+
+    assert ont.convert(e.uri) is e
+
+    #an entity already in the index for the uri stays
+    other = _new_class('B')
+    ont.classes.add(other)
+
+    assert ont.convert(b.uri) is b
+
+    #anything else the graph mentions isn't an entity
+    try:
+        ont.convert(RDFS.label)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("A predicate was converted to an entity")
+
+
+def test_only_dirty_written():
+    ont = _ontology()
+    cls = ont.convert(URIRef(EX + 'A'))
+
+    cls.triples.add((cls.uri, RDFS.label, Literal('A')))
+    ont.sync_to_graph()
+
+    assert (cls.uri, RDFS.label, Literal('A')) in ont.graph
+    assert len(ont.graph) == 2
+
+
+if __name__ == '__main__':
+    test_add_entity_changed_before()
+    test_public_set()
+    test_public_set_indexed()
+    test_only_dirty_written()
+    print("sync ok")